@@ -0,0 +1,70 @@
+"""
+Orchestration overhead of the sweep drivers against the in-repo fake Fluent:
+pytest benchmarks/test_bench_orchestration.py
+
+- per-angle driver cost with zero RPC latency (pure Python overhead) and the RPCs
+  it issues, reported in ``extra_info``;
+- sweep throughput of 1/2/4 parallel sessions when every RPC costs
+  ``FAKE_FLUENT_LATENCY`` seconds (1 ms by default).
+
+Timings are only reported when benchmarking is enabled; the RPC budget per angle
+is asserted either way, so ``--benchmark-disable`` still catches a chattier driver.
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent.parent / "tests"))
+
+from src.config import SolverConfig
+from src.parallel import solve_parallel_sweep
+from src.solver import solve_sweep
+from fakes import fake_pyfluent
+
+pytest.importorskip("pytest_benchmark")
+
+ANGLES = [float(a) for a in range(-4, 12)]
+LATENCY = float(os.environ.get("FAKE_FLUENT_LATENCY") or 1e-3)
+# RPCs per angle of a cold sweep, setup included (37.5 when this was written)
+MAX_RPC_PER_ANGLE = 40
+
+@pytest.fixture
+def fake_fluent():
+    with fake_pyfluent() as fluent:
+        yield fluent
+        fluent.reset()
+
+def _cfg(**kw) -> SolverConfig:
+    return SolverConfig(aoa_deg=ANGLES, history=False, **kw)
+
+@pytest.mark.benchmark(group="orchestration")
+def test_sweep_overhead_per_angle(benchmark, fake_fluent, tmp_path: Path):
+    fake_fluent.reset(latency_s=0.0)
+    sessions = []
+
+    def sweep():
+        sessions.append(fake_fluent.launch_fluent(mode="solver"))
+        solve_sweep(sessions[-1], _cfg(), str(tmp_path / "res.csv"))
+
+    benchmark(sweep)
+    rpc_per_angle = sessions[-1].rpc_count / len(ANGLES)
+    benchmark.extra_info["angles"] = len(ANGLES)
+    benchmark.extra_info["rpc_per_angle"] = rpc_per_angle
+    if not benchmark.disabled:
+        benchmark.extra_info["ms_per_angle"] = 1e3 * benchmark.stats.stats.mean / len(ANGLES)
+    assert rpc_per_angle <= MAX_RPC_PER_ANGLE
+
+@pytest.mark.benchmark(group="orchestration-scaling")
+@pytest.mark.parametrize("n_sessions", [1, 2, 4])
+def test_parallel_sweep_throughput(benchmark, fake_fluent, tmp_path: Path, n_sessions: int):
+    fake_fluent.reset(latency_s=LATENCY)
+    cfg = _cfg(n_sessions=n_sessions, processors=4)
+
+    benchmark.pedantic(solve_parallel_sweep, args=("wing.msh.h5", cfg, str(tmp_path / "res.csv")),
+                       rounds=2, iterations=1)
+    benchmark.extra_info["latency_s"] = LATENCY
+    if not benchmark.disabled:
+        benchmark.extra_info["angles_per_s"] = len(ANGLES) / benchmark.stats.stats.mean
@@ -0,0 +1,29 @@
+"""Cost of instrumentation when telemetry is off vs. on: pytest benchmarks/test_bench_telemetry.py"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src import telemetry
+
+pytest.importorskip("pytest_benchmark")
+
+def _spans(n=1000):
+    for i in range(n):
+        with telemetry.span("solver.iterate", aoa=float(i)):
+            pass
+
+@pytest.mark.benchmark(group="telemetry")
+def test_span_disabled(benchmark):
+    telemetry.disable()
+    benchmark(_spans)
+
+@pytest.mark.benchmark(group="telemetry")
+def test_span_enabled(benchmark):
+    telemetry.enable()
+    try:
+        benchmark(_spans)
+    finally:
+        telemetry.disable()
@@ -0,0 +1,44 @@
+"""Scalar loop vs. array sizing over a design space: pytest benchmarks/ --benchmark-group-by=group"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src import utils
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pytest_benchmark")
+
+N = 20_000
+
+@pytest.fixture(scope="module")
+def design_space():
+    rng = np.random.default_rng(0)
+    h = rng.uniform(0.0, 15000.0, N)
+    mach = rng.uniform(0.1, 0.8, N)
+    return h, mach
+
+def _scalar(h, mach):
+    out = []
+    for hi, mi in zip(h.tolist(), mach.tolist()):
+        T, p, _ = utils.isa_atmosphere(hi)
+        U = utils.u_inf_from_mach(mi, T)
+        out.append(utils.first_layer_height_from_yplus(1.0, U, 0.3, T, p)[0])
+    return out
+
+def _array(h, mach):
+    T, p, _ = utils.isa_atmosphere_array(h)
+    U = utils.u_inf_from_mach_array(mach, T)
+    return utils.first_layer_height_from_yplus_array(1.0, U, 0.3, T, p)[0]
+
+@pytest.mark.benchmark(group="yplus-sizing")
+def test_bench_yplus_scalar_loop(benchmark, design_space):
+    y1 = benchmark(_scalar, *design_space)
+    assert len(y1) == N
+
+@pytest.mark.benchmark(group="yplus-sizing")
+def test_bench_yplus_array(benchmark, design_space):
+    y1 = benchmark(_array, *design_space)
+    assert np.allclose(y1, _scalar(*design_space), rtol=1e-12)
@@ -0,0 +1,63 @@
+from __future__ import annotations
+from math import isfinite
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+Row = Dict[str, float]
+
+def _lagrange(xs: Tuple[float, float, float], ys: Tuple[float, float, float], x: float) -> float:
+    (x0, x1, x2), (y0, y1, y2) = xs, ys
+    return (y0 * (x - x1) * (x - x2) / ((x0 - x1) * (x0 - x2))
+            + y1 * (x - x0) * (x - x2) / ((x1 - x0) * (x1 - x2))
+            + y2 * (x - x0) * (x - x1) / ((x2 - x0) * (x2 - x1)))
+
+def interval_errors(aoa: List[float], values: List[float]) -> List[float]:
+    """
+    Error estimate for linear interpolation on each interval [aoa[i], aoa[i+1]]:
+    the gap at the midpoint between the straight line and the quadratics through
+    the neighbouring triples. Large where the curve bends (CL_max, drag bucket).
+    """
+    errs = []
+    for i in range(len(aoa) - 1):
+        mid = 0.5 * (aoa[i] + aoa[i + 1])
+        lin = 0.5 * (values[i] + values[i + 1])
+        gaps = [abs(_lagrange(tuple(aoa[j:j + 3]), tuple(values[j:j + 3]), mid) - lin)
+                for j in (i - 1, i) if 0 <= j and j + 2 < len(aoa)]
+        errs.append(max(gaps) if gaps else float("inf"))
+    return errs
+
+def adaptive_aoa_sweep(solve: Callable[[float], Row], coarse: List[float], budget: int = 20,
+                       cl_tol: float = 0.01, cd_tol: float = 0.001, min_step: float = 0.25,
+                       batch: int = 2, known: Optional[Dict[float, Row]] = None) -> Iterator[Row]:
+    """
+    Solve ``coarse`` first, then repeatedly bisect the intervals whose CL or CD
+    interpolation error exceeds its tolerance, worst first, ``batch`` at a time.
+    Stops when every interval meets the tolerances, is narrower than
+    ``min_step``, or ``budget`` solves have been used. Yields each new row;
+    ``known`` rows (e.g. from a resumed journal) count as solved but are not yielded.
+    """
+    points: Dict[float, Row] = dict(known or {})
+    used = 0
+    for a in coarse:
+        if a in points or used >= budget:
+            continue
+        points[a] = solve(a)
+        used += 1
+        yield points[a]
+
+    while used < budget:
+        good = sorted(a for a, r in points.items() if isfinite(r["CL"]) and isfinite(r["CD"]))
+        cl = [points[a]["CL"] for a in good]
+        cd = [points[a]["CD"] for a in good]
+        scores = [max(e_cl / cl_tol, e_cd / cd_tol)
+                  for e_cl, e_cd in zip(interval_errors(good, cl), interval_errors(good, cd))]
+        candidates = sorted(
+            (s, round(0.5 * (good[i] + good[i + 1]), 6)) for i, s in enumerate(scores)
+            if s > 1.0 and good[i + 1] - good[i] > min_step
+        )
+        new = [mid for _, mid in reversed(candidates) if mid not in points][:min(batch, budget - used)]
+        if not new:
+            break
+        for a in new:
+            points[a] = solve(a)
+            used += 1
+            yield points[a]
@@ -0,0 +1,320 @@
+from __future__ import annotations
+import argparse
+import csv
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime
+from math import isfinite
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from . import telemetry
+from .config import MeshingConfig, SolverConfig
+from .journal import SweepJournal, write_manifest
+from .logging_utils import get_logger
+from .mesh_cache import MeshCache, mesh_key, mesh_params
+from .meshing import build_mesh_file, fallback_changes
+from .parallel import solve_mesh_file, split_processors
+from .results_store import FlowKey, ResultsStore, mesh_hash
+
+log = get_logger()
+
+CAD_SUFFIXES = (".pmdb", ".fmd", ".step", ".stp", ".iges", ".igs", ".scdoc", ".x_t")
+SUMMARY_FIELDS = ["geometry", "status", "angles", "CL_max", "AoA_CL_max", "CD_min", "LD_max",
+                  "mesh_s", "queue_s", "solve_s", "mesh_source", "error", "out_dir"]
+
+
+@dataclass
+class GeometryJob:
+    """One geometry moving through the pipeline; timings are filled in as stages finish."""
+    cad_file: str
+    out_dir: str
+    mesh_path: Optional[str] = None
+    mesh_source: str = ""          # "meshed", "cache" or "store" (every angle already solved)
+    status: str = "pending"        # pending -> meshed -> solved | failed
+    error: str = ""
+    mesh_s: float = 0.0
+    queue_s: float = 0.0           # time the mesh waited for a free solver
+    solve_s: float = 0.0
+    csv: Optional[str] = None
+    t_meshed: float = 0.0
+    flow_key: Optional[FlowKey] = None
+    mesh_fallback: Dict[str, list] = field(default_factory=dict)   # settings a meshing fallback changed
+
+
+def find_cad_files(spec: str) -> List[str]:
+    """CAD files in a directory (by suffix) or matching a glob pattern, sorted."""
+    if os.path.isdir(spec):
+        files = [str(p) for p in sorted(Path(spec).iterdir()) if p.suffix.lower() in CAD_SUFFIXES]
+    else:
+        files = sorted(glob.glob(spec))
+    return [str(Path(f).resolve()) for f in files]
+
+def _subdirs(cad_files: List[str]) -> List[str]:
+    # Variants from different folders may share a stem; keep their directories apart
+    names, seen = [], {}
+    for f in cad_files:
+        stem = Path(f).stem
+        seen[stem] = seen.get(stem, 0) + 1
+        names.append(stem if seen[stem] == 1 else f"{stem}_{seen[stem]}")
+    return names
+
+def run_batch(cad_files: List[str], mcfg: MeshingConfig, scfg: SolverConfig, out_dir: Path,
+              mesh_workers: int = 1, solve_workers: int = 1, queue_size: int = 1,
+              cache: Optional[MeshCache] = None, store: Optional[ResultsStore] = None,
+              mesh_fn: Callable[[MeshingConfig], Tuple[str, MeshingConfig]] = build_mesh_file,
+              solve_fn: Callable[[str, SolverConfig, str, SweepJournal], str] = solve_mesh_file) -> Dict[str, object]:
+    """
+    Mesh and solve many geometries as a two-stage pipeline: ``mesh_workers``
+    meshing sessions feed a queue of at most ``queue_size`` finished meshes that
+    ``solve_workers`` solver sessions drain, so geometry N+1 is meshed while N is
+    solving and meshing never runs more than ``queue_size`` geometries ahead.
+
+    ``mcfg``/``scfg`` are templates; each geometry gets ``out_dir/<stem>/`` with
+    its mesh, journal and results CSV. A failing geometry is recorded and the
+    batch carries on. With a results ``store`` each geometry's stored points are
+    reused (a geometry with every angle stored is neither meshed nor solved) and
+    the points it solves are recorded. Returns the aggregated summary (also written to
+    ``batch_summary.json``/``.csv`` and ``batch_results.csv``).
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    jobs = [GeometryJob(f, str((out_dir / name).resolve())) for f, name in zip(cad_files, _subdirs(cad_files))]
+
+    todo: "queue.Queue[GeometryJob]" = queue.Queue()
+    for job in jobs:
+        todo.put(job)
+    meshed: "queue.Queue[Optional[GeometryJob]]" = queue.Queue(maxsize=max(1, queue_size))
+
+    def mesher(processors: int):
+        while True:
+            try:
+                job = todo.get_nowait()
+            except queue.Empty:
+                return
+            os.makedirs(job.out_dir, exist_ok=True)
+            cfg = replace(mcfg, cad_file=job.cad_file, processors=processors,
+                          mesh_file=os.path.join(job.out_dir, Path(mcfg.mesh_file).name))
+            if store is not None:
+                try:
+                    job.flow_key = FlowKey.from_configs(cfg, scfg)
+                    journal = SweepJournal(Path(job.out_dir))
+                    if store.seed_journal(job.flow_key, scfg, journal):
+                        from .solver import write_results_csv
+
+                        job.csv = write_results_csv([rec["row"] for _, rec in sorted(journal.completed().items())],
+                                                    os.path.join(job.out_dir, "wing_aoa_results.csv"))
+                        job.status, job.mesh_source = "solved", "store"
+                        log.info("Every angle of %s is in the results store; not meshed or solved",
+                                 Path(job.cad_file).name)
+                        continue
+                except Exception as e:
+                    job.status, job.error = "failed", f"results store: {e}"
+                    log.error("Reading %s from the results store failed: %s", Path(job.cad_file).name, e)
+                    continue
+            t0 = time.perf_counter()
+            try:
+                with telemetry.span("batch.mesh", geometry=Path(job.cad_file).name):
+                    key = mesh_key(cfg) if cache is not None else None
+                    job.mesh_path = cache.get(key) if cache is not None else None
+                    job.mesh_source = "cache" if job.mesh_path else "meshed"
+                    if job.mesh_path is None:
+                        job.mesh_path, effective = mesh_fn(cfg)
+                        job.mesh_fallback = fallback_changes(cfg, effective)
+                        if job.mesh_fallback:
+                            # Cache and store against the settings the mesh was actually built with
+                            key = mesh_key(effective) if cache is not None else None
+                            if job.flow_key is not None:
+                                job.flow_key = replace(job.flow_key, mesh_hash=mesh_hash(effective))
+                        if cache is not None:
+                            cache.put(key, job.mesh_path, meta={"cad": cfg.cad_file, **mesh_params(effective)})
+            except Exception as e:
+                job.status, job.error = "failed", f"meshing: {e}"
+                log.error("Meshing %s failed: %s", Path(job.cad_file).name, e)
+                continue
+            finally:
+                job.mesh_s = time.perf_counter() - t0
+            job.status, job.t_meshed = "meshed", time.perf_counter()
+            log.info("Meshed %s (%s, %.1f s)", Path(job.cad_file).name, job.mesh_source, job.mesh_s)
+            meshed.put(job)  # blocks while the solvers are behind
+
+    def solver_worker(processors: int):
+        while True:
+            job = meshed.get()
+            if job is None:
+                return
+            job.queue_s = time.perf_counter() - job.t_meshed
+            cfg = replace(scfg, processors=processors, n_sessions=1)
+            journal = None
+            t0 = time.perf_counter()
+            try:
+                journal = SweepJournal(Path(job.out_dir))
+                with telemetry.span("batch.solve", geometry=Path(job.cad_file).name):
+                    manifest = {"cad": job.cad_file, "mesh": job.mesh_path, "solver": asdict(cfg)}
+                    if job.mesh_fallback:
+                        manifest["mesh_fallback"] = job.mesh_fallback
+                    write_manifest(Path(job.out_dir), manifest)
+                    job.csv = solve_fn(job.mesh_path, cfg, os.path.join(job.out_dir, "wing_aoa_results.csv"),
+                                       journal)
+                job.status = "solved"
+            except Exception as e:
+                job.status, job.error = "failed", f"solving: {e}"
+                log.error("Solving %s failed: %s", Path(job.cad_file).name, e)
+            finally:
+                job.solve_s = time.perf_counter() - t0
+                # Angles finished before a failure are kept as well
+                if store is not None and journal is not None:
+                    try:
+                        store.record_journal(job.flow_key, journal, cfg.n_iters)
+                    except Exception as e:
+                        # The polar is on disk, but a failure here must not take the worker (and the queue) down
+                        job.status = "failed"
+                        job.error = "; ".join(filter(None, [job.error, f"results store: {e}"]))
+                        log.error("Recording %s in the results store failed: %s", Path(job.cad_file).name, e)
+            if job.status == "solved":
+                log.info("Solved %s (%.1f s)", Path(job.cad_file).name, job.solve_s)
+
+    n_mesh = max(1, min(mesh_workers, len(jobs)))
+    n_solve = max(1, min(solve_workers, len(jobs)))
+    # One core budget for every session that can be alive at once
+    shares = split_processors(scfg.processors, n_mesh + n_solve)
+    shares += [1] * (n_mesh + n_solve - len(shares))
+    meshers = [threading.Thread(target=mesher, args=(shares[i],), name=f"mesher-{i}") for i in range(n_mesh)]
+    solvers = [threading.Thread(target=solver_worker, args=(shares[n_mesh + i],), name=f"solver-{i}")
+               for i in range(n_solve)]
+    log.info("Batch of %d geometries: %d mesher(s), %d solver(s), cores %s, queue %d",
+             len(jobs), n_mesh, n_solve, shares, queue_size)
+
+    t0 = time.perf_counter()
+    for t in meshers + solvers:
+        t.start()
+    try:
+        for t in meshers:
+            t.join()
+    finally:
+        # Every solver needs its sentinel or the batch never returns
+        for _ in solvers:
+            meshed.put(None)
+    for t in solvers:
+        t.join()
+    wall = time.perf_counter() - t0
+    return write_summary(jobs, out_dir, wall)
+
+def _polar_stats(csv_path: Optional[str]) -> Dict[str, object]:
+    if not csv_path or not os.path.exists(csv_path):
+        return {"rows": []}
+    with open(csv_path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    good = [r for r in rows if isfinite(float(r["CL"])) and isfinite(float(r["CD"]))]
+    if not good:
+        return {"rows": rows, "angles": len(rows)}
+    best = max(good, key=lambda r: float(r["CL"]))
+    ld = [float(r["CL"]) / float(r["CD"]) for r in good if float(r["CD"]) > 0]
+    return {
+        "rows": rows,
+        "angles": len(rows),
+        "CL_max": float(best["CL"]),
+        "AoA_CL_max": float(best["AoA_deg"]),
+        "CD_min": min(float(r["CD"]) for r in good),
+        "LD_max": max(ld) if ld else None,
+    }
+
+def write_summary(jobs: List[GeometryJob], out_dir: Path, wall_s: float) -> Dict[str, object]:
+    """Per-geometry summary plus every polar in one CSV with a ``geometry`` column."""
+    from .solver import CSV_FIELDS
+
+    summary_rows = []
+    with open(out_dir / "batch_results.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["geometry"] + CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for job in jobs:
+            stats = _polar_stats(job.csv)
+            name = Path(job.out_dir).name
+            writer.writerows({"geometry": name, **r} for r in stats.pop("rows"))
+            summary_rows.append({"geometry": name, "status": job.status, **stats,
+                                 "mesh_s": round(job.mesh_s, 3), "queue_s": round(job.queue_s, 3),
+                                 "solve_s": round(job.solve_s, 3), "mesh_source": job.mesh_source,
+                                 "error": job.error, "out_dir": job.out_dir})
+
+    with open(out_dir / "batch_summary.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(summary_rows)
+
+    serial_s = sum(j.mesh_s + j.solve_s for j in jobs)
+    summary = {
+        "geometries": len(jobs),
+        "solved": sum(j.status == "solved" for j in jobs),
+        "failed": sum(j.status == "failed" for j in jobs),
+        "wall_s": round(wall_s, 3),
+        "serial_s": round(serial_s, 3),
+        "overlap_saved_s": round(max(0.0, serial_s - wall_s), 3),
+        "results_csv": str(out_dir / "batch_results.csv"),
+        "per_geometry": summary_rows,
+    }
+    (out_dir / "batch_summary.json").write_text(json.dumps(summary, indent=2, default=str))
+    return summary
+
+def main():
+    from .run import add_case_arguments, make_configs
+
+    p = argparse.ArgumentParser(description="Mesh and solve many wing variants, overlapping meshing with solving.")
+    p.add_argument("cad", help="Directory of CAD files or a glob such as 'variants/*.pmdb'")
+    add_case_arguments(p)
+    p.add_argument("--mesh-workers", type=int, default=1, help="Concurrent meshing sessions (meshing licences)")
+    p.add_argument("--solve-workers", type=int, default=1, help="Concurrent solver sessions (solver licences)")
+    p.add_argument("--queue", type=int, default=1,
+                   help="Finished meshes allowed to wait for a solver before meshing pauses")
+    p.add_argument("--outdir", type=str, default="runs", help="Directory to store outputs")
+    p.add_argument("--mesh-cache", type=str, default=None, help="Mesh cache directory")
+    p.add_argument("--no-mesh-cache", action="store_true", help="Bypass the mesh cache and always remesh")
+    p.add_argument("--results-db", type=str, default=None, help="Results store to reuse and record points in")
+    p.add_argument("--no-results-db", action="store_true", help="Neither reuse nor record results")
+    p.add_argument("--telemetry", action="store_true", help="Write telemetry.json and trace.json to the batch directory")
+    p.add_argument("--dry-run", action="store_true", help="List the geometries and stage budgets only")
+    args = p.parse_args()
+
+    cad_files = find_cad_files(args.cad)
+    if not cad_files:
+        raise SystemExit(f"No CAD files found for {args.cad}")
+    args.cad = cad_files[0]
+    mcfg, scfg = make_configs(args)
+
+    if args.dry_run:
+        n_mesh = min(args.mesh_workers, len(cad_files))
+        n_solve = min(args.solve_workers, len(cad_files))
+        shares = split_processors(scfg.processors, n_mesh + n_solve)
+        print(f"[dry-run] Geometries: {len(cad_files)}")
+        for name, f in zip(_subdirs(cad_files), cad_files):
+            print(f"[dry-run]   {name}: {f}")
+        print(f"[dry-run] Meshers: {n_mesh} cores {shares[:n_mesh]}  solvers: {n_solve} cores {shares[n_mesh:]}  "
+              f"queue: {args.queue}")
+        print("[dry-run] AoA list:", scfg.aoa_deg)
+        return
+
+    out_dir = Path(args.outdir) / datetime.now().strftime("batch_%Y%m%d_%H%M%S")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    write_manifest(out_dir, {**vars(args), "cad_files": cad_files})
+    cache = None if args.no_mesh_cache else MeshCache(args.mesh_cache)
+    store = None if args.no_results_db else ResultsStore(args.results_db)
+    if args.telemetry:
+        telemetry.enable()
+    try:
+        summary = run_batch(cad_files, mcfg, scfg, out_dir, args.mesh_workers, args.solve_workers,
+                            args.queue, cache, store)
+    finally:
+        if store is not None:
+            store.close()
+        if args.telemetry:
+            telemetry.disable().write(out_dir)
+    log.info("Batch done: %d solved, %d failed, %.0f s wall (%.0f s saved by overlap). Summary: %s",
+             summary["solved"], summary["failed"], summary["wall_s"], summary["overlap_saved_s"],
+             out_dir / "batch_summary.csv")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+from __future__ import annotations
+import argparse
+import csv
+import glob
+import itertools
+import json
+import os
+from dataclasses import dataclass, field, fields, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from . import telemetry
+from .config import MeshingConfig, SolverConfig
+from .logging_utils import get_logger
+from .utils import isa_atmosphere
+
+log = get_logger()
+
+CASE_FIELDS = ["case", "geometry", "mach", "altitude_m", "t_inf", "p_op", "aoa_deg", "sideslip_deg"]
+
+
+@dataclass
+class Campaign:
+    """
+    A test matrix over geometry x Mach x altitude x sideslip x AoA.
+
+    ``altitude_m`` maps through the ISA model to free-stream T/p; when it is
+    empty the solver defaults (``t_inf``/``p_op``) give a single gas state.
+    ``mesh`` and ``solver`` hold overrides for MeshingConfig/SolverConfig.
+    """
+    name: str = "campaign"
+    geometry: List[str] = field(default_factory=list)
+    mach: List[float] = field(default_factory=lambda: [0.2])
+    altitude_m: List[float] = field(default_factory=list)
+    aoa_deg: List[float] = field(default_factory=lambda: [0.0])
+    sideslip_deg: List[float] = field(default_factory=lambda: [0.0])
+    mesh: Dict[str, object] = field(default_factory=dict)
+    solver: Dict[str, object] = field(default_factory=dict)
+
+    def gas_states(self) -> List[Tuple[float, Optional[float]]]:
+        """(mach, altitude) pairs, grouped by altitude so T/p change least often."""
+        alts: Sequence[Optional[float]] = sorted(self.altitude_m) or [None]
+        return [(m, h) for h in alts for m in sorted(self.mach)]
+
+    def directions(self) -> List[Tuple[float, float]]:
+        """(sideslip, aoa) pairs in marching order for the inner loop."""
+        return [(b, a) for b in sorted(self.sideslip_deg) for a in sorted(self.aoa_deg)]
+
+
+@dataclass
+class Case:
+    case: int
+    geometry: str
+    mach: float
+    altitude_m: Optional[float]
+    t_inf: float
+    p_op: float
+    aoa_deg: float
+    sideslip_deg: float
+
+    def gas_key(self) -> Tuple[float, float, float]:
+        return (self.mach, self.t_inf, self.p_op)
+
+
+def _axis(value) -> List[float]:
+    if isinstance(value, str):
+        from .run import parse_aoa_list
+        return parse_aoa_list(value)
+    if isinstance(value, (int, float)):
+        return [float(value)]
+    return [float(v) for v in value]
+
+def load_campaign(path: str) -> Campaign:
+    """Read a campaign from JSON or YAML (YAML needs PyYAML). Geometry globs are relative to the file."""
+    text = Path(path).read_text()
+    if Path(path).suffix.lower() in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError as e:
+            raise SystemExit("YAML campaign files need PyYAML (pip install pyyaml); or use JSON.") from e
+        data = yaml.safe_load(text) or {}
+    else:
+        data = json.loads(text)
+
+    known = {f.name for f in fields(Campaign)}
+    unknown = set(data) - known
+    if unknown:
+        raise ValueError(f"Unknown campaign keys: {sorted(unknown)}")
+
+    base = Path(path).resolve().parent
+    geometry: List[str] = []
+    for pattern in data.get("geometry", []):
+        full = pattern if os.path.isabs(pattern) else str(base / pattern)
+        matches = sorted(glob.glob(full))
+        if not matches:
+            raise FileNotFoundError(f"No CAD files match {pattern}")
+        geometry.extend(matches)
+
+    camp = Campaign(name=data.get("name", Path(path).stem), geometry=geometry,
+                    mesh=dict(data.get("mesh", {})), solver=dict(data.get("solver", {})))
+    for axis in ("mach", "altitude_m", "aoa_deg", "sideslip_deg"):
+        if axis in data:
+            setattr(camp, axis, _axis(data[axis]))
+    return camp
+
+def iter_cases(camp: Campaign) -> Iterator[Case]:
+    """
+    Lazily expand the matrix in execution order: geometry, then gas state, then
+    flow direction. Nothing proportional to the number of cases is held in memory.
+    """
+    base = SolverConfig(**camp.solver)
+    gas = [(m, h, *(isa_atmosphere(h)[:2] if h is not None else (base.t_inf, base.p_op)))
+           for m, h in camp.gas_states()]
+    n = itertools.count()
+    for geom in camp.geometry:
+        for mach, h, t_inf, p_op in gas:
+            for beta, aoa in camp.directions():
+                yield Case(next(n), geom, mach, h, t_inf, p_op, aoa, beta)
+
+def plan_counts(camp: Campaign) -> Dict[str, int]:
+    """Operation counts for the planned order versus running every case from scratch."""
+    n_geom, n_gas, n_dir = len(camp.geometry), len(camp.gas_states()), len(camp.directions())
+    cases = n_geom * n_gas * n_dir
+    return {
+        "cases": cases,
+        "mesh_builds": n_geom,
+        "physics_setups": n_geom,
+        "gas_state_setups": n_geom * n_gas,
+        "flow_direction_changes": cases,
+        "naive_mesh_builds": cases,
+        "naive_physics_setups": cases,
+    }
+
+def _open_solver(mcfg: MeshingConfig, scfg: SolverConfig, cache):
+    """Solver session on the mesh of ``mcfg``; returns it with the mesh settings actually used."""
+    from .mesh_cache import mesh_key, mesh_params
+    from .solver import launch_solver, read_mesh
+
+    key = mesh_key(mcfg) if cache is not None else None
+    cached = cache.get(key) if cache is not None else None
+    if cached:
+        log.info("Mesh cache hit for %s", mcfg.cad_file)
+        return read_mesh(launch_solver(scfg), cached), mcfg
+
+    from .meshing import build_mesh
+    meshing, effective = build_mesh(mcfg)
+    if cache is not None:
+        cache.put(key if effective == mcfg else mesh_key(effective), str(Path(mcfg.mesh_file).resolve()),
+                  meta={"cad": mcfg.cad_file, **mesh_params(effective)})
+    return meshing.switch_to_solver(), effective
+
+def run_campaign(camp: Campaign, out_dir: Path, cache=None, open_solver=_open_solver, store=None) -> str:
+    """
+    Execute the campaign: mesh and set up physics once per geometry, re-apply the
+    free-stream state once per gas state, and only change the flow direction in
+    the inner loop. Rows are streamed to ``campaign_results.csv``.
+
+    With a results ``store`` points solved before are taken from it, and Fluent
+    is only launched for a geometry once one of its cases actually needs solving.
+    """
+    from .mesh_cache import file_sha256
+    from .meshing import fallback_changes
+    from .results_store import FlowKey, mesh_hash, setup_hash
+    from .solver import _setup_gas_state, _setup_physics, _setup_reports, _solve_aoa, csv_fields
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / "campaign_results.csv"
+    base_scfg = SolverConfig(**camp.solver)
+    with open(out_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CASE_FIELDS + [c for c in csv_fields(base_scfg) if c != "AoA_deg"],
+                               extrasaction="ignore")
+        writer.writeheader()
+        for geom, geom_cases in itertools.groupby(iter_cases(camp), key=lambda c: c.geometry):
+            mcfg = MeshingConfig(**{**camp.mesh, "cad_file": geom,
+                                    "mesh_file": str(out_dir / f"{Path(geom).stem}.msh.h5")})
+            cad_hash, geom_mesh = (file_sha256(geom), mesh_hash(mcfg)) if store is not None else (None, None)
+            setup = setup_hash(base_scfg) if store is not None else None
+            solver = reports = None
+            for _, gas_cases in itertools.groupby(geom_cases, key=Case.gas_key):
+                ctx = scfg = None
+                for case in gas_cases:
+                    key = hits = None
+                    if store is not None:
+                        key = FlowKey(cad_hash, geom_mesh, round(case.mach, 6), round(case.t_inf, 6),
+                                      round(case.p_op, 6), round(case.sideslip_deg, 6), setup)
+                        hits = store.solved(key, base_scfg.n_iters)
+                    if hits and round(case.aoa_deg, 6) in hits:
+                        writer.writerow({**vars(case), **hits[round(case.aoa_deg, 6)], "Init": "store"})
+                        continue
+                    if solver is None:
+                        solver, effective = open_solver(mcfg, base_scfg, cache)
+                        changes = fallback_changes(mcfg, effective)
+                        if changes:
+                            print(f"[warn] {Path(geom).name} was meshed with fallback settings {changes}; "
+                                  "its cases are stored against them")
+                            if store is not None:
+                                geom_mesh = mesh_hash(effective)
+                                key = replace(key, mesh_hash=geom_mesh)
+                        solver.mesh.check()
+                        _setup_physics(solver, base_scfg)
+                        reports = _setup_reports(solver, base_scfg)
+                    if ctx is None:
+                        scfg = replace(base_scfg, mach=case.mach, t_inf=case.t_inf, p_op=case.p_op)
+                        ctx = _setup_gas_state(solver, scfg, reports)
+                        log.info("%s: M=%.3f T=%.2f p=%.0f", Path(geom).name, case.mach, case.t_inf, case.p_op)
+                    row = _solve_aoa(solver, ctx, scfg, case.aoa_deg, sideslip_deg=case.sideslip_deg)
+                    if store is not None:
+                        store.put(key, row, base_scfg.n_iters)
+                    writer.writerow({**vars(case), **row})
+                    f.flush()
+            if solver is not None:
+                solver.exit()
+    return str(out_path)
+
+def main():
+    p = argparse.ArgumentParser(description="Plan and run a Mach x altitude x AoA x sideslip x geometry campaign.")
+    p.add_argument("campaign", help="Campaign file (.json, .yaml/.yml)")
+    p.add_argument("--outdir", default="runs", help="Directory to store outputs")
+    p.add_argument("--no-mesh-cache", action="store_true", help="Bypass the mesh cache")
+    p.add_argument("--mesh-cache", default=None, help="Mesh cache directory")
+    p.add_argument("--results-db", default=None, help="Results store to reuse and record points in")
+    p.add_argument("--no-results-db", action="store_true", help="Neither reuse nor record results")
+    p.add_argument("--telemetry", action="store_true", help="Write telemetry.json and trace.json to the output directory")
+    p.add_argument("--dry-run", action="store_true", help="Report the plan and operation counts only")
+    p.add_argument("--show", type=int, default=5, help="Number of planned cases to print in --dry-run")
+    args = p.parse_args()
+
+    camp = load_campaign(args.campaign)
+    counts = plan_counts(camp)
+    if args.dry_run:
+        print(f"[dry-run] Campaign: {camp.name}")
+        print(f"[dry-run] Geometries: {len(camp.geometry)}  gas states: {len(camp.gas_states())}  "
+              f"flow directions: {len(camp.directions())}")
+        for k, v in counts.items():
+            print(f"[dry-run] {k}: {v}")
+        for case in itertools.islice(iter_cases(camp), args.show):
+            print("[dry-run]  ", vars(case))
+        return
+
+    from .mesh_cache import MeshCache
+    from .results_store import ResultsStore
+    cache = None if args.no_mesh_cache else MeshCache(args.mesh_cache)
+    store = None if args.no_results_db else ResultsStore(args.results_db)
+    out_dir = Path(args.outdir) / datetime.now().strftime(f"campaign_{camp.name}_%Y%m%d_%H%M%S")
+    log.info("Running campaign %s: %d cases", camp.name, counts["cases"])
+    if args.telemetry:
+        telemetry.enable()
+    try:
+        out = run_campaign(camp, out_dir, cache, store=store)
+    finally:
+        if store is not None:
+            store.close()
+        if args.telemetry:
+            telemetry.disable().write(out_dir)
+    log.info("Campaign results: %s", out)
+
+if __name__ == "__main__":
+    main()
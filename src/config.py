@@ -30,6 +30,15 @@ class MeshingConfig:
     volume_fill: str = "poly-hexcore"
     hex_max_cell_length: float = 0.25  # m
 
+    # Failure handling: on a failed task, retry from the earliest task the next rung
+    # changes. Rungs are MeshingConfig overrides applied cumulatively; None uses
+    # meshing.default_fallbacks(), [] disables retries.
+    fallbacks: Optional[List[Dict[str, object]]] = None
+    checkpoint: bool = True            # save the workflow (.wft next to mesh_file) after each task
+
+    # Output
+    mesh_file: str = "wing_auto.msh.h5"
+
     # Fluent launch
     precision: str = "double"
     processors: int = 4
@@ -49,11 +58,52 @@ class SolverConfig:
     # Reference values for coefficients
     ref_area: float = 0.10         # m^2
     ref_length: float = 0.30       # m
+    moment_center: Optional[List[float]] = None  # m; pitching moment about this point (default: quarter chord)
 
     # Sweep and iterations
     aoa_deg: List[float] = field(default_factory=lambda: [0, 2, 4, 6, 8, 10])
-    n_iters: int = 250
+    n_iters: int = 250                     # hard cap per AoA when converge=True
+
+    # Convergence-driven iteration control
+    converge: bool = False
+    conv_chunk: int = 25                   # iterations between CL/CD samples
+    conv_window: int = 4                   # samples whose spread must fall below the tolerances
+    cl_tol: float = 1e-4
+    cd_tol: float = 1e-5
+    res_tol: Optional[float] = None        # optional: every residual must also be below this
+    # Adaptive sampling: aoa_deg is the coarse set, refined where CL/CD bend
+    adaptive: bool = False
+    adaptive_budget: int = 20              # total solves including the coarse set
+    adaptive_cl_tol: float = 0.01          # allowed CL interpolation error
+    adaptive_cd_tol: float = 0.001         # allowed CD interpolation error
+    adaptive_min_step: float = 0.25        # deg; intervals this narrow are not split
+
+    # Divergence watchdog: NaN / residual blow-up / CL limit cycle is checked every
+    # conv_chunk iterations; a tripped angle is aborted and retried with each recovery
+    # strategy in turn ("relax", "first-order", "neighbour")
+    watchdog: bool = True
+    recovery: List[str] = field(default_factory=lambda: ["relax", "first-order", "neighbour"])
+    blowup_factor: float = 1e3             # residual rise over its running minimum
+    cl_limit: float = 10.0                 # |CL| above this is a blow-up
+    osc_window: int = 6                    # CL samples checked for a limit cycle
+    osc_cl_amp: float = 0.02               # CL peak-to-peak that counts as a limit cycle
+
+    continuation: bool = False             # warm-start each AoA from its converged neighbour
+    n_iters_warm: Optional[int] = None     # iterations for warm-started points (default: n_iters)
+    # Keep each converged angle's field in the journal: restart points for --resume and
+    # for neighbour recovery. Continuation always keeps them; otherwise they cost a data file per angle
+    snapshots: bool = False
+
+    # Output
+    save_per_aoa: bool = False   # write case/data after each AoA
+    history: bool = True         # per-iteration residual/coefficient history as Parquet (needs pyarrow)
+    output_mode: str = "full"    # "full": case+data pairs; "reduced": case once, then data-only files
+    compression_level: Optional[int] = None     # HDF5 compression of case/data files (0-9); None: Fluent default
+    output_fields: Optional[List[str]] = None   # reduced mode: per-AoA files hold only these fields
+    scratch_dir: Optional[str] = None  # Fluent writes here, files move to the run dir in the background
+    io_queue: int = 2                  # files allowed to wait for the background move
 
     # Fluent launch
     precision: str = "double"
-    processors: int = 4
+    processors: int = 4          # total budget; split across sessions when n_sessions > 1
+    n_sessions: int = 1          # >1 runs the AoA sweep in parallel solver sessions
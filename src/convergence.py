@@ -0,0 +1,89 @@
+from __future__ import annotations
+from collections import deque
+from dataclasses import dataclass
+from math import isfinite
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple
+
+from .config import SolverConfig
+
+if TYPE_CHECKING:
+    from .watchdog import Watchdog
+
+@dataclass
+class ConvergenceResult:
+    iterations: int
+    converged: bool
+    cl: float
+    cd: float
+    aborted: Optional[str] = None  # watchdog reason when the run was cut short
+
+
+class IterationController:
+    """
+    Iterate in chunks and stop once CL and CD have flattened out.
+
+    After every chunk the coefficients are sampled; the point is converged when
+    the spread (max - min) of the last ``window`` samples is below ``cl_tol`` /
+    ``cd_tol`` and, if ``res_tol`` is set, every residual is below it.
+    ``max_iters`` is a hard cap regardless of convergence. With a ``watchdog``
+    the run is aborted as soon as it reports divergence.
+    """
+
+    def __init__(self, chunk: int, window: int, cl_tol: float, cd_tol: float,
+                 max_iters: int, res_tol: Optional[float] = None):
+        if chunk <= 0 or window < 2:
+            raise ValueError("chunk must be > 0 and window >= 2")
+        self.chunk = chunk
+        self.window = window
+        self.cl_tol = cl_tol
+        self.cd_tol = cd_tol
+        self.res_tol = res_tol
+        self.max_iters = max_iters
+
+    @classmethod
+    def from_config(cls, cfg: SolverConfig, max_iters: Optional[int] = None) -> "IterationController":
+        return cls(cfg.conv_chunk, cfg.conv_window, cfg.cl_tol, cfg.cd_tol,
+                   max_iters or cfg.n_iters, cfg.res_tol)
+
+    def _flat(self, samples: deque, tol: float) -> bool:
+        return len(samples) == self.window and max(samples) - min(samples) < tol
+
+    def _residuals_ok(self, residuals: Optional[Dict[str, float]]) -> bool:
+        if self.res_tol is None:
+            return True
+        # Unreadable residuals never block convergence on the coefficient criteria
+        if not residuals:
+            return True
+        return all(v < self.res_tol for v in residuals.values())
+
+    @classmethod
+    def fixed(cls, chunk: int, max_iters: int) -> "IterationController":
+        """Runs all ``max_iters`` in chunks (zero tolerances never converge), for watchdog checks only."""
+        return cls(chunk, 2, 0.0, 0.0, max_iters)
+
+    def run(self, iterate: Callable[[int], None], read_coeffs: Callable[[], Tuple[float, float]],
+            read_residuals: Optional[Callable[[], Optional[Dict[str, float]]]] = None,
+            watchdog: Optional["Watchdog"] = None) -> ConvergenceResult:
+        cls_, cds = deque(maxlen=self.window), deque(maxlen=self.window)
+        done = 0
+        cl = cd = float("nan")
+        while done < self.max_iters:
+            n = min(self.chunk, self.max_iters - done)
+            iterate(n)
+            done += n
+            cl, cd = read_coeffs()
+            residuals = None
+            if watchdog is not None:
+                residuals = read_residuals() if read_residuals else None
+                reason = watchdog.check(cl, cd, residuals)
+                if reason is not None:
+                    return ConvergenceResult(done, False, cl, cd, reason)
+            if not (isfinite(cl) and isfinite(cd)):
+                break
+            cls_.append(cl)
+            cds.append(cd)
+            if (self._flat(cls_, self.cl_tol) and self._flat(cds, self.cd_tol)
+                    and self._residuals_ok(residuals if watchdog is not None
+                                           else read_residuals() if read_residuals else None)):
+                return ConvergenceResult(done, True, cl, cd)
+        return ConvergenceResult(done, False, cl, cd)
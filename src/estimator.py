@@ -0,0 +1,201 @@
+from __future__ import annotations
+import json
+import os
+import time
+from dataclasses import dataclass
+from math import log2, sqrt
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from .config import MeshingConfig, SolverConfig
+
+DEFAULT_CALIBRATION = os.environ.get("WING_AERO_ESTIMATOR",
+                                     str(Path.home() / ".cache" / "wing_aero" / "estimator.json"))
+
+# Priors before any calibration; rough figures for a pressure-based k-omega SST
+# + energy case on a poly-hexcore mesh.
+GB_PER_MCELL = {"double": 1.6, "single": 1.0}
+GB_PER_PROCESS = 0.25                # host/compute-node overhead
+SCALING_PRIOR = (1.0e-7, 5.0e-6, 2.0e-3)  # s/iter = cells*(serial + parallel/p) + comm*log2(p)
+MESH_S_PER_CELL = 4.0e-5
+LAUNCH_S = 30.0                      # session start + mesh read + setup
+MIN_CELLS_PER_CORE = 50_000
+MIN_EFFICIENCY = 0.6
+THICKNESS_RATIO = 0.12               # wing z extent / chord, for the enclosure box
+HISTORY = 20                         # records used for calibration
+
+def mesh_features(mcfg: MeshingConfig, ref_length: float, ref_area: float) -> Dict[str, float]:
+    """
+    Geometric drivers of the cell count, with the wing sized from the reference
+    chord and area: surface faces at the geometric-mean surface size, prism
+    layers on every face, the octree transition shell around the body and the
+    hexcore far field filling the enclosure box.
+    """
+    chord, span = ref_length, ref_area / ref_length
+    h_s = sqrt(mcfg.surf_min * mcfg.surf_max)
+    faces = 2.04 * ref_area / (0.433 * h_s ** 2)  # both sides, equilateral triangles
+    r = mcfg.bbox_ratio
+    box = (chord * (1 + r["x_minus"] + r["x_plus"]) * span * (1 + r["y_minus"] + r["y_plus"])
+           * THICKNESS_RATIO * chord * (1 + r["z_minus"] + r["z_plus"]))
+    return {
+        "faces": faces,
+        "prism": 0.5 * faces * mcfg.bl_n_layers,        # poly prisms ~ one per tri node
+        "transition": 1.7 * faces,                        # sum over octree levels ~ 4/3 * 3-cell buffer
+        "far_field": box / mcfg.hex_max_cell_length ** 3,
+    }
+
+def raw_cell_count(mcfg: MeshingConfig, ref_length: float, ref_area: float) -> float:
+    f = mesh_features(mcfg, ref_length, ref_area)
+    return f["prism"] + f["transition"] + f["far_field"]
+
+def physical_ram_gb() -> Optional[float]:
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1024 ** 3
+    except (AttributeError, ValueError, OSError):
+        return None
+
+def mesh_file_cell_count(path: str) -> Optional[int]:
+    """Cell count stored in a Fluent .msh.h5 (CFF) file; None without h5py or for other formats."""
+    try:
+        import h5py
+    except ImportError:
+        return None
+    try:
+        with h5py.File(path, "r") as f:
+            counts = [int(g.attrs["cellCount"]) for g in f["meshes"].values() if "cellCount" in g.attrs]
+    except (OSError, KeyError):
+        return None
+    return sum(counts) or None
+
+def _solve3(a: List[List[float]], b: List[float]) -> Optional[List[float]]:
+    # Gaussian elimination with partial pivoting; None when singular
+    m = [row[:] + [v] for row, v in zip(a, b)]
+    for i in range(3):
+        piv = max(range(i, 3), key=lambda r: abs(m[r][i]))
+        if abs(m[piv][i]) < 1e-300:
+            return None
+        m[i], m[piv] = m[piv], m[i]
+        for r in range(i + 1, 3):
+            k = m[r][i] / m[i][i]
+            m[r] = [x - k * y for x, y in zip(m[r], m[i])]
+    x = [0.0] * 3
+    for i in (2, 1, 0):
+        x[i] = (m[i][3] - sum(m[i][j] * x[j] for j in range(i + 1, 3))) / m[i][i]
+    return x
+
+
+@dataclass
+class Estimate:
+    cells: float
+    ram_gb: float
+    processors: int              # used for the time prediction
+    recommended_processors: int
+    s_per_iter: float
+    mesh_s: float
+    solve_s: float
+    wall_s: float
+    calibration_runs: int
+
+
+class Estimator:
+    """
+    Cell-count, memory and run-time model for a case, calibrated from earlier
+    runs stored in a JSON file. Cell counts are corrected by the geometric mean
+    of measured/predicted ratios; the strong-scaling curve
+    ``s/iter = cells * (serial + parallel / p) + comm * log2(p)`` is refitted by
+    least squares once runs at enough distinct core counts exist, and otherwise
+    the prior is rescaled to the measurements.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or DEFAULT_CALIBRATION)
+        self.records: List[Dict[str, float]] = []
+        if self.path.exists():
+            try:
+                self.records = json.loads(self.path.read_text())["runs"]
+            except (ValueError, KeyError):
+                print(f"[warn] Ignoring unreadable estimator calibration {self.path}")
+
+    def _ratio(self, key: str, predicted: str) -> float:
+        rs = [r[key] / r[predicted] for r in self.records[-HISTORY:] if r.get(key) and r.get(predicted)]
+        if not rs:
+            return 1.0
+        prod = 1.0
+        for x in rs:
+            prod *= x
+        return prod ** (1.0 / len(rs))
+
+    def cell_scale(self) -> float:
+        return self._ratio("cells", "raw_cells")
+
+    def scaling(self) -> Sequence[float]:
+        scale = self.cell_scale()
+        # Runs without a measured mesh size fall back to the calibrated estimate
+        runs = [{**r, "cells": r.get("cells") or r["raw_cells"] * scale}
+                for r in self.records[-HISTORY:] if r.get("s_per_iter")]
+        if len({r["processors"] for r in runs}) >= 3:
+            xs = [(r["cells"], r["cells"] / r["processors"], log2(r["processors"])) for r in runs]
+            ata = [[sum(x[i] * x[j] for x in xs) for j in range(3)] for i in range(3)]
+            atb = [sum(x[i] * r["s_per_iter"] for x, r in zip(xs, runs)) for i in range(3)]
+            fit = _solve3(ata, atb)
+            if fit is not None and all(c >= 0 for c in fit) and fit[1] > 0:
+                return tuple(fit)
+        if runs:
+            prior = [self._s_per_iter(SCALING_PRIOR, r["cells"], r["processors"]) for r in runs]
+            ratio = 1.0
+            for r, p in zip(runs, prior):
+                ratio *= r["s_per_iter"] / p
+            ratio **= 1.0 / len(runs)
+            return tuple(c * ratio for c in SCALING_PRIOR)
+        return SCALING_PRIOR
+
+    def record(self, mcfg: MeshingConfig, scfg: SolverConfig, processors: int, cells: Optional[float] = None,
+               s_per_iter: Optional[float] = None, mesh_s: Optional[float] = None):
+        """Add a measured run and save. Missing measurements are simply not used."""
+        raw = raw_cell_count(mcfg, scfg.ref_length, scfg.ref_area)
+        self.records.append({"time": time.time(), "raw_cells": raw, "cells": cells, "processors": processors,
+                             "s_per_iter": s_per_iter, "mesh_s": mesh_s,
+                             "pred_mesh_s": MESH_S_PER_CELL * (cells or raw * self.cell_scale())})
+        self.records = self.records[-5 * HISTORY:]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"runs": self.records}, indent=1))
+        os.replace(tmp, self.path)
+
+    @staticmethod
+    def _s_per_iter(coeffs: Sequence[float], cells: float, p: int) -> float:
+        serial, parallel, comm = coeffs
+        return cells * (serial + parallel / p) + comm * log2(p)
+
+    def choose_processors(self, cells: float, max_processors: int) -> int:
+        """
+        Most cores that still keep at least MIN_CELLS_PER_CORE cells each and a
+        parallel efficiency of MIN_EFFICIENCY on the learned scaling curve.
+        """
+        coeffs = self.scaling()
+        t1 = self._s_per_iter(coeffs, cells, 1)
+        best = 1
+        for p in range(2, max(1, max_processors) + 1):
+            if cells / p < MIN_CELLS_PER_CORE:
+                break
+            if t1 / (p * self._s_per_iter(coeffs, cells, p)) >= MIN_EFFICIENCY:
+                best = p
+        return best
+
+    def estimate(self, mcfg: MeshingConfig, scfg: SolverConfig, max_processors: Optional[int] = None,
+                 processors: Optional[int] = None) -> Estimate:
+        """
+        Predict the case before launching anything. ``processors`` fixes the core
+        count used for the timings; by default the recommended count is used.
+        """
+        cells = raw_cell_count(mcfg, scfg.ref_length, scfg.ref_area) * self.cell_scale()
+        recommended = self.choose_processors(cells, max_processors or os.cpu_count() or 1)
+        p = processors or recommended
+        ram = cells / 1e6 * GB_PER_MCELL.get(scfg.precision, GB_PER_MCELL["double"]) + GB_PER_PROCESS * p
+        s_iter = self._s_per_iter(self.scaling(), cells, p)
+        mesh_s = MESH_S_PER_CELL * cells * self._ratio("mesh_s", "pred_mesh_s")
+        n_points = scfg.adaptive_budget if scfg.adaptive else len(scfg.aoa_deg)
+        solve_s = n_points * scfg.n_iters * s_iter
+        return Estimate(cells=cells, ram_gb=ram, processors=p, recommended_processors=recommended,
+                        s_per_iter=s_iter, mesh_s=mesh_s, solve_s=solve_s,
+                        wall_s=LAUNCH_S + mesh_s + solve_s, calibration_runs=len(self.records))
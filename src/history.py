@@ -0,0 +1,128 @@
+from __future__ import annotations
+import glob
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+HISTORY_DIR = "history"
+KINDS = ("iterations", "results")
+
+def _pa():
+    # Lazy: pyarrow is only needed when history is written or loaded
+    import pyarrow
+    import pyarrow.parquet  # noqa: F401
+
+    return pyarrow
+
+
+class HistoryWriter:
+    """
+    Append-only columnar history of a run under ``<run_dir>/history/``.
+
+    Every solved angle adds one small Parquet file holding its per-iteration
+    residuals and CL/CD/Cm monitors, so memory stays bounded, an interrupted run
+    keeps what it finished and parallel sessions never share a file.
+    ``results.parquet`` holds the final per-angle rows. Load with
+    ``open_history``/``load_history``.
+    """
+
+    def __init__(self, run_dir: Path):
+        self.pa = _pa()
+        self.run = Path(run_dir).resolve().name
+        self.dir = Path(run_dir) / HISTORY_DIR
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._seq = 0
+
+    def _write(self, table, name: str) -> str:
+        path = self.dir / name
+        tmp = path.with_suffix(".tmp")
+        self.pa.parquet.write_table(table, tmp)
+        os.replace(tmp, path)
+        return str(path)
+
+    def write_iterations(self, aoa_deg: float, sideslip_deg: float, iterations: Sequence[int],
+                         columns: Dict[str, Sequence[float]]) -> Optional[str]:
+        n = len(iterations)
+        if n == 0:
+            return None
+        data = {"run": [self.run] * n, "aoa_deg": [float(aoa_deg)] * n,
+                "sideslip_deg": [float(sideslip_deg)] * n, "iteration": [int(i) for i in iterations]}
+        data.update({k: [float(x) for x in v[-n:]] for k, v in columns.items() if len(v) >= n})
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        return self._write(self.pa.table(data), f"iterations-{aoa_deg:g}-{time.time_ns()}-{seq}.parquet")
+
+    def write_results(self, rows: List[Dict[str, object]]) -> Optional[str]:
+        if not rows:
+            return None
+        keys = list(dict.fromkeys(k for r in rows for k in r))
+        data = {"run": [self.run] * len(rows)}
+        for k in keys:
+            values = [r.get(k) for r in rows]
+            if all(v in (None, "") or isinstance(v, bool) for v in values):
+                data[k] = [v if isinstance(v, bool) else None for v in values]
+                continue
+            # Journal/CSV round trips can leave numbers as strings; keep columns typed
+            try:
+                data[k] = [None if v in (None, "") else float(v) for v in values]
+            except (TypeError, ValueError):
+                data[k] = [None if v is None else str(v) for v in values]
+        return self._write(self.pa.table(data), "results.parquet")
+
+
+def open_writer(run_dir: Path) -> Optional[HistoryWriter]:
+    """A HistoryWriter, or None (with a warning) when pyarrow is not installed."""
+    try:
+        return HistoryWriter(run_dir)
+    except ImportError:
+        print("[warn] pyarrow is not installed; per-iteration history is not recorded (pip install pyarrow).")
+        return None
+
+def history_files(roots: Union[str, Path, Iterable[Union[str, Path]]], kind: str = "iterations") -> List[str]:
+    """
+    History files under run directories. ``roots`` may be run directories,
+    parent directories of many runs, or glob patterns.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"kind must be one of {KINDS}")
+    if isinstance(roots, (str, Path)):
+        roots = [roots]
+    pattern = f"{kind}-*.parquet" if kind == "iterations" else "results.parquet"
+    files: List[str] = []
+    for root in roots:
+        for d in sorted(glob.glob(str(root))) or [str(root)]:
+            d = Path(d)
+            direct = d / HISTORY_DIR
+            files += sorted(glob.glob(str(direct / pattern)) if direct.is_dir()
+                            else glob.glob(str(d / "**" / HISTORY_DIR / pattern), recursive=True))
+    return files
+
+def open_history(roots, kind: str = "iterations"):
+    """
+    A lazy, memory-mapped ``pyarrow.dataset.Dataset`` over every history file
+    found. Nothing is read until it is scanned, and then only the selected
+    columns of the files that pass a filter. Schemas are unified from file footers,
+    so runs with different residual sets or wall zones can be mixed.
+    """
+    pa = _pa()
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+
+    files = history_files(roots, kind)
+    if not files:
+        raise FileNotFoundError(f"No {kind} history under {roots}")
+    schema = pa.unify_schemas([pa.parquet.read_schema(f) for f in files])
+    # Memory-mapped reads: scanned columns are paged in by the OS instead of copied
+    return ds.dataset(files, format="parquet", schema=schema, filesystem=fs.LocalFileSystem(use_mmap=True))
+
+def load_history(roots, kind: str = "iterations", columns: Optional[List[str]] = None, filter=None):
+    """
+    Read history into a pandas DataFrame, e.g.
+    ``load_history("runs/*", columns=["run", "aoa_deg", "iteration", "CL"],
+    filter=pyarrow.dataset.field("aoa_deg") >= 8)``.
+    """
+    return open_history(roots, kind).to_table(columns=columns, filter=filter).to_pandas()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+def _fsync_write(path: Path, text: str):
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def write_manifest(run_dir: Path, settings: Dict[str, object]):
+    _fsync_write(Path(run_dir) / "manifest.json", json.dumps(settings, indent=2, default=str))
+
+def load_manifest(run_dir: Path) -> Dict[str, object]:
+    path = Path(run_dir) / "manifest.json"
+    if not path.exists():
+        raise FileNotFoundError(f"No manifest.json in {run_dir}; cannot resume")
+    return json.loads(path.read_text())
+
+
+class SweepJournal:
+    """
+    Append-only record of completed angles in ``<run_dir>/journal.jsonl``.
+
+    Every line is flushed and fsynced before the next angle starts, together
+    with the solution snapshot it points to, so a crash loses at most the angle
+    in flight. A truncated last line (crash mid-write) is ignored on load.
+    """
+
+    def __init__(self, run_dir: Path):
+        self.run_dir = Path(run_dir)
+        self.path = self.run_dir / "journal.jsonl"
+        self.snapshot_dir = self.run_dir / "snapshots"
+        self._lock = threading.Lock()
+        self._done: Dict[float, Dict] = {}
+        if self.path.exists():
+            for line in self.path.read_text().splitlines():
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self._done[float(rec["aoa_deg"])] = rec
+
+    def completed(self) -> Dict[float, Dict]:
+        with self._lock:
+            return dict(self._done)
+
+    def is_done(self, aoa_deg: float) -> bool:
+        with self._lock:
+            return float(aoa_deg) in self._done
+
+    def snapshot_path(self, aoa_deg: float) -> str:
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        return str((self.snapshot_dir / f"aoa_{aoa_deg:g}.dat.h5").resolve())
+
+    def snapshots(self) -> Dict[float, str]:
+        with self._lock:
+            return {a: r["snapshot"] for a, r in self._done.items()
+                    if r.get("snapshot") and os.path.exists(r["snapshot"])}
+
+    def record(self, row: Dict[str, object], snapshot: Optional[str] = None):
+        rec = {"aoa_deg": float(row["AoA_deg"]), "row": row, "snapshot": snapshot}
+        line = json.dumps(rec, default=str) + "\n"
+        with self._lock:
+            self.run_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._done[rec["aoa_deg"]] = rec
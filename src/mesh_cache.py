@@ -0,0 +1,125 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .config import MeshingConfig
+
+# MeshingConfig fields that change the generated mesh. cad_file is covered by the
+# content hash; launch settings and the output file name are deliberately excluded.
+MESH_FIELDS = (
+    "length_unit", "workflow", "create_enclosure", "enclosure_name", "bbox_ratio",
+    "surf_min", "surf_max", "bl_n_layers", "bl_growth", "first_layer_height",
+    "volume_fill", "hex_max_cell_length",
+)
+
+DEFAULT_CACHE_DIR = os.environ.get("WING_AERO_CACHE", str(Path.home() / ".cache" / "wing_aero" / "meshes"))
+DEFAULT_MAX_BYTES = 20 * 1024 ** 3
+
+def file_sha256(path: str, chunk: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def mesh_params(cfg: MeshingConfig) -> Dict[str, object]:
+    d = asdict(cfg)
+    return {k: d[k] for k in MESH_FIELDS}
+
+def mesh_key(cfg: MeshingConfig, cad_hash: Optional[str] = None) -> str:
+    """Content address of the mesh: CAD bytes + every mesh-relevant setting."""
+    payload = json.dumps({"cad": cad_hash or file_sha256(cfg.cad_file), "mesh": mesh_params(cfg)},
+                         sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class MeshCache:
+    """
+    Directory of mesh files named by their key, with an ``index.json`` holding
+    size and last-use time. ``put`` evicts least-recently-used entries until the
+    cache fits in ``max_bytes``.
+    """
+
+    def __init__(self, root: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root or DEFAULT_CACHE_DIR)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @property
+    def _index_path(self) -> Path:
+        return self.root / "index.json"
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            return json.loads(self._index_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save(self, index: Dict[str, Dict]):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self._index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(index, indent=2))
+        os.replace(tmp, self._index_path)
+
+    def get(self, key: str, touch: bool = True) -> Optional[str]:
+        with self._lock:
+            index = self._load()
+            entry = index.get(key)
+            if entry is None:
+                return None
+            path = self.root / entry["file"]
+            if not path.exists():
+                del index[key]
+                self._save(index)
+                return None
+            if touch:
+                entry["last_used"] = time.time()
+                self._save(index)
+            return str(path)
+
+    def put(self, key: str, mesh_path: str, meta: Optional[Dict] = None) -> str:
+        suffix = "".join(Path(mesh_path).suffixes) or ".msh"
+        name = key + suffix
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp = self.root / (name + ".part")
+            shutil.copyfile(mesh_path, tmp)
+            os.replace(tmp, self.root / name)
+            index = self._load()
+            now = time.time()
+            index[key] = {"file": name, "size": (self.root / name).stat().st_size,
+                          "created": now, "last_used": now, "meta": meta or {}}
+            self._evict(index, keep=key)
+            self._save(index)
+        return str(self.root / name)
+
+    def _evict(self, index: Dict[str, Dict], keep: str):
+        total = sum(e["size"] for e in index.values())
+        for key, entry in sorted(index.items(), key=lambda kv: kv[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            (self.root / entry["file"]).unlink(missing_ok=True)
+            total -= entry["size"]
+            del index[key]
+
+    def entries(self) -> List[Dict]:
+        with self._lock:
+            return [dict(key=k, **v) for k, v in
+                    sorted(self._load().items(), key=lambda kv: kv[1]["last_used"], reverse=True)]
+
+    def purge(self) -> int:
+        with self._lock:
+            index = self._load()
+            for entry in index.values():
+                (self.root / entry["file"]).unlink(missing_ok=True)
+            self._save({})
+            return len(index)
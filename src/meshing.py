@@ -1,6 +1,34 @@
 from __future__ import annotations
 import os
+import re
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, List, Optional, Tuple
+
 from .config import MeshingConfig
+from .logging_utils import get_logger
+from .telemetry import span, traced
+
+log = get_logger()
+
+@dataclass
+class MeshTask:
+    """One workflow step; ``uses`` lists the MeshingConfig fields it depends on."""
+    name: str
+    run: Callable[[object, MeshingConfig], None]  # (meshing session, effective config)
+    uses: Tuple[str, ...] = ()
+
+def default_fallbacks(cfg: MeshingConfig) -> List[Dict[str, object]]:
+    """Fewer prism layers, then a finer hexcore, then a tetrahedral fill."""
+    ladder: List[Dict[str, object]] = [
+        {"bl_n_layers": max(1, cfg.bl_n_layers * 2 // 3)},
+        {"hex_max_cell_length": cfg.hex_max_cell_length / 2},
+    ]
+    if cfg.volume_fill != "tetrahedral":
+        ladder.append({"volume_fill": "tetrahedral"})
+    return ladder
+
+def _checkpoint_path(cfg: MeshingConfig) -> str:
+    return re.sub(r"\.msh(\.h5)?$", "", cfg.mesh_file) + ".wft"
 
 def _set_units(meshing, cfg: MeshingConfig):
     try:
@@ -15,10 +43,32 @@ def _set_units(meshing, cfg: MeshingConfig):
 def _apply_surface_mesh_controls(tasks, cfg: MeshingConfig):
     surf = tasks["Generate the Surface Mesh"]
     surf.Arguments.set_state({"CFDSurfaceMeshControls": {"MaxSize": cfg.surf_max, "MinSize": cfg.surf_min}})
-    surf.Execute()
+    with span("mesh.surface", task="Generate the Surface Mesh"):
+        surf.Execute()
+
+def _bl_child(add_bl):
+    child_names = getattr(add_bl, "Children", [])
+    child_name = child_names[0] if child_names else None
+    return add_bl.GetChildObject(child_name) if child_name else None
 
+def _bl_controls(cfg: MeshingConfig) -> Dict[str, object]:
+    controls = {"NumberOfLayers": cfg.bl_n_layers, "GrowthRate": cfg.bl_growth}
+    if cfg.first_layer_height is not None:
+        controls.update(UseAbsoluteFirstLayerHeight=True, FirstLayerHeight=cfg.first_layer_height)
+    return controls
+
+@traced("mesh.boundary_layers")
 def _apply_boundary_layers(tasks, cfg: MeshingConfig):
     add_bl = tasks["Add Boundary Layers"]
+    try:
+        existing = _bl_child(add_bl)
+    except Exception:
+        existing = None
+    if existing is not None:
+        # Retry: update the control added by the failed attempt instead of adding a second one
+        existing.Arguments.set_state({"BoundaryLayerControls": _bl_controls(cfg)})
+        existing.Execute()
+        return
     args = {"NumberOfLayers": cfg.bl_n_layers}
     try:
         args["GrowthRate"] = cfg.bl_growth
@@ -28,22 +78,19 @@ def _apply_boundary_layers(tasks, cfg: MeshingConfig):
     add_bl.AddChildAndUpdate()
     if cfg.first_layer_height is not None:
         try:
-            child_names = getattr(add_bl, "Children", [])
-            child_name = child_names[0] if child_names else None
-            if child_name:
-                child = add_bl.GetChildObject(child_name)
-                child.Arguments.set_state({
-                    "BoundaryLayerControls": {
-                        "UseAbsoluteFirstLayerHeight": True,
-                        "FirstLayerHeight": cfg.first_layer_height,
-                        "NumberOfLayers": cfg.bl_n_layers,
-                        "GrowthRate": cfg.bl_growth,
-                    }
-                })
+            child = _bl_child(add_bl)
+            if child is not None:
+                child.Arguments.set_state({"BoundaryLayerControls": _bl_controls(cfg)})
                 child.Execute()
         except Exception as e:
             print(f"[warn] Could not set FirstLayerHeight: {e}")
 
+def _update_boundaries_and_regions(tasks):
+    for name in ("Update Boundaries", "Update Regions"):
+        with span("mesh.update", task=name):
+            tasks[name].Execute()
+
+@traced("mesh.write")
 def _write_mesh(meshing, filename: str = "wing_auto.msh.h5") -> str:
     try:
         meshing.meshing.File.WriteMesh(FileName=filename)
@@ -51,82 +98,87 @@ def _write_mesh(meshing, filename: str = "wing_auto.msh.h5") -> str:
         meshing.tui.file.write_mesh(filename)
     return os.path.abspath(filename)
 
-def mesh_watertight(cfg: MeshingConfig):
+def _launch_meshing(cfg: MeshingConfig):
     # Lazy import so the module is importable without Ansys installed
     import ansys.fluent.core as pyfluent
 
-    meshing = pyfluent.launch_fluent(mode="meshing", precision=cfg.precision, processor_count=cfg.processors)
-    wf = meshing.workflow
-    wf.InitializeWorkflow(WorkflowType="Watertight Geometry")
-    tasks = wf.TaskObject
+    with span("mesh.launch", processors=cfg.processors):
+        return pyfluent.launch_fluent(mode="meshing", precision=cfg.precision, processor_count=cfg.processors)
 
-    _set_units(meshing, cfg)
-
-    meshing.upload(cfg.cad_file)
-    imp = tasks["Import Geometry"]
-    imp.Arguments.set_state({"FileName": cfg.cad_file, "LengthUnit": cfg.length_unit})
-    imp.Execute()
-
-    _apply_surface_mesh_controls(tasks, cfg)
-
-    describe = tasks["Describe Geometry"]
-    describe.Arguments.set_state({"SetupType": "The geometry consists of only fluid regions with no voids"})
-    describe.UpdateChildTasks(SetupTypeChanged=True)
-    describe.Execute()
-
-    tasks["Update Boundaries"].Execute()
-    tasks["Update Regions"].Execute()
-
-    _apply_boundary_layers(tasks, cfg)
-
-    vol = tasks["Generate the Volume Mesh"]
+def _volume_mesh(meshing, cfg: MeshingConfig, extra: Optional[Dict[str, object]] = None):
+    vol = meshing.workflow.TaskObject["Generate the Volume Mesh"]
     vol.Arguments.set_state({
         "VolumeFill": cfg.volume_fill,
         "VolumeFillControls": {"HexMaxCellLength": cfg.hex_max_cell_length},
+        **(extra or {}),
     })
-    vol.Execute()
+    with span("mesh.volume", task="Generate the Volume Mesh", fill=cfg.volume_fill):
+        vol.Execute()
 
-    meshing.tui.mesh.check_mesh()
-    _write_mesh(meshing)
-    return meshing
+def _shared_tail() -> List[MeshTask]:
+    return [
+        MeshTask("Update Boundaries and Regions", lambda m, c: _update_boundaries_and_regions(m.workflow.TaskObject)),
+        MeshTask("Add Boundary Layers", lambda m, c: _apply_boundary_layers(m.workflow.TaskObject, c),
+                 ("bl_n_layers", "bl_growth", "first_layer_height")),
+    ]
 
-def mesh_fault_tolerant(cfg: MeshingConfig):
-    import ansys.fluent.core as pyfluent
+def watertight_tasks() -> List[MeshTask]:
+    def import_geometry(meshing, cfg: MeshingConfig):
+        with span("mesh.import", task="Import Geometry", cad=os.path.basename(cfg.cad_file)):
+            meshing.upload(cfg.cad_file)
+            imp = meshing.workflow.TaskObject["Import Geometry"]
+            imp.Arguments.set_state({"FileName": cfg.cad_file, "LengthUnit": cfg.length_unit})
+            imp.Execute()
 
-    meshing = pyfluent.launch_fluent(mode="meshing", precision=cfg.precision, processor_count=cfg.processors)
-    wf = meshing.workflow
-    wf.InitializeWorkflow(WorkflowType="Fault-tolerant Meshing")
-    tasks = wf.TaskObject
+    def describe_geometry(meshing, cfg: MeshingConfig):
+        describe = meshing.workflow.TaskObject["Describe Geometry"]
+        describe.Arguments.set_state({"SetupType": "The geometry consists of only fluid regions with no voids"})
+        describe.UpdateChildTasks(SetupTypeChanged=True)
+        with span("mesh.describe", task="Describe Geometry"):
+            describe.Execute()
 
-    _set_units(meshing, cfg)
+    return [
+        MeshTask("Import Geometry", import_geometry, ("cad_file", "length_unit")),
+        MeshTask("Generate the Surface Mesh", lambda m, c: _apply_surface_mesh_controls(m.workflow.TaskObject, c),
+                 ("surf_min", "surf_max")),
+        MeshTask("Describe Geometry", describe_geometry),
+        *_shared_tail(),
+        MeshTask("Generate the Volume Mesh", _volume_mesh, ("volume_fill", "hex_max_cell_length")),
+    ]
 
-    pm = meshing.PartManagement
-    fm = meshing.PMFileManagement
-    pm.InputFileChanged(FilePath=cfg.cad_file, IgnoreSolidNames=False, PartPerBody=True)
-    meshing.upload(cfg.cad_file)
-    fm.FileManager.LoadFiles()
-
-    imp = tasks["Import CAD and Part Management"]
-    imp.Arguments.set_state({
-        "Context": 0,
-        "CreateObjectPer": "Custom",
-        "FMDFileName": cfg.cad_file,
-        "FileLoaded": "yes",
-        "ObjectSetting": "DefaultObjectSetting",
-    })
-    imp.Execute()
+def fault_tolerant_tasks(cfg: MeshingConfig) -> List[MeshTask]:
+    def import_cad(meshing, cfg: MeshingConfig):
+        pm = meshing.PartManagement
+        fm = meshing.PMFileManagement
+        with span("mesh.load_cad", cad=os.path.basename(cfg.cad_file)):
+            pm.InputFileChanged(FilePath=cfg.cad_file, IgnoreSolidNames=False, PartPerBody=True)
+            meshing.upload(cfg.cad_file)
+            fm.FileManager.LoadFiles()
 
-    dgf = tasks["Describe Geometry and Flow"]
-    dgf.Arguments.set_state({
-        "FlowType": "External flow around an object",
-        "AddEnclosure": "Yes" if cfg.create_enclosure else "No",
-        "LocalRefinementRegions": "No",
-    })
-    dgf.UpdateChildTasks(SetupTypeChanged=False)
-    dgf.Execute()
+        imp = meshing.workflow.TaskObject["Import CAD and Part Management"]
+        imp.Arguments.set_state({
+            "Context": 0,
+            "CreateObjectPer": "Custom",
+            "FMDFileName": cfg.cad_file,
+            "FileLoaded": "yes",
+            "ObjectSetting": "DefaultObjectSetting",
+        })
+        with span("mesh.import", task="Import CAD and Part Management"):
+            imp.Execute()
 
-    if cfg.create_enclosure:
-        ext = tasks["Create External Flow Boundaries"]
+    def describe_geometry_and_flow(meshing, cfg: MeshingConfig):
+        dgf = meshing.workflow.TaskObject["Describe Geometry and Flow"]
+        dgf.Arguments.set_state({
+            "FlowType": "External flow around an object",
+            "AddEnclosure": "Yes" if cfg.create_enclosure else "No",
+            "LocalRefinementRegions": "No",
+        })
+        dgf.UpdateChildTasks(SetupTypeChanged=False)
+        with span("mesh.describe", task="Describe Geometry and Flow"):
+            dgf.Execute()
+
+    def external_boundaries(meshing, cfg: MeshingConfig):
+        ext = meshing.workflow.TaskObject["Create External Flow Boundaries"]
         r = cfg.bbox_ratio
         ext.Arguments.set_state({
             "ExternalBoundariesName": cfg.enclosure_name,
@@ -139,26 +191,128 @@ def mesh_fault_tolerant(cfg: MeshingConfig):
                 "ZminRatio": -r["z_minus"], "ZmaxRatio": r["z_plus"],
             },
         })
-        ext.Execute()
+        with span("mesh.enclosure", task="Create External Flow Boundaries"):
+            ext.Execute()
 
-    _apply_surface_mesh_controls(tasks, cfg)
-    tasks["Update Boundaries"].Execute()
-    tasks["Update Regions"].Execute()
-    _apply_boundary_layers(tasks, cfg)
+    def volume(meshing, cfg: MeshingConfig):
+        _volume_mesh(meshing, cfg, {
+            "VolumeMeshPreferences": {"ShowVolumeMeshPreferences": True, "CheckSelfProximity": "yes"},
+        })
 
-    vol = tasks["Generate the Volume Mesh"]
-    vol.Arguments.set_state({
-        "VolumeFill": cfg.volume_fill,
-        "VolumeFillControls": {"HexMaxCellLength": cfg.hex_max_cell_length},
-        "VolumeMeshPreferences": {"ShowVolumeMeshPreferences": True, "CheckSelfProximity": "yes"},
-    })
-    vol.Execute()
+    tasks = [
+        MeshTask("Import CAD and Part Management", import_cad, ("cad_file",)),
+        MeshTask("Describe Geometry and Flow", describe_geometry_and_flow, ("create_enclosure",)),
+    ]
+    if cfg.create_enclosure:
+        tasks.append(MeshTask("Create External Flow Boundaries", external_boundaries,
+                              ("enclosure_name", "bbox_ratio")))
+    return tasks + [
+        MeshTask("Generate the Surface Mesh", lambda m, c: _apply_surface_mesh_controls(m.workflow.TaskObject, c),
+                 ("surf_min", "surf_max")),
+        *_shared_tail(),
+        MeshTask("Generate the Volume Mesh", volume, ("volume_fill", "hex_max_cell_length")),
+    ]
+
+def _save_workflow(meshing, path: str) -> bool:
+    try:
+        meshing.workflow.SaveWorkflow(FilePath=path)
+        return True
+    except Exception as e:
+        print(f"[warn] Could not save the meshing workflow to {path}: {e}; checkpointing disabled.")
+        return False
+
+def _restart_index(tasks: List[MeshTask], cfg: MeshingConfig, rung: Dict[str, object]) -> Optional[int]:
+    changed = {k for k, v in rung.items() if getattr(cfg, k) != v}
+    return next((i for i, t in enumerate(tasks) if changed & set(t.uses)), None)
+
+def run_workflow(meshing, tasks: List[MeshTask], cfg: MeshingConfig) -> MeshingConfig:
+    """
+    Execute ``tasks`` in order in one meshing session, saving the workflow after
+    each success. When a task fails, the next fallback rung that changes this task
+    or an earlier one is applied (rungs for later tasks are kept for later
+    failures) and execution resumes from the earliest task affected; CAD import, enclosure and surface meshing are not redone for a
+    volume-mesh or boundary-layer failure. Returns the configuration that
+    finally succeeded; raises the last error once the ladder is exhausted.
+    """
+    ladder = list(default_fallbacks(cfg) if cfg.fallbacks is None else cfg.fallbacks)
+    unknown = {k for rung in ladder for k in rung if not hasattr(cfg, k)}
+    if unknown:
+        raise ValueError(f"Unknown MeshingConfig field(s) in fallbacks: {sorted(unknown)}")
+    checkpoint = _checkpoint_path(cfg) if cfg.checkpoint else None
+    effective, used = cfg, []
+    i = 0
+    while i < len(tasks):
+        task = tasks[i]
+        try:
+            task.run(meshing, effective)
+        except Exception as e:
+            # The first rung that changes this task or an earlier one. Rungs that only
+            # touch later tasks cannot fix it and stay on the ladder for those tasks.
+            restart, rung = None, None
+            for j, candidate in enumerate(ladder):
+                start = _restart_index(tasks, effective, candidate)
+                if start is not None and start <= i:
+                    restart, rung = start, ladder.pop(j)
+                    break
+            if restart is None:
+                raise
+            effective = replace(effective, **rung)
+            used.append(rung)
+            print(f"[warn] Meshing task '{task.name}' failed ({e}); retrying from '{tasks[restart].name}' with {rung}")
+            i = restart
+            continue
+        if checkpoint is not None and not _save_workflow(meshing, checkpoint):
+            checkpoint = None
+        i += 1
+    if used:
+        overrides = {k: v for rung in used for k, v in rung.items()}
+        log.info("Meshing succeeded after %d fallback(s): %s", len(used), overrides)
+    return effective
+
+def _finish(meshing, cfg: MeshingConfig):
+    with span("mesh.check"):
+        meshing.tui.mesh.check_mesh()
+    _write_mesh(meshing, cfg.mesh_file)
+
+def mesh_watertight(cfg: MeshingConfig, session=None):
+    meshing = session or _launch_meshing(cfg)
+    meshing.workflow.InitializeWorkflow(WorkflowType="Watertight Geometry")
+    _set_units(meshing, cfg)
+    effective = run_workflow(meshing, watertight_tasks(), cfg)
+    _finish(meshing, effective)
+    return meshing, effective
+
+def mesh_fault_tolerant(cfg: MeshingConfig, session=None):
+    meshing = session or _launch_meshing(cfg)
+    meshing.workflow.InitializeWorkflow(WorkflowType="Fault-tolerant Meshing")
+    _set_units(meshing, cfg)
+    effective = run_workflow(meshing, fault_tolerant_tasks(cfg), cfg)
+    _finish(meshing, effective)
+    return meshing, effective
+
+def build_mesh(cfg: MeshingConfig, session=None):
+    """
+    Run the meshing workflow; pass ``session`` to reuse an already running meshing session.
+    Returns ``(session, effective)`` where ``effective`` is ``cfg`` with any fallback
+    rung that was needed applied, i.e. the settings the mesh was actually built with.
+    """
+    with span("mesh", workflow=cfg.workflow, cad=os.path.basename(cfg.cad_file)):
+        if cfg.workflow.lower() == "watertight":
+            return mesh_watertight(cfg, session)
+        return mesh_fault_tolerant(cfg, session)
 
-    meshing.tui.mesh.check_mesh()
-    _write_mesh(meshing)
-    return meshing
+def build_mesh_file(cfg: MeshingConfig) -> Tuple[str, MeshingConfig]:
+    """
+    Mesh ``cfg`` in a new session, write ``cfg.mesh_file`` and close the session;
+    returns the mesh path and the effective settings as :func:`build_mesh` does.
+    """
+    session, effective = build_mesh(cfg)
+    # The mesh is on disk; release the meshing licence for the next job
+    session.exit()
+    return os.path.realpath(cfg.mesh_file), effective
 
-def build_mesh(cfg: MeshingConfig):
-    if cfg.workflow.lower() == "watertight":
-        return mesh_watertight(cfg)
-    return mesh_fault_tolerant(cfg)
+def fallback_changes(requested: MeshingConfig, effective: MeshingConfig) -> Dict[str, list]:
+    """The mesh settings a fallback changed, as ``{field: [requested, effective]}``; empty if none fired."""
+    from .mesh_cache import mesh_params
+    want, got = mesh_params(requested), mesh_params(effective)
+    return {k: [want[k], got[k]] for k in want if want[k] != got[k]}
@@ -0,0 +1,311 @@
+from __future__ import annotations
+import argparse
+import csv
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime
+from math import inf, isfinite, nan
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from . import telemetry
+from .adaptive import interval_errors
+from .config import MeshingConfig, SolverConfig
+from .journal import SweepJournal, write_manifest
+from .logging_utils import get_logger
+from .mesh_cache import MeshCache, mesh_params
+from .meshing import build_mesh_file
+from .parallel import solve_mesh_file
+from .refinement import QUANTITIES, Level, level_manifest, mesh_levels, refinement_levels
+from .solver import read_results_csv
+
+log = get_logger()
+
+CORRECTIONS = ("additive", "multiplicative")
+RESULT_FIELDS = ["AoA_deg", "CL", "CD", "Fidelity", "Reason", "CL_coarse", "CD_coarse",
+                 "CL_fine", "CD_fine", "CL_unc", "CD_unc"]
+
+Row = Dict[str, float]
+
+def _line(xs: List[float], ys: List[float]) -> Tuple[float, float]:
+    # Least-squares a + b*x; a constant from a single point
+    n = len(xs)
+    if n < 2:
+        return sum(ys) / n, 0.0
+    mx, my = sum(xs) / n, sum(ys) / n
+    sxx = sum((x - mx) ** 2 for x in xs)
+    b = sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / sxx if sxx else 0.0
+    return my - b * mx, b
+
+
+@dataclass
+class Correction:
+    """
+    Coarse-to-fine correction fitted on anchor angles solved on both meshes, per
+    quantity: ``fine = coarse + (a + b*aoa)`` (additive) or
+    ``fine = coarse * (a + b*aoa)`` (multiplicative). ``loo`` holds the
+    leave-one-out error at each anchor, which is how far the model can be
+    trusted between them.
+    """
+    kind: str
+    coef: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+    loo: Dict[str, Dict[float, float]] = field(default_factory=dict)
+
+    def _target(self, coarse: float, fine: float) -> float:
+        return fine - coarse if self.kind == "additive" else fine / coarse
+
+    def _apply(self, coef: Tuple[float, float], aoa: float, coarse: float) -> float:
+        k = coef[0] + coef[1] * aoa
+        return coarse + k if self.kind == "additive" else coarse * k
+
+    @classmethod
+    def fit(cls, anchors: Dict[float, Tuple[Row, Row]], kind: str = "additive") -> "Correction":
+        """``anchors`` maps AoA to its (coarse row, fine row)."""
+        if kind not in CORRECTIONS:
+            raise ValueError(f"correction must be one of {CORRECTIONS}")
+        model = cls(kind)
+        for q in QUANTITIES:
+            # A ratio is meaningless where the coarse value is ~0 (CL at zero lift)
+            pts = [(a, c[q], f[q]) for a, (c, f) in sorted(anchors.items())
+                   if kind == "additive" or abs(c[q]) > 1e-9]
+            if len(pts) < 2:
+                raise ValueError(f"need at least two usable anchors to fit the {q} correction")
+            xs, ys = [a for a, _, _ in pts], [model._target(c, f) for _, c, f in pts]
+            model.coef[q] = _line(xs, ys)
+            model.loo[q] = {}
+            for i, (a, c, f) in enumerate(pts):
+                coef = _line(xs[:i] + xs[i + 1:], ys[:i] + ys[i + 1:])
+                model.loo[q][a] = abs(model._apply(coef, a, c) - f)
+        return model
+
+    def apply(self, q: str, aoa: float, coarse: float) -> float:
+        return self._apply(self.coef[q], aoa, coarse)
+
+    def uncertainty(self, q: str, aoa: float) -> float:
+        """Leave-one-out error interpolated between the bracketing anchors (the nearest one outside them)."""
+        pts = sorted(self.loo[q].items())
+        if aoa <= pts[0][0]:
+            return pts[0][1]
+        if aoa >= pts[-1][0]:
+            return pts[-1][1]
+        for (a0, e0), (a1, e1) in zip(pts, pts[1:]):
+            if a0 <= aoa <= a1:
+                return e0 + (e1 - e0) * (aoa - a0) / (a1 - a0)
+        return inf
+
+
+def nonlinear_angles(rows: Dict[float, Row], cl_tol: float, cd_tol: float) -> List[float]:
+    """Angles next to an interval where the coarse polar bends more than the tolerances (stall, drag rise)."""
+    good = sorted(a for a, r in rows.items() if isfinite(r["CL"]) and isfinite(r["CD"]))
+    if len(good) < 3:
+        return good
+    flagged = set()
+    errs = zip(interval_errors(good, [rows[a]["CL"] for a in good]),
+               interval_errors(good, [rows[a]["CD"] for a in good]))
+    for i, (e_cl, e_cd) in enumerate(errs):
+        if e_cl > cl_tol or e_cd > cd_tol:
+            flagged.update((good[i], good[i + 1]))
+    return sorted(flagged)
+
+def linear_range(rows: Dict[float, Row], reasons: Dict[float, List[str]]) -> List[float]:
+    """The longest run of consecutive unflagged angles: the attached-flow part of the polar."""
+    best: List[float] = []
+    run: List[float] = []
+    for a in sorted(rows):
+        run = [] if reasons[a] else run + [a]
+        if len(run) > len(best):
+            best = run
+    return best
+
+def anchor_angles(candidates: List[float], n: int) -> List[float]:
+    """``n`` angles spread evenly over ``candidates`` (sorted), always including both ends."""
+    pts = sorted(candidates)
+    if n < 2:
+        raise ValueError("at least two anchors are needed")
+    if n >= len(pts):
+        return pts
+    return sorted({pts[round(i * (len(pts) - 1) / (n - 1))] for i in range(n)})
+
+def _fine_rows(level: Level, scfg: SolverConfig, angles: List[float], solve_fn: Callable) -> Dict[float, Row]:
+    # The fine level's journal keeps earlier fine solves, so each call only runs the new angles
+    t0 = time.perf_counter()
+    with telemetry.span("multifidelity.fine", angles=len(angles)):
+        level.csv = solve_fn(level.mesh_path, replace(scfg, aoa_deg=angles, adaptive=False),
+                             os.path.join(level.out_dir, "wing_aoa_results.csv"), SweepJournal(Path(level.out_dir)))
+    level.solve_s += time.perf_counter() - t0
+    level.rows = {**level.rows, **read_results_csv(level.csv, QUANTITIES)}
+    return level.rows
+
+def run_prescreen(base: MeshingConfig, scfg: SolverConfig, out_dir: Path, coarse_ratio: float = 2.0,
+                  n_anchors: int = 3, anchors: Optional[List[float]] = None, correction: str = "additive",
+                  cl_tol: float = 0.01, cd_tol: float = 0.0005, cache: Optional[MeshCache] = None,
+                  mesh_fn: Callable[[MeshingConfig], Tuple[str, MeshingConfig]] = build_mesh_file,
+                  solve_fn: Callable[[str, SolverConfig, str, SweepJournal], str] = solve_mesh_file
+                  ) -> Dict[str, object]:
+    """
+    Two-level sweep. ``base`` is the production (fine) mesh; the coarse mesh
+    scales its surface and hexcore sizes by ``coarse_ratio``. Both are meshed
+    concurrently, every angle of ``scfg`` is solved on the coarse mesh, and the
+    anchor angles (``anchors``, or ``n_anchors`` spread over the longest linear
+    stretch of the coarse polar) are solved on the fine mesh to fit the correction.
+
+    An angle is then solved on the fine mesh as well when the coarse polar bends
+    there (``scfg.adaptive_cl_tol``/``adaptive_cd_tol`` on the interpolation
+    error, as in adaptive sweeps), when the coarse solve failed, or when the
+    correction's leave-one-out error there exceeds ``cl_tol``/``cd_tol``; the
+    correction is never extrapolated beyond the anchors. Every other angle
+    takes the corrected coarse value. When fewer than two anchors are usable
+    (a short polar, a polar that bends everywhere, zero-lift anchors for the
+    multiplicative model) there is nothing to fit, and every angle is solved on
+    the fine mesh with the reason ``no-anchors``. Writes
+    ``multifidelity_results.csv`` (with a ``Fidelity`` flag per angle) and
+    ``multifidelity_summary.json``; returns the summary.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    fine_cfg, coarse_cfg = refinement_levels(base, coarse_ratio, 2)
+    fine = Level(0, fine_cfg, str((out_dir / "fine").resolve()))
+    coarse = Level(1, coarse_cfg, str((out_dir / "coarse").resolve()))
+    t0 = time.perf_counter()
+    mesh_levels([fine, coarse], scfg.processors, cache=cache, mesh_fn=mesh_fn)
+    for lv in (fine, coarse):
+        if lv.status == "failed":
+            raise RuntimeError(f"Meshing the {Path(lv.out_dir).name} level failed: {lv.error}")
+        write_manifest(Path(lv.out_dir), level_manifest(lv, scfg))
+
+    t1 = time.perf_counter()
+    with telemetry.span("multifidelity.coarse", angles=len(scfg.aoa_deg)):
+        coarse.csv = solve_fn(coarse.mesh_path, scfg, os.path.join(coarse.out_dir, "wing_aoa_results.csv"),
+                              SweepJournal(Path(coarse.out_dir)))
+    coarse.solve_s = time.perf_counter() - t1
+    coarse.rows = c_rows = read_results_csv(coarse.csv, QUANTITIES)
+    log.info("Coarse sweep: %d angles in %.1f s", len(c_rows), coarse.solve_s)
+
+    reasons: Dict[float, List[str]] = {a: [] for a in c_rows}
+    for a, r in c_rows.items():
+        if not (isfinite(r["CL"]) and isfinite(r["CD"])):
+            reasons[a].append("coarse-diverged")
+    for a in nonlinear_angles(c_rows, scfg.adaptive_cl_tol, scfg.adaptive_cd_tol):
+        reasons[a].append("nonlinear")
+    if anchors is None:
+        anchors = anchor_angles(linear_range(c_rows, reasons), n_anchors)
+    anchors = sorted(a for a in anchors if a in c_rows and "coarse-diverged" not in reasons[a])
+
+    model: Optional[Correction] = None
+    f_rows: Dict[float, Row] = {}
+    usable: Dict[float, Tuple[Row, Row]] = {}
+    if len(anchors) >= 2:
+        f_rows = _fine_rows(fine, scfg, anchors, solve_fn)
+        usable = {a: (c_rows[a], f_rows[a]) for a in anchors
+                  if a in f_rows and isfinite(f_rows[a]["CL"]) and isfinite(f_rows[a]["CD"])}
+        try:
+            model = Correction.fit(usable, correction)
+        except ValueError as e:
+            print(f"[warn] {e}")
+
+    if model is None:
+        print(f"[warn] No usable anchors (from {anchors}); solving every angle on the fine mesh")
+        reasons = {a: ["no-anchors"] for a in c_rows}
+    else:
+        log.info("%s correction from anchors %s: %s", correction.capitalize(), sorted(usable),
+                 {q: tuple(round(c, 6) for c in ab) for q, ab in model.coef.items()})
+        tols = {"CL": cl_tol, "CD": cd_tol}
+        for a in c_rows:
+            if a in usable:
+                reasons[a].insert(0, "anchor")
+            elif not min(usable) <= a <= max(usable):
+                reasons[a].append("outside-anchors")
+            elif any(model.uncertainty(q, a) > tols[q] for q in QUANTITIES):
+                reasons[a].append("disagreement")
+    todo = sorted(a for a, why in reasons.items() if why and a not in f_rows)
+    if todo:
+        log.info("Fine-mesh solves for %d of %d angles: %s", len(todo), len(c_rows), todo)
+        f_rows = _fine_rows(fine, scfg, todo, solve_fn)
+
+    rows = []
+    for a in sorted(c_rows):
+        c, f = c_rows[a], f_rows.get(a)
+        fine_ok = f is not None and isfinite(f["CL"]) and isfinite(f["CD"])
+        why = reasons[a] + (["fine-diverged"] if reasons[a] and not fine_ok else [])
+        row = {"AoA_deg": a, "Reason": "; ".join(why),
+               "Fidelity": "fine" if fine_ok and reasons[a] else "corrected"}
+        for q in QUANTITIES:
+            corrected = model.apply(q, a, c[q]) if model is not None and isfinite(c[q]) else nan
+            row[q] = f[q] if row["Fidelity"] == "fine" else corrected
+            row[f"{q}_coarse"] = c[q]
+            row[f"{q}_fine"] = f[q] if f is not None else ""
+            row[f"{q}_unc"] = (0.0 if row["Fidelity"] == "fine"
+                               else model.uncertainty(q, a) if model is not None else nan)
+        rows.append(row)
+
+    with open(out_dir / "multifidelity_results.csv", "w", newline="") as fh:
+        writer = csv.DictWriter(fh, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    n_fine = sum(1 for r in rows if r["CL_fine"] != "")
+    summary = {
+        "angles": len(rows),
+        "fine_solves": n_fine,
+        "corrected": sum(r["Fidelity"] == "corrected" for r in rows),
+        "anchors": sorted(usable),
+        "correction": asdict(model) if model is not None else None,
+        "coarse_mesh": mesh_params(coarse.mcfg),
+        "fine_mesh": mesh_params(fine.mcfg),
+        "mesh_s": round(max(fine.mesh_s, coarse.mesh_s), 3),
+        "coarse_solve_s": round(coarse.solve_s, 3),
+        "fine_solve_s": round(fine.solve_s, 3),
+        "wall_s": round(time.perf_counter() - t0, 3),
+        "results_csv": str(out_dir / "multifidelity_results.csv"),
+    }
+    (out_dir / "multifidelity_summary.json").write_text(json.dumps(summary, indent=2, default=str))
+    return summary
+
+def main():
+    from .run import add_case_arguments, make_configs, parse_aoa_list
+
+    p = argparse.ArgumentParser(description="Multi-fidelity sweep: every angle on a coarse mesh, "
+                                            "the fine (production) mesh only where the correction is not trusted.")
+    p.add_argument("--cad", type=str, required=True, help="Path to CAD (.pmdb/.fmd/.step/.iges)")
+    add_case_arguments(p)
+    p.add_argument("--coarse-ratio", type=float, default=2.0,
+                   help="Coarse mesh = case mesh sizes (the fine mesh) times this ratio")
+    p.add_argument("--anchors", type=str, default="3",
+                   help='Number of anchor angles solved on both meshes, or an explicit list "0,4,8"')
+    p.add_argument("--correction", choices=CORRECTIONS, default="additive",
+                   help="Coarse-to-fine correction model, linear in AoA")
+    p.add_argument("--mf-cl-tol", type=float, default=0.01,
+                   help="Largest trusted CL correction error; beyond it the angle is solved on the fine mesh")
+    p.add_argument("--mf-cd-tol", type=float, default=0.0005, help="Same for CD")
+    p.add_argument("--outdir", type=str, default="runs", help="Directory to store outputs")
+    p.add_argument("--mesh-cache", type=str, default=None, help="Mesh cache directory")
+    p.add_argument("--no-mesh-cache", action="store_true", help="Bypass the mesh cache and always remesh")
+    p.add_argument("--telemetry", action="store_true", help="Write telemetry.json and trace.json to the run directory")
+    args = p.parse_args()
+
+    cad_path = Path(args.cad).resolve()
+    if not cad_path.exists():
+        raise SystemExit(f"CAD file not found: {cad_path}")
+    args.cad = str(cad_path)
+    mcfg, scfg = make_configs(args)
+    explicit = parse_aoa_list(args.anchors) if "," in args.anchors or ":" in args.anchors else None
+
+    out_dir = Path(args.outdir) / datetime.now().strftime("multifidelity_%Y%m%d_%H%M%S")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    write_manifest(out_dir, vars(args))
+    cache = None if args.no_mesh_cache else MeshCache(args.mesh_cache)
+    if args.telemetry:
+        telemetry.enable()
+    try:
+        summary = run_prescreen(mcfg, scfg, out_dir, args.coarse_ratio,
+                                int(args.anchors) if explicit is None else len(explicit), explicit,
+                                args.correction, args.mf_cl_tol, args.mf_cd_tol, cache)
+    finally:
+        if args.telemetry:
+            telemetry.disable().write(out_dir)
+    log.info("Multi-fidelity polar: %d angles, %d fine-mesh solves, %d corrected. Results: %s",
+             summary["angles"], summary["fine_solves"], summary["corrected"], summary["results_csv"])
+
+if __name__ == "__main__":
+    main()
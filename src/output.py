@@ -0,0 +1,193 @@
+from __future__ import annotations
+import glob
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from .config import SolverConfig
+from .logging_utils import get_logger
+from .telemetry import span
+
+log = get_logger()
+
+OUTPUT_MODES = ("full", "reduced")
+FINAL_NAME = "wing_external"
+
+@dataclass
+class IOStats:
+    """Case/data output of a run; shared by every session writing into the same run directory."""
+    files: int = 0
+    bytes: int = 0
+    write_s: float = 0.0      # sweep blocked while Fluent wrote
+    wait_s: float = 0.0       # sweep blocked on a full background queue or the final flush
+    transfer_s: float = 0.0   # background moves from scratch to the run directory (overlapped)
+    case: Optional[str] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, **deltas):
+        with self._lock:
+            for k, v in deltas.items():
+                setattr(self, k, getattr(self, k) + v)
+
+    @property
+    def blocked_s(self) -> float:
+        return self.write_s + self.wait_s
+
+    def as_dict(self) -> Dict[str, object]:
+        return {"files": self.files, "bytes": self.bytes, "mb": round(self.bytes / 1024 ** 2, 3),
+                "blocked_s": round(self.blocked_s, 3), "write_s": round(self.write_s, 3),
+                "wait_s": round(self.wait_s, 3), "transfer_s": round(self.transfer_s, 3), "case": self.case}
+
+    def report(self, run_dir: str) -> str:
+        """Log the totals and write them to ``<run_dir>/io_stats.json``."""
+        log.info("Output: %d files, %.1f MB, %.2f s blocked on I/O (%.2f s moved in the background)",
+                 self.files, self.bytes / 1024 ** 2, self.blocked_s, self.transfer_s)
+        path = os.path.join(run_dir, "io_stats.json")
+        with open(path, "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
+        return path
+
+def set_compression(solver, level: int):
+    """HDF5 (CFF) compression level 0-9 for every case/data file the session writes."""
+    try:
+        solver.file.cffio_options.compression_level = level
+    except Exception:
+        try:
+            solver.tui.file.cffio_options.compression_level(level)
+        except Exception as e:
+            print(f"[warn] Could not set HDF5 compression level {level}: {e}")
+
+def _produced(paths: List[str]) -> List[str]:
+    # Fluent may append its own extension to exported files
+    found = []
+    for p in paths:
+        found += [p] if os.path.exists(p) else sorted(glob.glob(glob.escape(p) + ".*"))
+    return found
+
+
+class OutputWriter:
+    """
+    Case/data output of one solver session.
+
+    ``full`` mode keeps the old behaviour: every write is a case+data pair.
+    ``reduced`` mode writes the case once (before the first data file, once per
+    run directory) and then data-only files, optionally restricted to
+    ``cfg.output_fields`` through a CFF post export.
+
+    With a scratch directory (``cfg.scratch_dir``; a local temporary directory
+    by default in reduced mode) Fluent writes to fast local storage and a
+    background thread moves the files into the run directory, so the transfer
+    to shared storage overlaps the next angle's iterations. At most
+    ``cfg.io_queue`` files wait; beyond that the sweep blocks. Bytes and
+    blocked time are accumulated in ``stats``.
+    """
+
+    def __init__(self, solver, cfg: SolverConfig, work_dir: str, stats: Optional[IOStats] = None):
+        if cfg.output_mode not in OUTPUT_MODES:
+            raise ValueError(f"output_mode must be one of {OUTPUT_MODES}")
+        self.solver = solver
+        self.cfg = cfg
+        self.work_dir = work_dir
+        self.stats = stats or IOStats()
+        self.reduced = cfg.output_mode == "reduced"
+        self._own_scratch = cfg.scratch_dir is None and self.reduced
+        self.scratch = tempfile.mkdtemp(prefix="wing_aero_io_") if self._own_scratch else cfg.scratch_dir
+        self._queue: Optional["queue.Queue[Optional[List[str]]]"] = None
+        self._errors: List[BaseException] = []
+        if self.scratch:
+            os.makedirs(self.scratch, exist_ok=True)
+            self._queue = queue.Queue(maxsize=max(1, cfg.io_queue))
+            self._thread = threading.Thread(target=self._mover, name="io-writer", daemon=True)
+            self._thread.start()
+        if cfg.compression_level is not None:
+            set_compression(solver, cfg.compression_level)
+
+    def _mover(self):
+        while True:
+            files = self._queue.get()
+            if files is None:
+                return
+            t0 = time.perf_counter()
+            for src in files:
+                try:
+                    shutil.move(src, os.path.join(self.work_dir, os.path.basename(src)))
+                except BaseException as e:
+                    self._errors.append(e)
+            self.stats.add(transfer_s=time.perf_counter() - t0)
+
+    def _write(self, kind: str, name: str, write: Callable[[str], None], outputs: Callable[[str], List[str]]):
+        target = os.path.join(self.scratch or self.work_dir, name)
+        t0 = time.perf_counter()
+        with span("solver.io.write", kind=kind, file=name):
+            write(target)
+        files = _produced(outputs(target))
+        self.stats.add(write_s=time.perf_counter() - t0, files=len(files),
+                       bytes=sum(os.path.getsize(f) for f in files))
+        if self._queue is not None and files:
+            t0 = time.perf_counter()
+            with span("solver.io.wait", file=name):
+                self._queue.put(files)
+            self.stats.add(wait_s=time.perf_counter() - t0)
+
+    def _ensure_case(self):
+        with self.stats._lock:
+            if self.stats.case is not None:
+                return
+            self.stats.case = f"{FINAL_NAME}.cas.h5"
+        self._write("case", self.stats.case,
+                    lambda p: self.solver.file.write(file_type="case", file_name=p), lambda p: [p])
+
+    def _write_case_data(self, kind: str, stem: str):
+        self._write(kind, f"{stem}.cas.h5", lambda p: self.solver.file.write_case_data(file_name=p),
+                    lambda p: [p, p[:-len(".cas.h5")] + ".dat.h5"])
+
+    def _write_data(self, kind: str, stem: str, subset: bool = True):
+        self._ensure_case()
+        if subset and self.cfg.output_fields:
+            self._write(kind, f"{stem}.post", self._export_fields, lambda p: [p])
+        else:
+            self._write(kind, f"{stem}.dat.h5",
+                        lambda p: self.solver.file.write(file_type="data", file_name=p), lambda p: [p])
+
+    def _export_fields(self, path: str):
+        try:
+            self.solver.file.export.common_fluids_format_post(
+                file_name=path, cell_func_domain_export=list(self.cfg.output_fields))
+        except Exception as e:
+            print(f"[warn] Field-subset export failed ({e}); writing full data instead")
+            self.solver.file.write(file_type="data", file_name=path)
+
+    def write_angle(self, aoa_deg: float):
+        stem = f"wing_aoa_{aoa_deg:g}"
+        if self.reduced:
+            self._write_data("angle", stem)
+        else:
+            self._write_case_data("angle", stem)
+
+    def write_final(self):
+        # The final data file stays complete so the run can be restarted from it
+        if self.reduced:
+            self._write_data("final", FINAL_NAME, subset=False)
+        else:
+            self._write_case_data("final", FINAL_NAME)
+
+    def close(self) -> IOStats:
+        """Wait for background moves to finish; raises the first move error."""
+        if self._queue is not None:
+            t0 = time.perf_counter()
+            with span("solver.io.wait", file="flush"):
+                self._queue.put(None)
+                self._thread.join()
+            self.stats.add(wait_s=time.perf_counter() - t0)
+            self._queue = None
+            if self._own_scratch and not self._errors:
+                shutil.rmtree(self.scratch, ignore_errors=True)
+        if self._errors:
+            raise RuntimeError(f"Moving output files from {self.scratch} failed") from self._errors[0]
+        return self.stats
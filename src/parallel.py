@@ -0,0 +1,125 @@
+from __future__ import annotations
+import os
+import queue
+import threading
+from typing import Callable, Dict, List, Optional
+
+from .config import SolverConfig
+from .history import HistoryWriter, open_writer
+from .output import IOStats, OutputWriter
+from .journal import SweepJournal
+from .logging_utils import get_logger
+from .solver import (_complete, _diverged, _prepare_solver, _solve_aoa, _write_snapshot, launch_solver,
+                     read_mesh, solve_from_mesh_file, write_results_csv)
+
+log = get_logger()
+
+def split_processors(total: int, n_sessions: int) -> List[int]:
+    """
+    Share a processor budget across sessions, e.g. 10 over 3 -> [4, 3, 3].
+    Every session gets at least one core.
+    """
+    n_sessions = max(1, min(n_sessions, total))
+    base, extra = divmod(total, n_sessions)
+    return [base + (1 if i < extra else 0) for i in range(n_sessions)]
+
+def _worker(session_factory: Callable, processors: int, mesh_path: str, cfg: SolverConfig,
+            work: "queue.Queue[float]", rows: List[Dict[str, float]], lock: threading.Lock,
+            errors: List[BaseException], work_dir: str, journal: Optional[SweepJournal],
+            history: Optional[HistoryWriter] = None, io_stats: Optional[IOStats] = None):
+    try:
+        solver = session_factory(processors)
+    except BaseException as e:
+        errors.append(e)
+        return
+    ctx = None
+    try:
+        read_mesh(solver, mesh_path)
+        ctx = _prepare_solver(solver, cfg)
+        ctx.history = history
+        ctx.output = OutputWriter(solver, cfg, work_dir, io_stats)
+        while not errors:
+            try:
+                aoa_deg = work.get_nowait()
+            except queue.Empty:
+                break
+            row = _solve_aoa(solver, ctx, cfg, aoa_deg)
+            snap = None
+            if journal is not None and cfg.snapshots and not _diverged(row):
+                snap = ctx.snapshots[aoa_deg] = _write_snapshot(solver, journal.snapshot_path(aoa_deg), ctx.output)
+            _complete(ctx, cfg, row, journal, snap)
+            log.info("AoA %s done (%d cores)", aoa_deg, processors)
+            with lock:
+                rows.append(row)
+    except BaseException as e:
+        errors.append(e)
+    finally:
+        if ctx is not None and ctx.output is not None:
+            try:
+                ctx.output.close()
+            except BaseException as e:
+                errors.append(e)
+        try:
+            solver.exit()
+        except Exception:
+            pass
+
+def solve_parallel_sweep(mesh_path: str, cfg: SolverConfig, csv_name: str = "wing_aoa_results.csv",
+                         session_factory: Optional[Callable] = None, journal: Optional[SweepJournal] = None):
+    """
+    Run the AoA sweep over ``cfg.n_sessions`` solver sessions reading the same mesh.
+    Angles are handed out through a shared work queue; the CSV is written in sorted
+    AoA order once every session has finished.
+
+    ``session_factory(processors)`` must return a solver session; it defaults to
+    launching Fluent, and tests pass a stand-in. Angles already in ``journal``
+    are skipped and merged back into the CSV.
+    """
+    if session_factory is None:
+        def session_factory(processors: int):
+            return launch_solver(cfg, processors)
+
+    if cfg.adaptive or cfg.continuation:
+        print("[warn] Adaptive and continuation sweeps run in one session; "
+              "the parallel sweep solves the listed angles cold.")
+    todo = [a for a in cfg.aoa_deg if journal is None or not journal.is_done(a)]
+    shares = split_processors(cfg.processors, min(cfg.n_sessions, max(1, len(todo))))
+    work: "queue.Queue[float]" = queue.Queue()
+    for aoa_deg in todo:
+        work.put(aoa_deg)
+    work_dir = os.path.dirname(os.path.abspath(csv_name))
+    # One writer shared by all sessions: each angle is its own file
+    history = open_writer(work_dir) if cfg.history else None
+    io_stats = IOStats()
+
+    rows: List[Dict[str, float]] = []
+    errors: List[BaseException] = []
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(target=_worker, name=f"solver-{i}",
+                         args=(session_factory, n, mesh_path, cfg, work, rows, lock, errors, work_dir, journal,
+                               history, io_stats))
+        for i, n in enumerate(shares)
+    ]
+    log.info("Parallel sweep: %d sessions, cores %s, %d angles", len(shares), shares, len(todo))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if errors:
+        raise errors[0]
+    io_stats.report(work_dir)
+
+    if journal is not None:
+        rows = [rec["row"] for rec in journal.completed().values()]
+    rows.sort(key=lambda r: r["AoA_deg"])
+    if history is not None:
+        history.write_results(rows)
+    return write_results_csv(rows, csv_name)
+
+def solve_mesh_file(mesh_path: str, cfg: SolverConfig, csv_name: str = "wing_aoa_results.csv",
+                    journal: Optional[SweepJournal] = None) -> str:
+    """Sweep a mesh file in one session, or in ``cfg.n_sessions`` parallel ones; returns the CSV path."""
+    if cfg.n_sessions > 1:
+        return solve_parallel_sweep(mesh_path, cfg, csv_name, journal=journal)
+    return solve_from_mesh_file(mesh_path, cfg, csv_name, journal)
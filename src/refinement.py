@@ -0,0 +1,381 @@
+from __future__ import annotations
+import argparse
+import csv
+import json
+import math
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime
+from math import inf, isfinite, nan
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from . import telemetry
+from .config import MeshingConfig, SolverConfig
+from .estimator import mesh_file_cell_count, raw_cell_count
+from .journal import SweepJournal, write_manifest
+from .logging_utils import get_logger
+from .mesh_cache import MeshCache, mesh_key, mesh_params
+from .meshing import build_mesh_file, fallback_changes
+from .parallel import solve_mesh_file, split_processors
+from .solver import read_results_csv
+
+log = get_logger()
+
+QUANTITIES = ("CL", "CD")
+RESULT_FIELDS = ["level", "cells", "surf_min", "surf_max", "hex_max_cell_length", "AoA_deg", "CL", "CD"]
+GCI_FIELDS = ["AoA_deg", "quantity", "behaviour", "order", "extrapolated", "gci_fine", "approx_error"]
+
+
+@dataclass
+class Level:
+    """One mesh of the study; level 0 is the finest (the base config)."""
+    index: int
+    mcfg: MeshingConfig
+    out_dir: str
+    cells: Optional[float] = None
+    cells_source: str = ""         # "mesh" (read from the file) or "estimate"
+    mesh_path: Optional[str] = None
+    mesh_source: str = ""          # "meshed" or "cache"
+    status: str = "pending"        # pending -> meshed -> solved | failed
+    error: str = ""
+    mesh_s: float = 0.0
+    solve_s: float = 0.0
+    csv: Optional[str] = None
+    rows: Dict[float, Dict[str, float]] = field(default_factory=dict)
+    mesh_fallback: Dict[str, list] = field(default_factory=dict)   # settings a meshing fallback changed
+
+    @property
+    def h(self) -> float:
+        """Representative cell size (cells^-1/3; the domain volume is the same on every level)."""
+        return self.cells ** (-1.0 / 3.0)
+
+
+@dataclass
+class GCIResult:
+    """Richardson extrapolation of one quantity from the finest levels (Celik et al. 2008)."""
+    behaviour: str                 # monotonic | oscillatory | divergent | converged | two-level
+    order: float                   # observed order of accuracy p
+    extrapolated: float
+    gci_fine: float                # fine-grid convergence index, as a fraction
+    approx_error: float            # relative change between the two finest levels
+
+
+def refinement_levels(base: MeshingConfig, ratio: float = 2 ** 0.5, n_levels: int = 3) -> List[MeshingConfig]:
+    """
+    Systematically coarsened copies of ``base``, finest first: level k scales the
+    surface and hexcore sizes by ``ratio**k``. Boundary-layer settings stay as
+    they are since they follow the target y+, not the grid; the study uses the
+    actual cell counts, so the effective refinement ratio accounts for that.
+    """
+    if ratio <= 1.0:
+        raise ValueError("ratio must be > 1")
+    if n_levels < 2:
+        raise ValueError("a refinement study needs at least two levels")
+    return [replace(base, surf_min=base.surf_min * ratio ** k, surf_max=base.surf_max * ratio ** k,
+                    hex_max_cell_length=base.hex_max_cell_length * ratio ** k)
+            for k in range(n_levels)]
+
+def _observed_order(e21: float, e32: float, r21: float, r32: float) -> float:
+    # Fixed-point iteration for p with unequal refinement ratios
+    s = 1.0 if e32 / e21 > 0 else -1.0
+    p = abs(math.log(abs(e32 / e21))) / math.log(r21)
+    for _ in range(100):
+        try:
+            q = math.log((r21 ** p - s) / (r32 ** p - s))
+        except (ValueError, ZeroDivisionError, OverflowError):
+            return nan
+        p_new = abs(math.log(abs(e32 / e21)) + q) / math.log(r21)
+        if abs(p_new - p) < 1e-10:
+            return p_new
+        p = p_new
+    return p
+
+def richardson(phi: Sequence[float], h: Sequence[float], formal_order: float = 2.0) -> GCIResult:
+    """
+    Extrapolate ``phi`` solved on cell sizes ``h`` (finest first) to zero cell
+    size. With three or more levels the observed order comes from the finest
+    three and the safety factor is 1.25; with two levels the formal order is
+    assumed and the safety factor is 3.
+    """
+    if len(phi) < 2 or len(phi) != len(h):
+        raise ValueError("richardson needs at least two (phi, h) pairs")
+    phi1, phi2 = phi[0], phi[1]
+    r21 = h[1] / h[0]
+    e21 = phi2 - phi1
+    ea = abs(e21 / phi1) if phi1 else inf
+    if e21 == 0:
+        return GCIResult("converged", nan, phi1, 0.0, 0.0)
+    if len(phi) == 2:
+        p, fs, behaviour = formal_order, 3.0, "two-level"
+    else:
+        e32 = phi[2] - phi2
+        ratio = e21 / e32 if e32 else inf
+        if not -1.0 < ratio < 1.0:
+            return GCIResult("divergent", nan, nan, nan, ea)
+        p, fs = _observed_order(e21, e32, r21, h[2] / h[1]), 1.25
+        behaviour = "monotonic" if ratio > 0 else "oscillatory"
+        if not isfinite(p) or p <= 0:
+            return GCIResult(behaviour, p, nan, nan, ea)
+    rp = r21 ** p
+    return GCIResult(behaviour, p, (rp * phi1 - phi2) / (rp - 1.0), fs * ea / (rp - 1.0), ea)
+
+def _finite(row: Dict[str, float]) -> bool:
+    return all(isfinite(row[q]) for q in QUANTITIES)
+
+def grid_convergence(levels: List[Level], formal_order: float = 2.0) -> Dict[float, Dict[str, GCIResult]]:
+    """GCI per angle and quantity over the solved levels; angles that failed on any level are skipped."""
+    solved = [lv for lv in levels if lv.status == "solved"]
+    if len(solved) < 2:
+        return {}
+    out = {}
+    for aoa in sorted(set.intersection(*(set(lv.rows) for lv in solved))):
+        if not all(_finite(lv.rows[aoa]) for lv in solved):
+            print(f"[warn] AoA {aoa:g} did not converge on every level; left out of the GCI")
+            continue
+        out[aoa] = {q: richardson([lv.rows[aoa][q] for lv in solved], [lv.h for lv in solved], formal_order)
+                    for q in QUANTITIES}
+    return out
+
+def level_errors(levels: List[Level], gci: Dict[float, Dict[str, GCIResult]]) -> Dict[str, object]:
+    """
+    Estimated discretization error of every solved level per quantity: the
+    largest deviation from the extrapolated value over the angles, relative to
+    the largest extrapolated magnitude (so angles with CL near zero do not
+    dominate). Without a usable extrapolation the finest level is the reference.
+    """
+    solved = [lv for lv in levels if lv.status == "solved"]
+    reference = "extrapolated"
+    ref = {a: {q: r.extrapolated for q, r in per_q.items()} for a, per_q in gci.items()}
+    if not ref or not all(isfinite(v) for per_q in ref.values() for v in per_q.values()):
+        reference = "finest"
+        ref = {a: {q: solved[0].rows[a][q] for q in QUANTITIES} for a in gci}
+    errors = {}
+    for lv in solved:
+        errors[lv.index] = {}
+        for q in QUANTITIES:
+            scale = max((abs(v[q]) for v in ref.values()), default=0.0)
+            dev = max((abs(lv.rows[a][q] - v[q]) for a, v in ref.items()), default=nan)
+            errors[lv.index][q] = dev / scale if scale else nan
+    return {"reference": reference, "errors": errors}
+
+def recommend(levels: List[Level], errors: Dict[int, Dict[str, float]], target_error: float) -> Optional[Level]:
+    """Cheapest solved level whose CL and CD errors are all within ``target_error``."""
+    ok = [lv for lv in levels if lv.index in errors and all(e <= target_error for e in errors[lv.index].values())]
+    return min(ok, key=lambda lv: lv.cells) if ok else None
+
+def level_manifest(lv: Level, scfg: SolverConfig) -> Dict[str, object]:
+    manifest = {"cad": lv.mcfg.cad_file, "mesh": lv.mesh_path, "solver": asdict(scfg)}
+    if lv.mesh_fallback:
+        manifest["mesh_fallback"] = lv.mesh_fallback
+    return manifest
+
+def mesh_levels(levels: List[Level], processors: int, workers: Optional[int] = None,
+                cache: Optional[MeshCache] = None,
+                mesh_fn: Callable[[MeshingConfig], Tuple[str, MeshingConfig]] = build_mesh_file):
+    """
+    Mesh the levels concurrently, ``workers`` sessions at a time (default: one
+    per level) sharing the ``processors`` budget. The finest levels take longest
+    and are started first. A level a meshing fallback changed keeps the settings
+    it was actually built with in ``mcfg`` and the substitution in ``mesh_fallback``.
+    """
+    n = max(1, min(workers or len(levels), len(levels), processors))
+    shares = split_processors(processors, n)
+    todo = sorted(levels, key=lambda lv: lv.index)
+    lock = threading.Lock()
+
+    def mesher(cores: int):
+        while True:
+            with lock:
+                if not todo:
+                    return
+                lv = todo.pop(0)
+            os.makedirs(lv.out_dir, exist_ok=True)
+            cfg = lv.mcfg = replace(lv.mcfg, processors=cores,
+                                    mesh_file=os.path.join(lv.out_dir, Path(lv.mcfg.mesh_file).name))
+            t0 = time.perf_counter()
+            try:
+                with telemetry.span("refinement.mesh", level=lv.index):
+                    key = mesh_key(cfg) if cache is not None else None
+                    lv.mesh_path = cache.get(key) if cache is not None else None
+                    lv.mesh_source = "cache" if lv.mesh_path else "meshed"
+                    if lv.mesh_path is None:
+                        lv.mesh_path, lv.mcfg = mesh_fn(cfg)
+                        lv.mesh_fallback = fallback_changes(cfg, lv.mcfg)
+                        if lv.mesh_fallback:
+                            print(f"[warn] Level {lv.index} was meshed with fallback settings {lv.mesh_fallback}; "
+                                  "its refinement ratio is no longer the requested one")
+                            key = mesh_key(lv.mcfg) if cache is not None else None
+                        if cache is not None:
+                            cache.put(key, lv.mesh_path, meta={"cad": cfg.cad_file, **mesh_params(lv.mcfg)})
+                lv.status = "meshed"
+                log.info("Meshed level %d (%s, %.1f s, %d cores)", lv.index, lv.mesh_source,
+                          time.perf_counter() - t0, cores)
+            except Exception as e:
+                lv.status, lv.error = "failed", f"meshing: {e}"
+                log.error("Meshing level %d failed: %s", lv.index, e)
+            finally:
+                lv.mesh_s = time.perf_counter() - t0
+
+    threads = [threading.Thread(target=mesher, args=(c,), name=f"refine-mesher-{i}") for i, c in enumerate(shares)]
+    log.info("Meshing %d levels with %d session(s), cores %s", len(levels), n, shares)
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+def run_refinement_study(base: MeshingConfig, scfg: SolverConfig, out_dir: Path, ratio: float = 2 ** 0.5,
+                         n_levels: int = 3, target_error: float = 0.01, mesh_workers: Optional[int] = None,
+                         cache: Optional[MeshCache] = None, formal_order: float = 2.0,
+                         mesh_fn: Callable[[MeshingConfig], Tuple[str, MeshingConfig]] = build_mesh_file,
+                         solve_fn: Callable[[str, SolverConfig, str, SweepJournal], str] = solve_mesh_file
+                         ) -> Dict[str, object]:
+    """
+    Mesh ``n_levels`` coarsenings of ``base`` concurrently, solve ``scfg.aoa_deg``
+    on each (one level at a time with the whole core budget), then extrapolate
+    CL/CD per angle and recommend the cheapest level within ``target_error`` of
+    the extrapolated values. Level ``k`` lives in ``out_dir/level_<k>/``; the
+    results are written to ``refinement_results.csv``, ``gci.csv`` and
+    ``refinement_summary.json``, and the summary is returned.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    levels = [Level(k, m, str((out_dir / f"level_{k}").resolve()))
+              for k, m in enumerate(refinement_levels(base, ratio, n_levels))]
+
+    t0 = time.perf_counter()
+    mesh_levels(levels, scfg.processors, mesh_workers, cache, mesh_fn)
+    for lv in sorted(levels, key=lambda lv: -lv.index):  # coarsest first: early numbers to look at
+        if lv.status != "meshed":
+            continue
+        counted = mesh_file_cell_count(lv.mesh_path)
+        lv.cells, lv.cells_source = (counted, "mesh") if counted else \
+            (raw_cell_count(lv.mcfg, scfg.ref_length, scfg.ref_area), "estimate")
+        t1 = time.perf_counter()
+        try:
+            with telemetry.span("refinement.solve", level=lv.index):
+                write_manifest(Path(lv.out_dir), level_manifest(lv, scfg))
+                lv.csv = solve_fn(lv.mesh_path, scfg, os.path.join(lv.out_dir, "wing_aoa_results.csv"),
+                                  SweepJournal(Path(lv.out_dir)))
+            lv.rows = read_results_csv(lv.csv, QUANTITIES)
+            lv.status = "solved"
+            log.info("Solved level %d (~%.0f cells, %.1f s)", lv.index, lv.cells, time.perf_counter() - t1)
+        except Exception as e:
+            lv.status, lv.error = "failed", f"solving: {e}"
+            log.error("Solving level %d failed: %s", lv.index, e)
+        finally:
+            lv.solve_s = time.perf_counter() - t1
+
+    gci = grid_convergence(levels, formal_order)
+    errs = level_errors(levels, gci) if gci else {"reference": None, "errors": {}}
+    best = recommend(levels, errs["errors"], target_error)
+    if not gci:
+        print("[warn] Fewer than two levels produced usable results; no GCI or recommendation")
+    elif errs["reference"] == "finest":
+        print("[warn] The levels are not in the asymptotic range (no usable extrapolation); "
+              "errors are relative to the finest level")
+    return write_study(levels, gci, errs, best, target_error, out_dir, time.perf_counter() - t0)
+
+def write_study(levels: List[Level], gci: Dict[float, Dict[str, GCIResult]], errs: Dict[str, object],
+                best: Optional[Level], target_error: float, out_dir: Path, wall_s: float) -> Dict[str, object]:
+    with open(out_dir / "refinement_results.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        for lv in levels:
+            for aoa, row in sorted(lv.rows.items()):
+                writer.writerow({"level": lv.index, "cells": round(lv.cells or 0), "surf_min": lv.mcfg.surf_min,
+                                 "surf_max": lv.mcfg.surf_max, "hex_max_cell_length": lv.mcfg.hex_max_cell_length,
+                                 "AoA_deg": aoa, **row})
+    with open(out_dir / "gci.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=GCI_FIELDS)
+        writer.writeheader()
+        for aoa, per_q in gci.items():
+            for q, r in per_q.items():
+                writer.writerow({"AoA_deg": aoa, "quantity": q, **asdict(r)})
+
+    per_level = []
+    for lv in levels:
+        err = errs["errors"].get(lv.index, {})
+        per_level.append({"level": lv.index, "status": lv.status, "cells": lv.cells, "cells_source": lv.cells_source,
+                          "mesh": mesh_params(lv.mcfg), "mesh_source": lv.mesh_source,
+                          "mesh_s": round(lv.mesh_s, 3), "solve_s": round(lv.solve_s, 3),
+                          **{f"error_{q}": err.get(q) for q in QUANTITIES},
+                          "within_target": bool(err) and all(e <= target_error for e in err.values()),
+                          "error": lv.error, "out_dir": lv.out_dir})
+    summary = {
+        "target_error": target_error,
+        "reference": errs["reference"],
+        "recommended_level": best.index if best else None,
+        "recommended_mesh": mesh_params(best.mcfg) if best else None,
+        "wall_s": round(wall_s, 3),
+        "levels": per_level,
+        "results_csv": str(out_dir / "refinement_results.csv"),
+        "gci_csv": str(out_dir / "gci.csv"),
+    }
+    (out_dir / "refinement_summary.json").write_text(json.dumps(summary, indent=2, default=str))
+    return summary
+
+def main():
+    from .run import add_case_arguments, make_configs
+
+    p = argparse.ArgumentParser(description="Mesh-refinement study: mesh several levels concurrently, "
+                                            "solve an AoA subset on each and compute Richardson/GCI.")
+    p.add_argument("--cad", type=str, required=True, help="Path to CAD (.pmdb/.fmd/.step/.iges)")
+    add_case_arguments(p)
+    p.add_argument("--ratio", type=float, default=2 ** 0.5, help="Refinement ratio between consecutive levels")
+    p.add_argument("--levels", type=int, default=3, help="Number of levels; the case flags give the finest")
+    p.add_argument("--study-aoa", type=str, default=None,
+                   help='AoA subset solved on every level (default: --aoa), e.g. "0,4,8"')
+    p.add_argument("--target-error", type=float, default=0.01,
+                   help="Acceptable CL/CD discretization error (fraction) for the recommended level")
+    p.add_argument("--mesh-workers", type=int, default=None,
+                   help="Concurrent meshing sessions (default: one per level); they share --processors")
+    p.add_argument("--sessions", type=int, default=1, help="Solver sessions per level (parallel AoA sweep)")
+    p.add_argument("--outdir", type=str, default="runs", help="Directory to store outputs")
+    p.add_argument("--mesh-cache", type=str, default=None, help="Mesh cache directory")
+    p.add_argument("--no-mesh-cache", action="store_true", help="Bypass the mesh cache and always remesh")
+    p.add_argument("--telemetry", action="store_true", help="Write telemetry.json and trace.json to the study directory")
+    p.add_argument("--dry-run", action="store_true", help="List the levels and their estimated sizes only")
+    args = p.parse_args()
+
+    from .run import parse_aoa_list
+    cad_path = Path(args.cad).resolve()
+    if not cad_path.exists():
+        raise SystemExit(f"CAD file not found: {cad_path}")
+    args.cad = str(cad_path)
+    mcfg, scfg = make_configs(args)
+    if args.study_aoa:
+        scfg.aoa_deg = parse_aoa_list(args.study_aoa)
+
+    if args.dry_run:
+        n = max(1, min(args.mesh_workers or args.levels, args.levels, scfg.processors))
+        print(f"[dry-run] Levels: {args.levels}  ratio: {args.ratio:.3f}  meshing sessions: {n} "
+              f"cores {split_processors(scfg.processors, n)}")
+        for k, m in enumerate(refinement_levels(mcfg, args.ratio, args.levels)):
+            print(f"[dry-run]   level {k}: surface {m.surf_min:.4g}-{m.surf_max:.4g}  hex {m.hex_max_cell_length:.4g}  "
+                  f"~{raw_cell_count(m, scfg.ref_length, scfg.ref_area):,.0f} cells")
+        print("[dry-run] AoA subset:", scfg.aoa_deg)
+        print("[dry-run] Target error:", args.target_error)
+        return
+
+    out_dir = Path(args.outdir) / datetime.now().strftime("refinement_%Y%m%d_%H%M%S")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    write_manifest(out_dir, vars(args))
+    cache = None if args.no_mesh_cache else MeshCache(args.mesh_cache)
+    if args.telemetry:
+        telemetry.enable()
+    try:
+        summary = run_refinement_study(mcfg, scfg, out_dir, args.ratio, args.levels, args.target_error,
+                                       args.mesh_workers, cache)
+    finally:
+        if args.telemetry:
+            telemetry.disable().write(out_dir)
+    if summary["recommended_level"] is None:
+        log.info("No level is within %.2g%%; see %s", 100 * args.target_error, out_dir / "refinement_summary.json")
+    else:
+        log.info("Recommended level %d: %s", summary["recommended_level"], summary["recommended_mesh"])
+
+if __name__ == "__main__":
+    main()
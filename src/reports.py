@@ -0,0 +1,125 @@
+from __future__ import annotations
+import re
+from dataclasses import dataclass
+from math import cos, radians, sin
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .telemetry import span
+
+PREFIX = "wa"
+MONITOR = f"{PREFIX}-forces"  # report plot holding every definition, for per-iteration history
+COEFFS = ("CL", "CD", "Cm")
+_AXES = (("fx", (1.0, 0.0, 0.0)), ("fy", (0.0, 1.0, 0.0)), ("fz", (0.0, 0.0, 1.0)))
+PITCH_AXIS = [0.0, 1.0, 0.0]  # positive nose-up with x downstream, z up
+
+def zone_columns(zones: Sequence[str]) -> List[str]:
+    return [f"{c}_{z}" for z in zones for c in COEFFS]
+
+def wind_axes(aoa_deg: float, sideslip_deg: float = 0.0) -> Tuple[Tuple[float, ...], Tuple[float, ...]]:
+    """Unit drag (along the free stream) and lift (normal to it, in the x-z plane) directions."""
+    a, b = radians(aoa_deg), radians(sideslip_deg)
+    return (cos(a) * cos(b), sin(b), sin(a) * cos(b)), (-sin(a), 0.0, cos(a))
+
+def _report_name(zone: str, quantity: str) -> str:
+    return f"{PREFIX}-{re.sub(r'[^A-Za-z0-9_-]', '_', zone)}-{quantity}"
+
+def _values(raw) -> Dict[str, float]:
+    # compute() returns [{name: [value, ...]}, ...] or {name: [value, ...]} depending on the version
+    merged: Dict[str, object] = {}
+    for part in (raw if isinstance(raw, list) else [raw]):
+        merged.update(part)
+    return {k: float(v[0] if isinstance(v, (list, tuple)) else v) for k, v in merged.items()}
+
+
+@dataclass
+class ForceReports:
+    """
+    Force (x/y/z) and pitching-moment report definitions per wall zone, created
+    once per session. ``fetch`` evaluates all of them in one ``compute`` call;
+    lift/drag are resolved along the current flow direction in Python, so
+    nothing has to be redefined when the angle changes.
+    """
+    zones: List[str]
+    moment_center: Sequence[float]
+
+    @property
+    def names(self) -> List[str]:
+        return [_report_name(z, q) for z in self.zones for q in ("fx", "fy", "fz", "my")]
+
+    @classmethod
+    def create(cls, solver, walls: Sequence[str], moment_center: Sequence[float]) -> "ForceReports":
+        existing = solver.setup.boundary_conditions.wall.get_object_names()
+        valid = [z for z in walls if z in existing]
+        if not valid:
+            raise RuntimeError("No valid wing wall zones found in the case.")
+        if len(valid) < len(walls):
+            print(f"[warn] Wall zone(s) not in the case, skipped: {sorted(set(walls) - set(valid))}")
+
+        rd = solver.solution.report_definitions
+        for z in valid:
+            for q, vec in _AXES:
+                rd.force[_report_name(z, q)] = {}
+                f = rd.force[_report_name(z, q)]
+                f.zones = [z]
+                f.force_vector = list(vec)
+                f.report_output_type = "Force"
+            rd.moment[_report_name(z, "my")] = {}
+            m = rd.moment[_report_name(z, "my")]
+            m.zones = [z]
+            m.mom_center = list(moment_center)
+            m.mom_axis = PITCH_AXIS
+            m.report_output_type = "Moment"
+        reports = cls(valid, list(moment_center))
+        plots = solver.solution.monitor.report_plots
+        plots[MONITOR] = {}
+        plots[MONITOR].report_defs = reports.names
+        return reports
+
+    def fetch(self, solver) -> Dict[str, Tuple[float, float, float, float]]:
+        """(Fx, Fy, Fz, My) per zone from a single batched report evaluation."""
+        names = self.names
+        with span("solver.reports", n=len(names)):
+            values = _values(solver.solution.report_definitions.compute(report_defs=names))
+        return {z: tuple(values[_report_name(z, q)] for q in ("fx", "fy", "fz", "my")) for z in self.zones}
+
+    def coefficients(self, solver, aoa_deg: float, sideslip_deg: float, q_inf: float,
+                     ref_area: float, ref_length: float) -> Dict[str, float]:
+        """Totals (forces in N, wind-axis lift/drag, CL/CD/Cm) plus CL/CD/Cm per zone."""
+        return self._resolve(self.fetch(solver), aoa_deg, sideslip_deg, q_inf, ref_area, ref_length)
+
+    def history(self, solver, aoa_deg: float, sideslip_deg: float, q_inf: float, ref_area: float,
+                ref_length: float, last: Optional[int] = None) -> Tuple[List[int], Dict[str, List[float]]]:
+        """
+        Per-iteration coefficients recorded by the report plot monitor (one RPC),
+        for the ``last`` iterations only when given: the monitor holds the whole
+        sweep and only this angle's tail is resolved.
+        """
+        with span("solver.monitor_history"):
+            iterations, data = solver.monitors.get_monitor_set_data(monitor_set_name=MONITOR)
+        start = 0 if last is None else max(0, len(iterations) - last)
+        cols: Dict[str, List[float]] = {}
+        for i in range(start, len(iterations)):
+            per_zone = {z: tuple(float(data[_report_name(z, q)][i]) for q in ("fx", "fy", "fz", "my"))
+                        for z in self.zones}
+            for k, v in self._resolve(per_zone, aoa_deg, sideslip_deg, q_inf, ref_area, ref_length).items():
+                if not k.endswith("_N"):
+                    cols.setdefault(k, []).append(v)
+        return [int(i) for i in iterations[start:]], cols
+
+    @staticmethod
+    def _resolve(per_zone: Dict[str, Tuple[float, float, float, float]], aoa_deg: float,
+                 sideslip_deg: float, q_inf: float, ref_area: float, ref_length: float) -> Dict[str, float]:
+        drag_dir, lift_dir = wind_axes(aoa_deg, sideslip_deg)
+        qs = q_inf * ref_area
+
+        def resolve(F, My):
+            lift = sum(f * u for f, u in zip(F, lift_dir))
+            drag = sum(f * u for f, u in zip(F, drag_dir))
+            return lift, drag, lift / qs, drag / qs, My / (qs * ref_length)
+
+        F = [sum(v[i] for v in per_zone.values()) for i in range(3)]
+        lift, drag, cl, cd, cm = resolve(F, sum(v[3] for v in per_zone.values()))
+        out = dict(Fx_N=F[0], Fy_N=F[1], Fz_N=F[2], Lift_N=lift, Drag_N=drag, CL=cl, CD=cd, Cm=cm)
+        for z, (fx, fy, fz, my) in per_zone.items():
+            _, _, out[f"CL_{z}"], out[f"CD_{z}"], out[f"Cm_{z}"] = resolve((fx, fy, fz), my)
+        return out
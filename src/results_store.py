@@ -0,0 +1,291 @@
+from __future__ import annotations
+import argparse
+import bisect
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from math import isfinite
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .config import MeshingConfig, SolverConfig
+from .journal import SweepJournal
+from .logging_utils import get_logger
+from .mesh_cache import file_sha256, mesh_params
+from .solver import PHYSICS_SETUP
+
+log = get_logger()
+
+DEFAULT_DB = os.environ.get("WING_AERO_RESULTS", str(Path.home() / ".cache" / "wing_aero" / "results.sqlite"))
+
+# SolverConfig fields that change the converged coefficients. The iteration cap is
+# not among them: a stored point is reused when it had at least as many iterations.
+SETUP_FIELDS = (
+    "farfield_name", "wing_wall_zones", "ref_area", "ref_length", "moment_center",
+    "converge", "conv_chunk", "conv_window", "cl_tol", "cd_tol", "res_tol", "precision",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    cad_hash     TEXT NOT NULL,
+    mesh_hash    TEXT NOT NULL,
+    setup_hash   TEXT NOT NULL,
+    mach         REAL NOT NULL,
+    t_inf        REAL NOT NULL,
+    p_op         REAL NOT NULL,
+    sideslip_deg REAL NOT NULL,
+    aoa_deg      REAL NOT NULL,
+    n_iters      INTEGER NOT NULL,
+    cl           REAL,
+    cd           REAL,
+    row_json     TEXT NOT NULL,
+    created      REAL NOT NULL,
+    PRIMARY KEY (cad_hash, mesh_hash, setup_hash, mach, t_inf, p_op, sideslip_deg, aoa_deg)
+);
+CREATE INDEX IF NOT EXISTS idx_results_polar
+    ON results (cad_hash, mesh_hash, setup_hash, sideslip_deg, mach, aoa_deg);
+"""
+
+def _r(x: float) -> float:
+    # Keys are compared exactly; round away float noise from parsing/ranges
+    return round(float(x), 6)
+
+def mesh_hash(cfg: MeshingConfig) -> str:
+    return hashlib.sha256(json.dumps(mesh_params(cfg), sort_keys=True, default=repr).encode()).hexdigest()
+
+def setup_hash(cfg: SolverConfig) -> str:
+    """Hash of the solver setup (SETUP_FIELDS plus the fixed physics models) behind a stored point."""
+    d = asdict(cfg)
+    payload = {"physics": PHYSICS_SETUP, **{k: d[k] for k in SETUP_FIELDS}}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=repr).encode()).hexdigest()
+
+def storable(row: Dict[str, object]) -> bool:
+    """Finite coefficients and not known to be unconverged (rows without a convergence check count)."""
+    try:
+        finite = isfinite(float(row["CL"])) and isfinite(float(row["CD"]))
+    except (KeyError, TypeError, ValueError):
+        return False
+    return finite and row.get("Converged") not in (False, "False")
+
+
+@dataclass(frozen=True)
+class FlowKey:
+    """Everything that identifies a polar except the angle of attack."""
+    cad_hash: str
+    mesh_hash: str
+    mach: float
+    t_inf: float
+    p_op: float
+    sideslip_deg: float = 0.0
+    setup_hash: str = ""
+
+    @classmethod
+    def from_configs(cls, mcfg: MeshingConfig, scfg: SolverConfig, cad_hash: Optional[str] = None,
+                     sideslip_deg: float = 0.0) -> "FlowKey":
+        return cls(cad_hash or file_sha256(mcfg.cad_file), mesh_hash(mcfg),
+                   _r(scfg.mach), _r(scfg.t_inf), _r(scfg.p_op), _r(sideslip_deg), setup_hash(scfg))
+
+
+class ResultsStore:
+    """
+    SQLite table of solved points keyed by CAD hash, meshing parameters, solver
+    setup and flow conditions. Only converged, finite points are stored, with the
+    iteration cap they were run with. Rows keep the full CSV row as JSON; CL/CD
+    are also columns so ``interpolate`` can work from the polar index alone.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or DEFAULT_DB
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        columns = [r[1] for r in self._db.execute("PRAGMA table_info(results)")]
+        if columns and "setup_hash" not in columns:
+            # Points stored before the setup was part of the key cannot be trusted; keep them aside
+            with self._db:
+                self._db.execute("ALTER TABLE results RENAME TO results_unkeyed")
+                self._db.execute("DROP INDEX IF EXISTS idx_results_polar")
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def put(self, key: FlowKey, row: Dict[str, object], n_iters: int):
+        return self.put_many(key, [row], n_iters)
+
+    def put_many(self, key: FlowKey, rows: Iterable[Dict[str, object]], n_iters: int):
+        """Store the ``storable`` rows of a sweep run with an iteration cap of ``n_iters``; returns how many."""
+        now = time.time()
+        values = [(key.cad_hash, key.mesh_hash, key.setup_hash, key.mach, key.t_inf, key.p_op, key.sideslip_deg,
+                   _r(row["AoA_deg"]), int(n_iters), row.get("CL"), row.get("CD"), json.dumps(row, default=str), now)
+                  for row in rows if storable(row)]
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO results VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)", values)
+        return len(values)
+
+    def solved(self, key: FlowKey, min_iters: int = 0) -> Dict[float, Dict[str, object]]:
+        """Stored points of this polar that were run with at least ``min_iters`` iterations."""
+        with self._lock:
+            cur = self._db.execute(
+                "SELECT aoa_deg, row_json FROM results WHERE cad_hash=? AND mesh_hash=? AND setup_hash=? "
+                "AND sideslip_deg=? AND mach=? AND t_inf=? AND p_op=? AND n_iters>=?",
+                (key.cad_hash, key.mesh_hash, key.setup_hash, key.sideslip_deg, key.mach, key.t_inf, key.p_op,
+                 int(min_iters)))
+            return {aoa: json.loads(js) for aoa, js in cur.fetchall()}
+
+    def seed_journal(self, key: FlowKey, scfg: SolverConfig, journal: SweepJournal) -> bool:
+        """
+        Copy already-solved points of this polar into the journal so the sweep skips
+        them. Points run with fewer iterations than ``scfg.n_iters`` are solved again.
+        Returns True when nothing is left to solve.
+        """
+        hits = self.solved(key, scfg.n_iters)
+        if scfg.adaptive:
+            lo, hi = min(scfg.aoa_deg), max(scfg.aoa_deg)
+            wanted = [a for a in hits if lo <= a <= hi]
+        else:
+            wanted = [a for a in scfg.aoa_deg if round(a, 6) in hits]
+        for a in wanted:
+            if not journal.is_done(a):
+                journal.record({**hits[round(a, 6)], "AoA_deg": a, "Init": "store"}, None)
+        if wanted:
+            log.info("Results store: %d of the requested angle(s) already solved", len(wanted))
+        return not scfg.adaptive and all(journal.is_done(a) for a in scfg.aoa_deg)
+
+    def record_journal(self, key: FlowKey, journal: SweepJournal, n_iters: int) -> int:
+        """Store the angles a sweep solved (not those it took from the store); returns how many."""
+        return self.put_many(key, [rec["row"] for rec in journal.completed().values()
+                                   if rec["row"].get("Init") != "store"], n_iters)
+
+    def _polar(self, cad_hash: str, mesh: str, setup: str, sideslip: float, mach: float,
+               t_inf: float, p_op: float) -> List[Tuple[float, float, float]]:
+        rows = self._db.execute(
+            "SELECT aoa_deg, cl, cd FROM results WHERE cad_hash=? AND mesh_hash=? AND setup_hash=? "
+            "AND sideslip_deg=? AND mach=? AND t_inf=? AND p_op=? AND cl IS NOT NULL ORDER BY aoa_deg",
+            (cad_hash, mesh, setup, sideslip, mach, t_inf, p_op)).fetchall()
+        return [r for r in rows if r[1] == r[1] and r[2] == r[2]]  # drop NaN (diverged) points
+
+    def _mach_bracket(self, cad_hash: str, mesh: str, setup: str, sideslip: float, mach: float,
+                      t_inf: float, p_op: float) -> List[float]:
+        q = ("SELECT {} (mach) FROM results WHERE cad_hash=? AND mesh_hash=? AND setup_hash=? "
+             "AND sideslip_deg=? AND t_inf=? AND p_op=? AND mach {} ?")
+        args = (cad_hash, mesh, setup, sideslip, t_inf, p_op, mach)
+        lo = self._db.execute(q.format("MAX", "<="), args).fetchone()[0]
+        hi = self._db.execute(q.format("MIN", ">="), args).fetchone()[0]
+        return sorted({m for m in (lo, hi) if m is not None})
+
+    def _gas_state(self, cad_hash: str, mesh: str, setup: str, sideslip: float,
+                   t_inf: Optional[float], p_op: Optional[float]) -> Tuple[float, float]:
+        # The single stored (t_inf, p_op) matching the given ones; polars of different
+        # free-stream states are never mixed, so more than one is an ambiguous query
+        sql = ("SELECT DISTINCT t_inf, p_op FROM results WHERE cad_hash=? AND mesh_hash=? AND setup_hash=? "
+               "AND sideslip_deg=?")
+        args: list = [cad_hash, mesh, setup, sideslip]
+        for col, value in (("t_inf", t_inf), ("p_op", p_op)):
+            if value is not None:
+                sql += f" AND {col}=?"
+                args.append(_r(value))
+        states = self._db.execute(sql + " ORDER BY t_inf, p_op", args).fetchall()
+        if not states:
+            raise LookupError(f"No stored results at T={t_inf}, p={p_op} for sideslip {sideslip}")
+        if len(states) > 1:
+            listed = ", ".join(f"T={t:g} p={p:g}" for t, p in states)
+            raise LookupError(f"Results are stored at several gas states ({listed}); give t_inf and p_op")
+        return states[0]
+
+    def _default_polar(self, cad_hash: str, mesh: Optional[str], setup: Optional[str]) -> Optional[Tuple[str, str]]:
+        # The (mesh, setup) pair with the most stored points, within the given ones
+        sql = "SELECT mesh_hash, setup_hash, COUNT(*) AS n FROM results WHERE cad_hash=?"
+        args: list = [cad_hash]
+        for col, value in (("mesh_hash", mesh), ("setup_hash", setup)):
+            if value is not None:
+                sql += f" AND {col}=?"
+                args.append(value)
+        row = self._db.execute(sql + " GROUP BY mesh_hash, setup_hash ORDER BY n DESC LIMIT 1", args).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def interpolate(self, cad_hash: str, mach: float, aoa_deg: float, mesh: Optional[str] = None,
+                    t_inf: Optional[float] = None, p_op: Optional[float] = None,
+                    sideslip_deg: float = 0.0, setup: Optional[str] = None) -> Dict[str, object]:
+        """
+        CL/CD at an unsolved condition: linear in AoA along the stored polars at
+        the bracketing Mach numbers, then linear in Mach. ``mesh``/``setup``
+        default to the mesh and solver setup with the most stored points for this
+        CAD; polars of different setups are never mixed. Raises LookupError when
+        the point is not bracketed by stored data (no extrapolation).
+        """
+        mach, aoa, beta = _r(mach), _r(aoa_deg), _r(sideslip_deg)
+        with self._lock:
+            found = self._default_polar(cad_hash, mesh, setup)
+            if found is None:
+                raise LookupError(f"No stored results for CAD {cad_hash[:12]}")
+            mesh, setup = found
+            t_inf, p_op = self._gas_state(cad_hash, mesh, setup, beta, t_inf, p_op)
+            machs = self._mach_bracket(cad_hash, mesh, setup, beta, mach, t_inf, p_op)
+            if not machs or (len(machs) == 1 and machs[0] != mach):
+                raise LookupError(f"Mach {mach} is outside the stored range")
+            values = []
+            for m in machs:
+                polar = self._polar(cad_hash, mesh, setup, beta, m, t_inf, p_op)
+                aoas = [p[0] for p in polar]
+                i = bisect.bisect_left(aoas, aoa)
+                if i < len(aoas) and aoas[i] == aoa:
+                    values.append((m, polar[i][1], polar[i][2], True))
+                    continue
+                if i == 0 or i == len(aoas):
+                    raise LookupError(f"AoA {aoa} is outside the stored polar at Mach {m}")
+                (a0, cl0, cd0), (a1, cl1, cd1) = polar[i - 1], polar[i]
+                w = (aoa - a0) / (a1 - a0)
+                values.append((m, cl0 + w * (cl1 - cl0), cd0 + w * (cd1 - cd0), False))
+
+        if len(values) == 1:
+            _, cl, cd, exact = values[0]
+        else:
+            (m0, cl0, cd0, e0), (m1, cl1, cd1, e1) = values
+            w = (mach - m0) / (m1 - m0)
+            cl, cd, exact = cl0 + w * (cl1 - cl0), cd0 + w * (cd1 - cd0), False
+        return {"CL": cl, "CD": cd, "exact": exact, "mesh_hash": mesh, "setup_hash": setup,
+                "t_inf": t_inf, "p_op": p_op, "mach_neighbours": machs}
+
+    def summary(self) -> List[Tuple[str, str, str, int]]:
+        with self._lock:
+            return self._db.execute("SELECT cad_hash, mesh_hash, setup_hash, COUNT(*) FROM results "
+                                    "GROUP BY cad_hash, mesh_hash, setup_hash ORDER BY cad_hash").fetchall()
+
+
+def main():
+    p = argparse.ArgumentParser(description="Query the local results store without launching Fluent.")
+    p.add_argument("--db", default=None, help="Results database (default: $WING_AERO_RESULTS)")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="Stored polars per CAD/mesh/solver setup")
+    q = sub.add_parser("query", help="Interpolated CL/CD at a condition")
+    q.add_argument("--cad", required=True, help="CAD file (hashed to find its results)")
+    q.add_argument("--mach", type=float, required=True)
+    q.add_argument("--aoa", type=float, required=True)
+    q.add_argument("--sideslip", type=float, default=0.0)
+    q.add_argument("--tinf", type=float, default=None, help="Free-stream temperature (needed when several are stored)")
+    q.add_argument("--pop", type=float, default=None, help="Operating pressure (needed when several are stored)")
+    q.add_argument("--mesh-hash", default=None, help="Mesh parameters hash (default: best-covered mesh)")
+    q.add_argument("--setup-hash", default=None, help="Solver setup hash (default: best-covered setup)")
+    args = p.parse_args()
+
+    store = ResultsStore(args.db)
+    if args.cmd == "list":
+        for cad, mesh, setup, n in store.summary():
+            print(f"cad {cad[:12]}  mesh {mesh[:12]}  setup {setup[:12]}  points {n}")
+        return
+    try:
+        res = store.interpolate(file_sha256(args.cad), args.mach, args.aoa, args.mesh_hash,
+                                args.tinf, args.pop, args.sideslip, args.setup_hash)
+    except LookupError as e:
+        raise SystemExit(f"[error] {e}")
+    kind = "stored" if res["exact"] else "interpolated"
+    print(f"CL={res['CL']:.5f}  CD={res['CD']:.6f}  ({kind}, mesh {res['mesh_hash'][:12]}, "
+          f"setup {res['setup_hash'][:12]}, T={res['t_inf']:g} p={res['p_op']:g})")
+
+if __name__ == "__main__":
+    main()
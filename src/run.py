@@ -1,14 +1,30 @@
 from __future__ import annotations
 import argparse
+import time
+from contextlib import closing
+from dataclasses import replace
 from pathlib import Path
+from typing import Callable, Optional, Tuple
 from datetime import datetime
 
 from .config import MeshingConfig, SolverConfig
+from .estimator import Estimator, mesh_file_cell_count, physical_ram_gb
 from .utils import first_layer_height_from_yplus, u_inf_from_mach
+from .journal import SweepJournal, load_manifest, write_manifest
 from .logging_utils import get_logger
+from .mesh_cache import MeshCache, mesh_key, mesh_params
+from .results_store import DEFAULT_DB, FlowKey, ResultsStore, mesh_hash
+from .solver import write_results_csv
+from . import telemetry
 
 log = get_logger()
 
+# Flags that control how a run executes rather than what it computes; on --resume
+# these are taken from the new command line instead of the saved manifest.
+_RUNTIME_FLAGS = ("resume", "dry_run", "pool", "mesh_cache", "no_mesh_cache", "cache_max_gb",
+                  "cache_list", "cache_purge", "sessions", "processors", "results_db", "no_results_db",
+                  "telemetry", "auto_processors", "max_processors")
+
 def parse_aoa_list(s: str):
     """
     Accepts comma list: "0,2,4,6" or a range "start:step:stop" e.g. "-4:2:10".
@@ -26,9 +42,51 @@ def parse_aoa_list(s: str):
         return out
     return [float(x.strip()) for x in s.split(",") if x.strip()]
 
-def main():
-    p = argparse.ArgumentParser(description="Automate CAD→mesh→solve for a generic wing in Fluent.")
-    p.add_argument("--cad", type=str, required=True, help="Path to CAD (.pmdb/.fmd/.step/.iges)")
+def _record_mesh(mcfg: MeshingConfig, effective: MeshingConfig, mesh_path: str,
+                 cache: Optional[MeshCache], key: Optional[str], run_dir: Path):
+    """
+    Cache a freshly built mesh under the settings it was actually built with and,
+    when a meshing fallback changed them, note the substitution in the manifest.
+    """
+    from .meshing import fallback_changes
+
+    changes = fallback_changes(mcfg, effective)
+    if changes:
+        print(f"[warn] Mesh built with fallback settings {changes}; results are recorded against them")
+        manifest = load_manifest(run_dir)
+        manifest["mesh_fallback"] = changes
+        write_manifest(run_dir, manifest)
+    if cache is not None:
+        cache.put(mesh_key(effective) if changes else key, mesh_path,
+                  meta={"cad": effective.cad_file, **mesh_params(effective)})
+
+def _run_with_pool(address: str, mcfg: MeshingConfig, scfg: SolverConfig,
+                   cache: Optional[MeshCache], key: Optional[str], cached_mesh: Optional[str],
+                   csv_path: str, journal: SweepJournal, on_meshed: Callable[[MeshingConfig], None]):
+    """Lease warm sessions from a running ``src.session_pool`` daemon instead of launching Fluent."""
+    from .meshing import build_mesh
+    from .session_pool import PoolClient
+    from .solver import read_mesh, solve_sweep
+
+    if scfg.n_sessions > 1:
+        print("[warn] --sessions is ignored with --pool; the sweep runs in one leased session.")
+    client = PoolClient(address)
+    try:
+        mesh_path = cached_mesh
+        if mesh_path is None:
+            log.info("Lanching meshing workflow on pooled session: %s", mcfg.workflow)
+            with client.lease("meshing") as meshing:
+                _, effective = build_mesh(mcfg, session=meshing)
+            mesh_path = mcfg.mesh_file
+            _record_mesh(mcfg, effective, mesh_path, cache, key, journal.run_dir)
+            on_meshed(effective)
+        with client.lease("solver") as solver:
+            solve_sweep(read_mesh(solver, mesh_path), scfg, csv_path, journal)
+    finally:
+        client.close()
+
+def add_case_arguments(p: argparse.ArgumentParser):
+    """Flags describing the case itself (mesh sizing, flow, sweep); shared with src.batch."""
     p.add_argument("--workflow", type=str, default="fault-tolerant",
                    choices=["fault-tolerant", "watertight"], help="Meshing workflow to use")
     p.add_argument("--farfield", type=str, default="farfield", help="Farfield zone name")
@@ -39,6 +97,8 @@ def main():
     p.add_argument("--hex-max", type=float, default=0.25, help="Hexcore max cell length [m]")
     p.add_argument("--bl-layers", type=int, default=12, help="Number of boundary layers")
     p.add_argument("--bl-growth", type=float, default=1.2, help="Boundary-layer growth rate")
+    p.add_argument("--no-mesh-fallbacks", action="store_true",
+                   help="Fail on the first meshing task error instead of retrying with fewer layers/finer hexcore/tet fill")
     p.add_argument("--yplus", type=float, default=None, help="Target y+ (optional; computes FirstLayerHeight)")
     p.add_argument("--aoa", type=str, default="0,2,4,6,8,10", help='AoA list "0,2,4" or range "start:step:stop"')
     p.add_argument("--mach", type=float, default=0.20, help="Free-stream Mach")
@@ -46,24 +106,47 @@ def main():
     p.add_argument("--pop", type=float, default=101325.0, help="Operating pressure [Pa]")
     p.add_argument("--ref-area", type=float, default=0.10, help="Reference area [m^2]")
     p.add_argument("--ref-length", type=float, default=0.30, help="Reference length [m]")
-    p.add_argument("--iters", type=int, default=250, help="Iterations per AoA")
-    p.add_argument("--outdir", type=str, default="runs", help="Directory to store outputs")
+    p.add_argument("--iters", type=int, default=250, help="Iterations per AoA (hard cap with --converge)")
+    p.add_argument("--converge", action="store_true",
+                   help="Iterate in chunks and stop each AoA once CL/CD have converged")
+    p.add_argument("--chunk", type=int, default=25, help="Iterations between convergence checks")
+    p.add_argument("--conv-window", type=int, default=4, help="Number of CL/CD samples in the convergence window")
+    p.add_argument("--cl-tol", type=float, default=1e-4, help="Allowed CL spread over the window")
+    p.add_argument("--cd-tol", type=float, default=1e-5, help="Allowed CD spread over the window")
+    p.add_argument("--res-tol", type=float, default=None, help="Optional residual threshold for convergence")
+    p.add_argument("--adaptive", action="store_true",
+                   help="Treat --aoa as a coarse set and add angles where the CL/CD polar is nonlinear")
+    p.add_argument("--adaptive-budget", type=int, default=20, help="Maximum solves in adaptive mode")
+    p.add_argument("--adaptive-cl-tol", type=float, default=0.01, help="Adaptive CL interpolation tolerance")
+    p.add_argument("--adaptive-cd-tol", type=float, default=0.001, help="Adaptive CD interpolation tolerance")
+    p.add_argument("--continuation", action="store_true",
+                   help="Warm-start each AoA from the nearest converged angle instead of re-initializing")
+    p.add_argument("--warm-iters", type=int, default=None,
+                   help="Iterations for warm-started angles with --continuation (default: --iters)")
+    p.add_argument("--snapshots", action="store_true",
+                   help="Save each converged angle's field: --resume and neighbour recovery restart from "
+                        "the nearest one (always on with --continuation)")
+    p.add_argument("--no-watchdog", action="store_true",
+                   help="Do not check for NaN/blow-up/limit cycles between iteration chunks")
+    p.add_argument("--recovery", type=str, default="relax,first-order,neighbour",
+                   help="Comma-separated recovery strategies tried in order on a tripped angle")
+    p.add_argument("--processors", type=int, default=4, help="Fluent processor count (total budget for the sweep)")
     p.add_argument("--save-per-aoa", action="store_true", help="Write case/data after each AoA")
-    p.add_argument("--dry-run", action="store_true", help="Do not launch Fluent; just validate and print plan.")
-    args = p.parse_args()
-
-    cad_path = Path(args.cad).resolve()
-    if not cad_path.exists():
-        raise SystemExit(f"CAD file not found: {cad_path}")
-
-    aoa_list = parse_aoa_list(args.aoa)
-    run_dir = Path(args.outdir) / datetime.now().strftime("run_%Y%m%d_%H%M%S")
-    run_dir.mkdir(parents=True, exist_ok=True)
-    (run_dir/"manifest.txt").write_text(str(vars(args)))
+    p.add_argument("--output-mode", choices=["full", "reduced"], default="full",
+                   help="reduced: write the case once, then data-only files per AoA and at the end")
+    p.add_argument("--compression", type=int, default=None, help="HDF5 compression level 0-9 for case/data files")
+    p.add_argument("--output-fields", type=str, default=None,
+                   help="Comma-separated fields for per-AoA files in reduced mode (CFF post export)")
+    p.add_argument("--scratch-dir", type=str, default=None,
+                   help="Local directory Fluent writes to; files are moved to the run directory in the background")
+    p.add_argument("--no-history", action="store_true",
+                   help="Do not record per-iteration residual/coefficient history (history/*.parquet)")
 
+def make_configs(args) -> Tuple[MeshingConfig, SolverConfig]:
+    """Meshing and solver configs from parsed ``add_case_arguments`` flags and ``args.cad``."""
     # Meshing config
     mcfg = MeshingConfig(
-        cad_file=str(cad_path),
+        cad_file=args.cad,
         length_unit=args.unit,
         workflow=args.workflow,
         create_enclosure=True if args.workflow == "fault-tolerant" else False,
@@ -74,8 +157,9 @@ def main():
         bl_growth=args.bl_growth,
         volume_fill="poly-hexcore",
         hex_max_cell_length=args.hex_max,
+        fallbacks=[] if args.no_mesh_fallbacks else None,
+        processors=args.processors,
     )
-
     # Optional first-layer height from y+
     if args.yplus is not None:
         U_inf = u_inf_from_mach(args.mach, args.tinf)
@@ -92,9 +176,114 @@ def main():
         p_op=args.pop,
         ref_area=args.ref_area,
         ref_length=args.ref_length,
-        aoa_deg=aoa_list,
+        aoa_deg=parse_aoa_list(args.aoa),
         n_iters=args.iters,
+        converge=args.converge,
+        conv_chunk=args.chunk,
+        conv_window=args.conv_window,
+        cl_tol=args.cl_tol,
+        cd_tol=args.cd_tol,
+        res_tol=args.res_tol,
+        adaptive=args.adaptive,
+        adaptive_budget=args.adaptive_budget,
+        adaptive_cl_tol=args.adaptive_cl_tol,
+        adaptive_cd_tol=args.adaptive_cd_tol,
+        continuation=args.continuation,
+        n_iters_warm=args.warm_iters,
+        snapshots=args.snapshots,
+        watchdog=not args.no_watchdog,
+        recovery=[r.strip() for r in args.recovery.split(",") if r.strip()],
+        processors=args.processors,
+        save_per_aoa=args.save_per_aoa,
+        history=not args.no_history,
+        output_mode=args.output_mode,
+        compression_level=args.compression,
+        output_fields=[f.strip() for f in args.output_fields.split(",") if f.strip()] if args.output_fields else None,
+        scratch_dir=args.scratch_dir,
+        n_sessions=getattr(args, "sessions", 1),
     )
+    if scfg.continuation and scfg.n_sessions > 1:
+        raise SystemExit("--continuation warm-starts each angle from its neighbour in one session; "
+                         "it cannot be combined with --sessions > 1")
+    if scfg.adaptive and scfg.n_sessions > 1:
+        raise SystemExit("--adaptive picks each new angle from the polar solved so far, in one session; "
+                         "it cannot be combined with --sessions > 1")
+    if scfg.adaptive and scfg.continuation:
+        raise SystemExit("--adaptive cold-starts every angle it adds; it cannot be combined with --continuation")
+    return mcfg, scfg
+
+def main():
+    p = argparse.ArgumentParser(description="Automate CAD→mesh→solve for a generic wing in Fluent.")
+    p.add_argument("--cad", type=str, default=None, help="Path to CAD (.pmdb/.fmd/.step/.iges)")
+    add_case_arguments(p)
+    p.add_argument("--auto-processors", action="store_true",
+                   help="Pick the core count from the estimated mesh size and the learned scaling curve")
+    p.add_argument("--max-processors", type=int, default=None,
+                   help="Upper limit for --auto-processors (default: all cores of this machine)")
+    p.add_argument("--sessions", type=int, default=1,
+                   help="Solver sessions for a parallel AoA sweep; cores are split between them")
+    p.add_argument("--outdir", type=str, default="runs", help="Directory to store outputs")
+    p.add_argument("--mesh-cache", type=str, default=None,
+                   help="Mesh cache directory (default: $WING_AERO_CACHE or ~/.cache/wing_aero/meshes)")
+    p.add_argument("--no-mesh-cache", action="store_true", help="Bypass the mesh cache and always remesh")
+    p.add_argument("--cache-max-gb", type=float, default=20.0, help="Mesh cache size limit before LRU eviction [GB]")
+    p.add_argument("--cache-list", action="store_true", help="List cached meshes and exit")
+    p.add_argument("--cache-purge", action="store_true", help="Delete every cached mesh and exit")
+    p.add_argument("--results-db", type=str, default=None,
+                   help="SQLite results store (default: $WING_AERO_RESULTS or ~/.cache/wing_aero/results.sqlite)")
+    p.add_argument("--no-results-db", action="store_true",
+                   help="Neither reuse nor record results in the results store")
+    p.add_argument("--pool", type=str, default=None,
+                   help="host:port of a running session pool (python -m src.session_pool serve)")
+    p.add_argument("--resume", type=str, default=None, metavar="RUN_DIR",
+                   help="Resume an interrupted run: reload its manifest and skip completed angles")
+    p.add_argument("--telemetry", action="store_true",
+                   help="Time each meshing task and solver phase; writes telemetry.json and trace.json to the run directory")
+    p.add_argument("--dry-run", action="store_true", help="Do not launch Fluent; just validate and print plan.")
+    args = p.parse_args()
+
+    if args.resume:
+        # Case settings come from the manifest; how to run it comes from this invocation
+        saved = load_manifest(Path(args.resume))
+        args = argparse.Namespace(**{**saved, **{k: getattr(args, k) for k in _RUNTIME_FLAGS}})
+
+    cache = None if args.no_mesh_cache else MeshCache(args.mesh_cache, int(args.cache_max_gb * 1024 ** 3))
+    if args.cache_list or args.cache_purge:
+        cache = cache or MeshCache(args.mesh_cache)
+        if args.cache_list:
+            for e in cache.entries():
+                print(f"{e['key'][:16]}  {e['size'] / 1024 ** 2:9.1f} MB  "
+                      f"{datetime.fromtimestamp(e['last_used']):%Y-%m-%d %H:%M}  {e['meta'].get('cad', '')}")
+        if args.cache_purge:
+            print(f"[info] Purged {cache.purge()} cached mesh(es) from {cache.root}")
+        return
+    if args.cad is None:
+        p.error("--cad is required")
+
+    cad_path = Path(args.cad).resolve()
+    if not cad_path.exists():
+        raise SystemExit(f"CAD file not found: {cad_path}")
+
+    args.cad = str(cad_path)
+
+    aoa_list = parse_aoa_list(args.aoa)
+    if args.resume:
+        run_dir = Path(args.resume)
+    else:
+        run_dir = Path(args.outdir) / datetime.now().strftime("run_%Y%m%d_%H%M%S")
+        run_dir.mkdir(parents=True, exist_ok=True)
+        (run_dir/"manifest.txt").write_text(str(vars(args)))
+        write_manifest(run_dir, vars(args))
+    csv_path = str(run_dir / "wing_aoa_results.csv")
+
+    mcfg, scfg = make_configs(args)
+    estimator = Estimator()
+    est = estimator.estimate(mcfg, scfg, args.max_processors, None if args.auto_processors else scfg.processors)
+    if args.auto_processors:
+        mcfg.processors = scfg.processors = est.processors
+    if args.pool:
+        # Pooled Fluent processes do not share our working directory
+        mcfg.mesh_file = str((run_dir / mcfg.mesh_file).resolve())
 
     if args.dry_run:
         print("[dry-run] Meshing workflow:", mcfg.workflow)
@@ -106,19 +295,132 @@ def main():
         print("[dry-run] Farfield name:", scfg.farfield_name)
         print("[dry-run] Wing walls:", ", ".join(scfg.wing_wall_zones))
         print("[dry-run] AoA list:", aoa_list)
+        if scfg.adaptive:
+            print("[dry-run] Adaptive refinement: budget", scfg.adaptive_budget, "solves,",
+                  "tolerances CL", scfg.adaptive_cl_tol, "CD", scfg.adaptive_cd_tol)
+        if scfg.continuation:
+            from .solver import continuation_order
+            print("[dry-run] Continuation order:", [a for a, _ in continuation_order(aoa_list)])
         print("[dry-run] Mach/T∞/Pₒₚ:", scfg.mach, scfg.t_inf, scfg.p_op)
+        print(f"[dry-run] Estimate: ~{est.cells:,.0f} cells, ~{est.ram_gb:.1f} GB RAM, "
+              f"{est.processors} cores (recommended {est.recommended_processors})")
+        print(f"[dry-run] Predicted wall time: ~{est.wall_s / 60:.1f} min "
+              f"(mesh {est.mesh_s:.0f} s, {est.s_per_iter:.3f} s/iter; "
+              f"{est.calibration_runs} calibration run(s))")
+        if scfg.n_sessions > 1:
+            from .parallel import split_processors
+            print("[dry-run] Parallel sessions:", split_processors(scfg.processors, scfg.n_sessions))
+        if cache is not None:
+            hit = cache.get(mesh_key(mcfg), touch=False)
+            print("[dry-run] Mesh cache:", f"hit ({hit})" if hit else "miss")
+        if not args.no_results_db and Path(args.results_db or DEFAULT_DB).exists():
+            with closing(ResultsStore(args.results_db)) as store:
+                hits = store.solved(FlowKey.from_configs(mcfg, scfg), scfg.n_iters)
+            print("[dry-run] Results store: already solved", sorted(a for a in hits if a in aoa_list))
+        if args.resume:
+            done = sorted(SweepJournal(run_dir).completed())
+            print("[dry-run] Resuming; completed angles:", done)
         print("[dry-run] Output directory:", run_dir)
         return
 
-    log.info("Lanching meshing workflow: %s", mcfg.workflow)
+    ram = physical_ram_gb()
+    if ram is not None and est.ram_gb > 0.9 * ram:
+        print(f"[warn] Estimated {est.ram_gb:.1f} GB exceeds the {ram:.1f} GB of RAM on this machine.")
+    log.info("Estimate: ~%.0f cells, ~%.1f GB, %d cores, ~%.1f min", est.cells, est.ram_gb,
+             scfg.processors, est.wall_s / 60)
+
+    journal = SweepJournal(run_dir)
+    if journal.completed():
+        log.info("Resuming %s: %d angle(s) already complete", run_dir, len(journal.completed()))
+
+    store = None if args.no_results_db else ResultsStore(args.results_db)
+    flow_key = FlowKey.from_configs(mcfg, scfg) if store is not None else None
+    built = mcfg
+
+    def on_meshed(effective: MeshingConfig):
+        # A meshing fallback changed the mesh; calibrate and store against the mesh actually built
+        nonlocal flow_key, built
+        built = effective
+        if flow_key is not None:
+            flow_key = replace(flow_key, mesh_hash=mesh_hash(effective))
+
+    if args.telemetry:
+        telemetry.enable()
+    try:
+        if store is not None and store.seed_journal(flow_key, scfg, journal):
+            log.info("Every requested angle is already in the results store; Fluent not launched")
+            write_results_csv([rec["row"] for _, rec in sorted(journal.completed().items())], csv_path)
+            return
+        before = set(journal.completed())
+        timing = _execute(args, mcfg, scfg, cache, csv_path, journal, on_meshed)
+        if timing is not None:
+            _calibrate(estimator, built, scfg, *timing,
+                       [rec["row"] for a, rec in journal.completed().items() if a not in before])
+    finally:
+        if store is not None:
+            store.record_journal(flow_key, journal, scfg.n_iters)
+            store.close()
+        if args.telemetry:
+            paths = telemetry.disable().write(run_dir)
+            log.info("Telemetry: %s (open %s in ui.perfetto.dev)", paths["summary"], paths["trace"])
+
+def _calibrate(estimator: Estimator, mcfg: MeshingConfig, scfg: SolverConfig, mesh_path: str,
+               mesh_s: Optional[float], rows):
+    """Feed the measured mesh size, meshing time and per-iteration cost back to the estimator."""
+    timed = [r for r in rows if r.get("Wall_s") and r.get("Iters")]
+    s_per_iter = None
+    # Sessions of a parallel sweep share the cores, so their timings do not map onto one core count
+    if timed and scfg.n_sessions == 1:
+        s_per_iter = sum(float(r["Wall_s"]) for r in timed) / sum(int(r["Iters"]) for r in timed)
+    cells = mesh_file_cell_count(mesh_path)
+    if cells is None and s_per_iter is None and mesh_s is None:
+        return
+    estimator.record(mcfg, scfg, scfg.processors, cells, s_per_iter, mesh_s)
+
+def _execute(args, mcfg: MeshingConfig, scfg: SolverConfig, cache: Optional[MeshCache],
+             csv_path: str, journal: SweepJournal,
+             on_meshed: Callable[[MeshingConfig], None] = lambda effective: None,
+             ) -> Optional[Tuple[str, Optional[float]]]:
+    """
+    Mesh (unless cached) and solve; returns (mesh path, meshing seconds) for calibration.
+    ``on_meshed`` gets the settings a fresh mesh was built with before solving starts.
+    """
+    key = mesh_key(mcfg) if cache is not None else None
+    cached_mesh = cache.get(key) if cache is not None else None
+
     # Import heavy modules only if not dry-run
-    from .meshing import build_mesh
     from .solver import solve_from_mesher_and_sweep
 
-    meshing_session = build_mesh(mcfg)
-    solve_from_mesher_and_sweep(meshing_session, scfg)
+    if args.pool:
+        _run_with_pool(args.pool, mcfg, scfg, cache, key, cached_mesh, csv_path, journal, on_meshed)
+        return None
+
+    if cached_mesh:
+        log.info("Mesh cache hit %s; skipping meshing", key[:16])
+        from .parallel import solve_mesh_file
+        solve_mesh_file(cached_mesh, scfg, csv_path, journal)
+        return cached_mesh, None
+
+    log.info("Lanching meshing workflow: %s", mcfg.workflow)
+    from .meshing import build_mesh
+
+    t0 = time.perf_counter()
+    meshing_session, effective = build_mesh(mcfg)
+    mesh_s = time.perf_counter() - t0
+    mesh_path = str(Path(mcfg.mesh_file).resolve())
+    _record_mesh(mcfg, effective, mesh_path, cache, key, journal.run_dir)
+    on_meshed(effective)
+    if scfg.n_sessions > 1:
+        from .parallel import solve_parallel_sweep
+
+        # The mesh is already on disk; free the meshing licence before fanning out
+        meshing_session.exit()
+        solve_parallel_sweep(mesh_path, scfg, csv_path, journal=journal)
+    else:
+        solve_from_mesher_and_sweep(meshing_session, scfg, csv_path, journal)
 
     log.info("Completed meshing workflow: %s", mcfg.workflow)
+    return mesh_path, mesh_s
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,415 @@
+from __future__ import annotations
+import argparse
+import ipaddress
+import itertools
+import os
+import secrets
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .logging_utils import get_logger
+
+log = get_logger()
+
+DEFAULT_ADDRESS = "localhost:50100"
+DEFAULT_KEY_FILE = os.environ.get("WING_AERO_POOL_KEY_FILE",
+                                  str(Path.home() / ".cache" / "wing_aero" / "pool.key"))
+MODES = ("meshing", "solver")
+
+def parse_address(s: str) -> Tuple[str, int]:
+    host, _, port = s.rpartition(":")
+    return host or "localhost", int(port)
+
+def _is_loopback(host: str) -> bool:
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+def server_authkey(host: str, key_file: str = DEFAULT_KEY_FILE) -> bytes:
+    """
+    Key the listener authenticates clients with; the server unpickles what they
+    send, so it must not be guessable. ``$WING_AERO_POOL_KEY`` wins; otherwise a
+    random key is created once in ``key_file`` (mode 0600) for local clients to
+    read. Listening beyond loopback requires ``$WING_AERO_POOL_KEY``.
+    """
+    if os.environ.get("WING_AERO_POOL_KEY"):
+        return os.environ["WING_AERO_POOL_KEY"].encode()
+    if not _is_loopback(host):
+        raise ValueError(f"Refusing to listen on {host} without WING_AERO_POOL_KEY set; "
+                         "remote clients need a shared key")
+    path = Path(key_file)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        return client_authkey(key_file)
+    with os.fdopen(fd, "w") as f:
+        f.write(secrets.token_hex(32))
+    return path.read_bytes().strip()
+
+def client_authkey(key_file: str = DEFAULT_KEY_FILE) -> bytes:
+    """``$WING_AERO_POOL_KEY``, or the key a local pool wrote to ``key_file``."""
+    if os.environ.get("WING_AERO_POOL_KEY"):
+        return os.environ["WING_AERO_POOL_KEY"].encode()
+    path = Path(key_file)
+    if not path.exists():
+        raise FileNotFoundError(f"No pool key in {path}; start the pool on this machine or set WING_AERO_POOL_KEY")
+    if path.stat().st_mode & 0o077:
+        raise PermissionError(f"Pool key {path} is readable by other users; chmod 600 it")
+    return path.read_bytes().strip()
+
+def _default_health_check(session) -> bool:
+    try:
+        return bool(session.is_server_healthy())
+    except Exception:
+        return False
+
+def _default_reset(session, mode: str):
+    # Solver sessions need nothing: reading the next mesh replaces the case.
+    if mode == "meshing":
+        session.tui.mesh.clear_mesh()
+
+def _connection_info(session) -> Dict[str, object]:
+    props = session.connection_properties
+    return {"ip": props.ip, "port": props.port, "password": props.password}
+
+
+@dataclass
+class _Entry:
+    id: int
+    mode: str
+    session: object
+    leased: bool = False
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class SessionPool:
+    """
+    Keep warm Fluent sessions and lease them out one client at a time.
+
+    ``factory(mode)`` launches a new session. A lease reuses an idle session of
+    the requested mode when it passes ``health_check``; otherwise a new one is
+    launched if the pool is below ``max_size``, evicting an idle session of the
+    other mode if needed, or the caller waits for a release. Sessions are reset
+    when returned and closed after ``idle_timeout`` seconds unused.
+    """
+
+    def __init__(self, factory: Callable[[str], object], max_size: int = 4, idle_timeout: float = 900.0,
+                 health_check: Callable[[object], bool] = _default_health_check,
+                 reset: Callable[[object, str], None] = _default_reset):
+        self.factory = factory
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check = health_check
+        self.reset = reset
+        self._entries: Dict[int, _Entry] = {}
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+        self._launching = 0
+        self._closed = False
+
+    def _close_session(self, entry: _Entry):
+        try:
+            entry.session.exit()
+        except Exception as e:
+            log.warning("Closing %s session %d failed: %s", entry.mode, entry.id, e)
+
+    def _reserve_idle(self, mode: str) -> Optional[_Entry]:
+        # Called with the lock held: mark the most recently used idle session leased;
+        # the caller health-checks it after releasing the lock
+        idle = [e for e in self._entries.values() if not e.leased and e.mode == mode]
+        if not idle:
+            return None
+        entry = max(idle, key=lambda e: e.last_used)
+        entry.leased = True
+        return entry
+
+    def _evict_other_idle(self, mode: str) -> Optional[_Entry]:
+        # Called with the lock held; the caller closes the victim after releasing it
+        idle = [e for e in self._entries.values() if not e.leased and e.mode != mode]
+        if not idle:
+            return None
+        victim = min(idle, key=lambda e: e.last_used)
+        del self._entries[victim.id]
+        return victim
+
+    def _drop(self, entry: _Entry):
+        with self._cond:
+            if self._entries.get(entry.id) is entry:
+                del self._entries[entry.id]
+            self._cond.notify_all()
+        self._close_session(entry)
+
+    def lease(self, mode: str, timeout: Optional[float] = None) -> Tuple[int, object]:
+        if mode not in MODES:
+            raise ValueError(f"Unknown session mode: {mode}")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            victim = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Session pool is closed")
+                    entry = self._reserve_idle(mode)
+                    if entry is not None:
+                        break
+                    if len(self._entries) + self._launching >= self.max_size:
+                        victim = self._evict_other_idle(mode)
+                    if len(self._entries) + self._launching < self.max_size:
+                        self._launching += 1
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"No {mode} session available within {timeout}s")
+                    self._cond.wait(remaining)
+
+            # Health checks, closes and launches are RPCs to Fluent: none of them holds the lock
+            if entry is not None:
+                if self.health_check(entry.session):
+                    return entry.id, entry.session
+                log.warning("Dropping unhealthy %s session %d", entry.mode, entry.id)
+                self._drop(entry)
+                continue
+            if victim is not None:
+                self._close_session(victim)
+            break
+
+        try:
+            log.info("Launching %s session for the pool", mode)
+            session = self.factory(mode)
+        finally:
+            with self._cond:
+                self._launching -= 1
+                self._cond.notify_all()
+        with self._cond:
+            entry = _Entry(next(self._ids), mode, session, leased=True)
+            self._entries[entry.id] = entry
+            return entry.id, session
+
+    def release(self, lease_id: int, healthy: bool = True):
+        with self._cond:
+            entry = self._entries.get(lease_id)
+            if entry is None or not entry.leased:
+                return
+        # The entry stays leased while it is reset, so no one else can take it
+        if healthy:
+            try:
+                self.reset(entry.session, entry.mode)
+            except Exception as e:
+                log.warning("Reset of %s session %d failed: %s", entry.mode, entry.id, e)
+                healthy = False
+        if not healthy:
+            self._drop(entry)
+            return
+        with self._cond:
+            entry.leased = False
+            entry.last_used = time.monotonic()
+            self._cond.notify_all()
+
+    @contextmanager
+    def session(self, mode: str, timeout: Optional[float] = None):
+        lease_id, session = self.lease(mode, timeout)
+        healthy = True
+        try:
+            yield session
+        except BaseException:
+            healthy = False
+            raise
+        finally:
+            self.release(lease_id, healthy)
+
+    def reap_idle(self) -> int:
+        now = time.monotonic()
+        with self._cond:
+            stale = [e for e in self._entries.values()
+                     if not e.leased and now - e.last_used > self.idle_timeout]
+            for entry in stale:
+                del self._entries[entry.id]
+            if stale:
+                self._cond.notify_all()
+        for entry in stale:
+            self._close_session(entry)
+        return len(stale)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            out = {"size": len(self._entries), "max_size": self.max_size}
+            for mode in MODES:
+                out[f"{mode}_idle"] = sum(1 for e in self._entries.values() if e.mode == mode and not e.leased)
+                out[f"{mode}_leased"] = sum(1 for e in self._entries.values() if e.mode == mode and e.leased)
+            return out
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            entries = list(self._entries.values())
+            self._entries.clear()
+            self._cond.notify_all()
+        for entry in entries:
+            self._close_session(entry)
+
+
+class PoolServer:
+    """
+    Serve a SessionPool over ``multiprocessing.connection``. Clients send
+    ``("lease", mode)``, ``("release", lease_id, healthy)`` or ``("stats",)``;
+    leases still held when a client disconnects are released as unhealthy.
+    """
+
+    def __init__(self, pool: SessionPool, address: Tuple[str, int] = parse_address(DEFAULT_ADDRESS),
+                 authkey: Optional[bytes] = None, info: Callable[[object], Dict] = _connection_info,
+                 reap_interval: float = 30.0):
+        self.pool = pool
+        self.info = info
+        self.reap_interval = reap_interval
+        self._listener = Listener(address, authkey=authkey or server_authkey(address[0]))
+        self._stop = threading.Event()
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._listener.address
+
+    def _handle(self, conn):
+        held: List[int] = []
+        try:
+            while True:
+                try:
+                    msg = conn.recv()
+                except (EOFError, OSError):
+                    break
+                try:
+                    if msg[0] == "lease":
+                        lease_id, session = self.pool.lease(msg[1], msg[2] if len(msg) > 2 else None)
+                        held.append(lease_id)
+                        conn.send(("ok", {"lease_id": lease_id, "connection": self.info(session)}))
+                    elif msg[0] == "release":
+                        self.pool.release(msg[1], msg[2])
+                        if msg[1] in held:
+                            held.remove(msg[1])
+                        conn.send(("ok", None))
+                    elif msg[0] == "stats":
+                        conn.send(("ok", self.pool.stats()))
+                    else:
+                        conn.send(("error", f"unknown request {msg[0]!r}"))
+                except Exception as e:
+                    conn.send(("error", f"{type(e).__name__}: {e}"))
+        finally:
+            for lease_id in held:
+                self.pool.release(lease_id, healthy=False)
+            conn.close()
+
+    def _reaper(self):
+        while not self._stop.wait(self.reap_interval):
+            n = self.pool.reap_idle()
+            if n:
+                log.info("Closed %d idle session(s)", n)
+
+    def serve_forever(self):
+        threading.Thread(target=self._reaper, name="pool-reaper", daemon=True).start()
+        log.info("Session pool listening on %s:%s", *self.address)
+        while not self._stop.is_set():
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def start(self) -> threading.Thread:
+        t = threading.Thread(target=self.serve_forever, name="pool-server", daemon=True)
+        t.start()
+        return t
+
+    def close(self):
+        self._stop.set()
+        self._listener.close()
+        self.pool.close()
+
+
+def _connect_to_fluent(info: Dict[str, object]):
+    import ansys.fluent.core as pyfluent
+
+    # The pool owns the Fluent process; the client must not shut it down
+    return pyfluent.connect_to_fluent(ip=info["ip"], port=info["port"], password=info["password"],
+                                      cleanup_on_exit=False)
+
+
+class PoolClient:
+    def __init__(self, address: str = DEFAULT_ADDRESS, authkey: Optional[bytes] = None,
+                 connector: Callable[[Dict[str, object]], object] = _connect_to_fluent):
+        self._conn = Client(parse_address(address), authkey=authkey or client_authkey())
+        self.connector = connector
+        self._lock = threading.Lock()
+
+    def _call(self, *msg):
+        with self._lock:
+            self._conn.send(msg)
+            status, payload = self._conn.recv()
+        if status != "ok":
+            raise RuntimeError(f"Session pool: {payload}")
+        return payload
+
+    def stats(self) -> Dict[str, int]:
+        return self._call("stats")
+
+    @contextmanager
+    def lease(self, mode: str, timeout: Optional[float] = None):
+        reply = self._call("lease", mode, timeout)
+        healthy = True
+        try:
+            yield self.connector(reply["connection"])
+        except BaseException:
+            healthy = False
+            raise
+        finally:
+            self._call("release", reply["lease_id"], healthy)
+
+    def close(self):
+        self._conn.close()
+
+
+def fluent_factory(precision: str = "double", processors: int = 4) -> Callable[[str], object]:
+    def factory(mode: str):
+        import ansys.fluent.core as pyfluent
+        return pyfluent.launch_fluent(mode=mode, precision=precision, processor_count=processors)
+    return factory
+
+def main():
+    p = argparse.ArgumentParser(description="Long-lived pool of warm Fluent sessions.")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("serve", help="Run the pool daemon")
+    s.add_argument("--address", default=DEFAULT_ADDRESS, help="host:port to listen on")
+    s.add_argument("--max-size", type=int, default=4, help="Maximum number of Fluent sessions")
+    s.add_argument("--idle-timeout", type=float, default=900.0, help="Close sessions unused for this long [s]")
+    s.add_argument("--processors", type=int, default=4, help="Processor count per session")
+    s.add_argument("--precision", default="double", help="Fluent precision")
+    st = sub.add_parser("status", help="Print pool occupancy")
+    st.add_argument("--address", default=DEFAULT_ADDRESS, help="host:port of the pool")
+    args = p.parse_args()
+
+    if args.cmd == "status":
+        client = PoolClient(args.address)
+        print(client.stats())
+        client.close()
+        return
+
+    pool = SessionPool(fluent_factory(args.precision, args.processors), args.max_size, args.idle_timeout)
+    try:
+        server = PoolServer(pool, parse_address(args.address))
+    except ValueError as e:
+        raise SystemExit(f"[error] {e}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+if __name__ == "__main__":
+    main()
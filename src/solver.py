@@ -1,11 +1,33 @@
 from __future__ import annotations
 import os
 import csv
-from math import radians, sin, cos
-from typing import List
+import time
+from math import radians, sin, cos, isfinite
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from .adaptive import adaptive_aoa_sweep
 from .config import SolverConfig
+from .convergence import IterationController
+from .history import HistoryWriter, open_writer
+from .journal import SweepJournal
+from .output import OutputWriter
+from .reports import ForceReports, zone_columns
+from .telemetry import span, traced
 from .utils import u_inf_from_mach, rho_from_pT
+from .watchdog import Recovery, Watchdog, recovery_ladder
 
+CSV_FIELDS = ["AoA_deg", "Fx_N", "Fy_N", "Fz_N", "Lift_N", "Drag_N", "CL", "CD", "Cm",
+              "Iters", "Converged", "Init", "Wall_s", "Attempts"]
+
+def csv_fields(cfg: SolverConfig) -> List[str]:
+    """CSV_FIELDS followed by the per-zone CL/CD/Cm columns."""
+    return CSV_FIELDS + zone_columns(cfg.wing_wall_zones)
+
+# The models _setup_physics applies. Part of the results-store key: change it with them
+PHYSICS_SETUP = {"viscous": "k-omega sst", "energy": True, "density": "ideal-gas",
+                 "viscosity": ("sutherland", 1.716e-5, 273.11, 110.56)}
+
+@traced("solver.setup_physics")
 def _setup_physics(solver, cfg: SolverConfig):
     # Turbulence model: k-omega SST
     visc = solver.setup.models.viscous
@@ -25,8 +47,6 @@ def _setup_physics(solver, cfg: SolverConfig):
     air.viscosity.sutherland.reference_temperature = 273.11
     air.viscosity.sutherland.effective_temperature = 110.56
 
-    solver.setup.general.operating_conditions.operating_pressure = cfg.p_op
-
 def _setup_farfield(solver, cfg: SolverConfig):
     pff = solver.setup.boundary_conditions.pressure_far_field[cfg.farfield_name]
     pff.momentum.gauge_pressure = 0.0
@@ -40,22 +60,33 @@ def _set_reference_values(solver, cfg: SolverConfig, U_inf: float):
     ref.length = cfg.ref_length
     ref.velocity = U_inf
 
-def _force_on_walls(solver, walls: List[str]):
-    # Lazy import only when needed
-    from ansys.fluent.core.solver.function import reduction
+@traced("solver.setup_reports")
+def _setup_reports(solver, cfg: SolverConfig) -> ForceReports:
+    center = cfg.moment_center or [0.25 * cfg.ref_length, 0.0, 0.0]
+    return ForceReports.create(solver, cfg.wing_wall_zones, center)
 
-    valid = [z for z in walls if z in solver.setup.boundary_conditions.wall.get_object_names()]
-    if not valid:
-        raise RuntimeError("No valid wing wall zones found in the case.")
-    wall_objs = [solver.setup.boundary_conditions.wall[z] for z in valid]
-    Fx, Fy, Fz = reduction.force(locations=wall_objs, ctxt=solver)
-    return Fx, Fy, Fz
+def _set_flow_direction(pff, aoa_deg: float, sideslip_deg: float = 0.0):
+    a, b = radians(aoa_deg), radians(sideslip_deg)
+    pff.momentum.flow_direction[0] = cos(a) * cos(b)  # x
+    pff.momentum.flow_direction[1] = sin(b)           # y
+    pff.momentum.flow_direction[2] = sin(a) * cos(b)  # z
 
-def solve_from_mesher_and_sweep(meshing_session, cfg: SolverConfig, csv_name: str = "wing_aoa_results.csv"):
-    solver = meshing_session.switch_to_solver()
-    solver.mesh.check()
 
-    _setup_physics(solver, cfg)
+@dataclass
+class _SweepContext:
+    pff: object
+    U_inf: float
+    q_inf: float
+    reports: ForceReports
+    history: Optional[HistoryWriter] = None
+    snapshots: Dict[float, str] = field(default_factory=dict)  # converged fields on disk, for recovery
+    output: Optional[OutputWriter] = None
+
+
+@traced("solver.gas_state")
+def _setup_gas_state(solver, cfg: SolverConfig, reports: ForceReports) -> _SweepContext:
+    """Free-stream state only; cheap to repeat when just Mach/T/p change on the same case."""
+    solver.setup.general.operating_conditions.operating_pressure = cfg.p_op
     pff = _setup_farfield(solver, cfg)
 
     U_inf = u_inf_from_mach(cfg.mach, cfg.t_inf)
@@ -63,28 +94,327 @@ def solve_from_mesher_and_sweep(meshing_session, cfg: SolverConfig, csv_name: st
     q_inf = 0.5 * rho_inf * U_inf ** 2
 
     _set_reference_values(solver, cfg, U_inf)
+    return _SweepContext(pff=pff, U_inf=U_inf, q_inf=q_inf, reports=reports)
+
+def _prepare_solver(solver, cfg: SolverConfig) -> _SweepContext:
+    recovery_ladder(cfg.recovery)  # unknown strategy names fail before any iteration
+    with span("solver.mesh_check"):
+        solver.mesh.check()
+
+    _setup_physics(solver, cfg)
+    return _setup_gas_state(solver, cfg, _setup_reports(solver, cfg))
+
+def _coefficients(solver, ctx: _SweepContext, cfg: SolverConfig, aoa_deg: float,
+                  sideslip_deg: float = 0.0) -> Dict[str, float]:
+    return ctx.reports.coefficients(solver, aoa_deg, sideslip_deg, ctx.q_inf, cfg.ref_area, cfg.ref_length)
+
+def _read_residuals(solver) -> Optional[Dict[str, float]]:
+    try:
+        _, data = solver.monitors.get_monitor_set_data(monitor_set_name="residual")
+        return {name: float(values[-1]) for name, values in data.items() if len(values)}
+    except Exception:
+        return None
+
+def _residual_history(solver) -> Dict[str, List[float]]:
+    _, data = solver.monitors.get_monitor_set_data(monitor_set_name="residual")
+    return {f"res_{name}": list(values) for name, values in data.items()}
+
+def _record_history(solver, ctx: _SweepContext, cfg: SolverConfig, aoa_deg: float, sideslip_deg: float,
+                    iters: int):
+    """Append this angle's last ``iters`` iterations of residuals and CL/CD/Cm monitors to the history."""
+    try:
+        residuals = _residual_history(solver)
+        n = min([iters] + [len(v) for v in residuals.values()])
+        iterations, cols = ctx.reports.history(solver, aoa_deg, sideslip_deg, ctx.q_inf,
+                                               cfg.ref_area, cfg.ref_length, last=n)
+    except Exception as e:
+        print(f"[warn] Could not read monitor history for AoA {aoa_deg:g}: {e}")
+        return
+    n = min(n, len(iterations))
+    cols.update(residuals)
+    ctx.history.write_iterations(aoa_deg, sideslip_deg, iterations[len(iterations) - n:],
+                                 {k: v[len(v) - n:] for k, v in cols.items()})
+
+def _initialize(solver, aoa_deg: float):
+    with span("solver.initialize", aoa=aoa_deg):
+        solver.solution.initialization.hybrid_initialize()
+
+def _iterate(solver, ctx: _SweepContext, cfg: SolverConfig, aoa_deg: float, sideslip_deg: float,
+             n_iters: int, recovery: Optional[Recovery] = None) -> Tuple[Dict[str, float], int, object, Optional[str]]:
+    """One attempt: (coefficients, iterations, converged, watchdog abort reason or None)."""
+    run_calculation = solver.solution.run_calculation
+    state = {"done": 0, "restored": False}
+
+    def iterate(n: int):
+        # Warm-up recoveries (first-order) hand back to the normal settings part-way through
+        if (recovery is not None and not state["restored"]
+                and 0 < recovery.warmup_iters <= state["done"]):
+            recovery.restore(solver)
+            state["restored"] = True
+        with span("solver.iterate", aoa=aoa_deg, iters=n):
+            run_calculation.iterate(number_of_iterations=n)
+        state["done"] += n
+
+    if not (cfg.converge or cfg.watchdog):
+        iterate(n_iters)
+        return _coefficients(solver, ctx, cfg, aoa_deg, sideslip_deg), n_iters, "", None
+
+    last: Dict[str, float] = {}
+
+    def read_coeffs():
+        last.update(_coefficients(solver, ctx, cfg, aoa_deg, sideslip_deg))
+        return last["CL"], last["CD"]
 
+    controller = (IterationController.from_config(cfg, n_iters) if cfg.converge
+                  else IterationController.fixed(cfg.conv_chunk, n_iters))
+    watch = cfg.watchdog or cfg.res_tol is not None
+    res = controller.run(iterate, read_coeffs, (lambda: _read_residuals(solver)) if watch else None,
+                         Watchdog.from_config(cfg) if cfg.watchdog else None)
+    return last, res.iterations, res.converged if cfg.converge else "", res.aborted
+
+def _solve_aoa(solver, ctx: _SweepContext, cfg: SolverConfig, aoa_deg: float,
+               initialize: bool = True, n_iters: Optional[int] = None,
+               sideslip_deg: float = 0.0) -> Dict[str, float]:
+    """
+    Solve one angle. With ``cfg.watchdog`` a diverging attempt is aborted at the
+    next chunk and retried with each ``cfg.recovery`` strategy in turn; the
+    ``Attempts`` column lists them, ``Iters`` counts every attempt and the
+    coefficients are NaN if none recovered.
+    """
+    _set_flow_direction(ctx.pff, aoa_deg, sideslip_deg)
+    sp = span("solver.aoa", aoa=aoa_deg, sideslip=sideslip_deg, init="hybrid" if initialize else "warm")
+    t0 = time.perf_counter()
+    with sp:
+        if initialize:
+            _initialize(solver, aoa_deg)
+        n_iters = n_iters or cfg.n_iters
+        coeffs, iters, converged, aborted = _iterate(solver, ctx, cfg, aoa_deg, sideslip_deg, n_iters)
+        total, attempts = iters, []
+        if aborted is not None:
+            attempts.append(f"{'hybrid' if initialize else 'warm'}:{aborted}@{iters}")
+            for recovery in recovery_ladder(cfg.recovery):
+                if not recovery.apply(solver, aoa_deg, ctx.snapshots):
+                    continue
+                print(f"[warn] AoA {aoa_deg:g}: {aborted} after {iters} iterations; retrying with {recovery.label}")
+                try:
+                    with span("solver.recovery", aoa=aoa_deg, strategy=recovery.name):
+                        if not recovery.initializes:
+                            _initialize(solver, aoa_deg)
+                        coeffs, iters, converged, aborted = _iterate(solver, ctx, cfg, aoa_deg, sideslip_deg,
+                                                                     n_iters, recovery)
+                finally:
+                    recovery.restore(solver)
+                total += iters
+                attempts.append(f"{recovery.label}:{aborted or 'ok'}@{iters}")
+                if aborted is None:
+                    break
+            if aborted is not None:
+                print(f"[warn] AoA {aoa_deg:g} did not recover ({'; '.join(attempts)}); results set to NaN")
+                coeffs = {k: float("nan") for k in coeffs}
+                converged = False
+        sp.set(iters=total, converged=converged, attempts=len(attempts) or 1)
+        if ctx.history is not None:
+            _record_history(solver, ctx, cfg, aoa_deg, sideslip_deg, iters)
+
+    return dict(AoA_deg=aoa_deg, **coeffs, Iters=total, Converged=converged,
+                Init="hybrid" if initialize else "warm", Wall_s=round(time.perf_counter() - t0, 3),
+                Attempts="; ".join(attempts))
+
+def _diverged(row: Dict[str, float]) -> bool:
+    return not (isfinite(row["CL"]) and isfinite(row["CD"]))
+
+def continuation_order(aoa_list: List[float]) -> List[Tuple[float, Optional[float]]]:
+    """
+    Order angles for warm-started continuation as (aoa, parent) pairs.
+    Starts at the angle closest to 0, marches upward, then restarts from that
+    anchor and marches downward, so every point starts from a neighbour.
+    """
+    angles = sorted(set(aoa_list))
+    if not angles:
+        return []
+    i0 = min(range(len(angles)), key=lambda i: abs(angles[i]))
+    plan: List[Tuple[float, Optional[float]]] = [(angles[i0], None)]
+    plan += [(angles[i], angles[i - 1]) for i in range(i0 + 1, len(angles))]
+    plan += [(angles[i], angles[i + 1]) for i in range(i0 - 1, -1, -1)]
+    return plan
+
+def write_results_csv(rows: List[Dict[str, float]], csv_name: str) -> str:
     out_path = os.path.abspath(csv_name)
+    extra = [k for k in dict.fromkeys(k for r in rows for k in r) if k not in CSV_FIELDS]
     with open(out_path, "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["AoA_deg", "Fx_N", "Fy_N", "Fz_N", "Lift_N", "Drag_N", "CL", "CD"])
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS + extra)
+        writer.writeheader()
+        writer.writerows(rows)
+    return out_path
+
+def read_results_csv(csv_name: str, fields: Sequence[str] = ("CL", "CD")) -> Dict[float, Dict[str, float]]:
+    """``fields`` of a results CSV as floats, keyed by AoA."""
+    with open(csv_name, newline="") as f:
+        return {float(r["AoA_deg"]): {q: float(r[q]) for q in fields} for r in csv.DictReader(f)}
+
+def launch_solver(cfg: SolverConfig, processors: Optional[int] = None):
+    import ansys.fluent.core as pyfluent
+
+    with span("solver.launch", processors=processors or cfg.processors):
+        return pyfluent.launch_fluent(mode="solver", precision=cfg.precision,
+                                      processor_count=processors or cfg.processors)
+
+def read_mesh(solver, mesh_path: str):
+    with span("solver.read_mesh", path=os.path.basename(mesh_path)):
+        solver.file.read_mesh(file_name=mesh_path)
+    return solver
+
+def _write_snapshot(solver, path: str, output: Optional[OutputWriter] = None) -> str:
+    # Restart snapshots are written in place: the journal must not point at a file still in flight
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    t0 = time.perf_counter()
+    with span("solver.write_snapshot", path=os.path.basename(path)):
+        solver.file.write(file_type="data", file_name=path)
+    if output is not None:
+        output.stats.add(write_s=time.perf_counter() - t0, files=int(os.path.exists(path)),
+                         bytes=os.path.getsize(path) if os.path.exists(path) else 0)
+    return path
 
+def _complete(ctx: _SweepContext, cfg: SolverConfig, row: Dict[str, float],
+              journal: Optional[SweepJournal], snapshot: Optional[str]) -> Dict[str, float]:
+    if cfg.save_per_aoa:
+        ctx.output.write_angle(row["AoA_deg"])
+    if journal is not None:
+        journal.record(row, snapshot)
+    return row
+
+def keeps_snapshots(cfg: SolverConfig) -> bool:
+    """Whether a journaled sweep writes a restart snapshot for every converged angle."""
+    return cfg.continuation or cfg.snapshots
+
+def _run_sweep(solver, ctx: _SweepContext, cfg: SolverConfig, work_dir: str,
+               journal: Optional[SweepJournal] = None) -> Iterator[Dict[str, float]]:
+    """
+    Yield one result row per angle. With ``cfg.continuation`` each point starts
+    from the converged field of its neighbour; cold (hybrid) initialization is
+    used only for the first point and after a divergence.
+
+    With a ``journal`` every converged angle is recorded before the next one
+    starts, and angles the journal already holds are skipped; with
+    ``keeps_snapshots(cfg)`` its field is snapshotted too. A resumed cold sweep
+    starts its first remaining angle from the nearest journaled snapshot.
+    With ``cfg.adaptive`` the angles are the coarse start set and new ones are
+    added where the polar bends (see adaptive.adaptive_aoa_sweep); every
+    angle is cold-started, so ``cfg.continuation`` does not apply.
+    """
+    if journal is not None:
+        # Restart points for neighbour recovery and resume
+        ctx.snapshots.update(journal.snapshots())
+
+    def solve_cold(aoa_deg: float, start: Optional[float] = None) -> Dict[str, float]:
+        if start is not None:
+            with span("solver.read_snapshot", aoa=start):
+                solver.file.read_data(file_name=ctx.snapshots[start])
+        row = _solve_aoa(solver, ctx, cfg, aoa_deg, initialize=start is None)
+        if start is not None:
+            row["Init"] = f"aoa {start:g}"
+        snap = None
+        if journal is not None and keeps_snapshots(cfg) and not _diverged(row):
+            snap = ctx.snapshots[aoa_deg] = _write_snapshot(solver, journal.snapshot_path(aoa_deg), ctx.output)
+        return _complete(ctx, cfg, row, journal, snap)
+
+    if cfg.adaptive:
+        known = {a: rec["row"] for a, rec in journal.completed().items()} if journal is not None else {}
+        yield from adaptive_aoa_sweep(solve_cold, sorted(set(cfg.aoa_deg)), cfg.adaptive_budget,
+                                      cfg.adaptive_cl_tol, cfg.adaptive_cd_tol, cfg.adaptive_min_step,
+                                      known=known)
+        return
+
+    if not cfg.continuation:
+        restart = dict(ctx.snapshots)  # non-empty only when resuming a run that kept snapshots
         for aoa_deg in cfg.aoa_deg:
-            a = radians(aoa_deg)
-            pff.momentum.flow_direction[0] = cos(a)  # x
-            pff.momentum.flow_direction[2] = sin(a)  # z
+            if journal is not None and journal.is_done(aoa_deg):
+                continue
+            start = min(restart, key=lambda a: abs(a - aoa_deg)) if restart else None
+            restart = {}
+            yield solve_cold(aoa_deg, start)
+        return
 
-            solver.solution.initialization.hybrid_initialize()
-            solver.solution.run_calculation.iterate(number_of_iterations=cfg.n_iters)
+    plan = continuation_order(cfg.aoa_deg)
+    # Anchors whose field must be reloaded later because their child does not follow them
+    to_save = {parent for i, (_, parent) in enumerate(plan)
+               if parent is not None and plan[i - 1][0] != parent}
+    snap_dir = os.path.join(work_dir, "continuation")
+    # On resume the journal's snapshots are the restart points
+    snapshots = ctx.snapshots
+    current: Optional[float] = None  # AoA whose converged field is loaded in the session
 
-            Fx, Fy, Fz = _force_on_walls(solver, cfg.wing_wall_zones)
+    for aoa_deg, parent in plan:
+        if journal is not None and journal.is_done(aoa_deg):
+            continue
+        warm = parent is not None and (parent == current or parent in snapshots)
+        if warm and parent != current:
+            with span("solver.read_snapshot", aoa=parent):
+                solver.file.read_data(file_name=snapshots[parent])
+        row = _solve_aoa(solver, ctx, cfg, aoa_deg, initialize=not warm,
+                         n_iters=cfg.n_iters_warm if warm else None)
+        if warm:
+            row["Init"] = f"aoa {parent:g}"
 
-            Drag = -Fx
-            Lift = Fz
-            CL = Lift / (q_inf * cfg.ref_area)
-            CD = Drag / (q_inf * cfg.ref_area)
+        snap = None
+        if _diverged(row):
+            print(f"[warn] AoA {aoa_deg:g} diverged; next point will be cold-initialized.")
+            current = None
+        else:
+            current = aoa_deg
+            if journal is not None:
+                snap = snapshots[aoa_deg] = _write_snapshot(solver, journal.snapshot_path(aoa_deg), ctx.output)
+            elif aoa_deg in to_save:
+                snap = snapshots[aoa_deg] = _write_snapshot(
+                    solver, os.path.join(snap_dir, f"aoa_{aoa_deg:g}.dat.h5"), ctx.output)
+        yield _complete(ctx, cfg, row, journal, snap)
 
-            writer.writerow([aoa_deg, Fx, Fy, Fz, Lift, Drag, CL, CD])
+def solve_sweep(solver, cfg: SolverConfig, csv_name: str = "wing_aoa_results.csv",
+                journal: Optional[SweepJournal] = None):
+    ctx = _prepare_solver(solver, cfg)
 
-    solver.file.write_case_data(file_name="wing_external.cas.h5")
+    out_path = os.path.abspath(csv_name)
+    work_dir = os.path.dirname(out_path)
+    if cfg.history:
+        ctx.history = open_writer(work_dir)
+    ctx.output = OutputWriter(solver, cfg, work_dir)
+    # Angles already in the journal (resumed run, results store hits) come first
+    rows = [rec["row"] for _, rec in sorted(journal.completed().items())] if journal is not None else []
+    try:
+        with open(out_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=csv_fields(cfg))
+            writer.writeheader()
+            writer.writerows(rows)
+
+            for row in _run_sweep(solver, ctx, cfg, work_dir, journal):
+                writer.writerow(row)
+                f.flush()
+                os.fsync(f.fileno())
+                rows.append(row)
+        rows.sort(key=lambda r: float(r["AoA_deg"]))
+        if cfg.continuation or cfg.adaptive:
+            # Rows were streamed in solve order for crash safety; the finished polar is sorted by AoA
+            write_results_csv(rows, out_path)
+        if ctx.history is not None:
+            ctx.history.write_results(rows)
+        ctx.output.write_final()
+    except BaseException:
+        # Files still in the background queue are moved before re-raising; a failure
+        # to move them must not hide the error that stopped the sweep
+        try:
+            ctx.output.close().report(work_dir)
+        except Exception as e:
+            print(f"[warn] Output files were not all moved after the sweep failed: {e}")
+        raise
+    ctx.output.close().report(work_dir)
     return out_path
+
+def solve_from_mesher_and_sweep(meshing_session, cfg: SolverConfig, csv_name: str = "wing_aoa_results.csv",
+                                journal: Optional[SweepJournal] = None):
+    solver = meshing_session.switch_to_solver()
+    return solve_sweep(solver, cfg, csv_name, journal)
+
+def solve_from_mesh_file(mesh_path: str, cfg: SolverConfig, csv_name: str = "wing_aoa_results.csv",
+                         journal: Optional[SweepJournal] = None):
+    solver = read_mesh(launch_solver(cfg), mesh_path)
+    return solve_sweep(solver, cfg, csv_name, journal)
@@ -0,0 +1,186 @@
+from __future__ import annotations
+import json
+import os
+import sys
+import threading
+import time
+from functools import wraps
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far [MB], or None where unsupported."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return rss / (1024 ** 2 if sys.platform == "darwin" else 1024)
+
+
+class _NullSpan:
+    """Shared no-op span handed out while telemetry is off."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **meta):
+        pass
+
+_NULL = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "meta", "t0", "rss0")
+
+    def __init__(self, tracer: "Tracer", name: str, meta: Dict[str, object]):
+        self.tracer, self.name, self.meta = tracer, name, meta
+
+    def __enter__(self):
+        self.rss0 = peak_rss_mb()
+        self.t0 = time.perf_counter()
+        self.tracer._stack().append(self.name)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        t1 = time.perf_counter()
+        stack = self.tracer._stack()
+        stack.pop()
+        if exc_type is not None:
+            self.meta["error"] = exc_type.__name__
+        self.tracer._add(self.name, self.t0, t1, self.rss0, peak_rss_mb(),
+                         stack[-1] if stack else None, self.meta)
+        return False
+
+    def set(self, **meta):
+        """Attach metadata known only inside the span (e.g. iterations used)."""
+        self.meta.update(meta)
+
+
+class Tracer:
+    """
+    Collects nested wall-time spans per thread, with the process peak RSS at
+    both ends of each span. ``write`` produces a JSON summary aggregated by
+    span name and a Chrome trace (chrome://tracing, ui.perfetto.dev).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._events: List[Dict[str, object]] = []
+        self._threads: Dict[int, str] = {}
+        self.t_start = time.perf_counter()
+
+    def _stack(self) -> List[str]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _add(self, name, t0, t1, rss0, rss1, parent, meta):
+        tid = threading.get_ident()
+        with self._lock:
+            self._threads.setdefault(tid, threading.current_thread().name)
+            self._events.append({"name": name, "t0": t0 - self.t_start, "dur": t1 - t0, "tid": tid,
+                                 "parent": parent, "peak_rss_mb_start": rss0, "peak_rss_mb": rss1,
+                                 "meta": meta})
+
+    def span(self, name: str, **meta) -> _Span:
+        return _Span(self, name, meta)
+
+    def events(self) -> List[Dict[str, object]]:
+        with self._lock:
+            return list(self._events)
+
+    def summary(self) -> Dict[str, object]:
+        stages: Dict[str, Dict[str, object]] = {}
+        for e in sorted(self.events(), key=lambda e: e["t0"]):
+            s = stages.setdefault(e["name"], {"count": 0, "total_s": 0.0, "max_s": 0.0, "parent": e["parent"],
+                                              "peak_rss_mb": None, "rss_growth_mb": 0.0})
+            s["count"] += 1
+            s["total_s"] += e["dur"]
+            s["max_s"] = max(s["max_s"], e["dur"])
+            if e["peak_rss_mb"] is not None:
+                s["peak_rss_mb"] = max(s["peak_rss_mb"] or 0.0, e["peak_rss_mb"])
+                s["rss_growth_mb"] += e["peak_rss_mb"] - e["peak_rss_mb_start"]
+        for s in stages.values():
+            s["mean_s"] = s["total_s"] / s["count"]
+        return {"wall_s": time.perf_counter() - self.t_start, "peak_rss_mb": peak_rss_mb(),
+                "stages": stages}
+
+    def chrome_trace(self) -> Dict[str, object]:
+        pid = os.getpid()
+        with self._lock:
+            names = dict(self._threads)
+        trace: List[Dict[str, object]] = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": n}}
+            for tid, n in names.items()
+        ]
+        for e in self.events():
+            ts = e["t0"] * 1e6
+            trace.append({"name": e["name"], "cat": e["name"].split(".")[0], "ph": "X", "pid": pid,
+                          "tid": e["tid"], "ts": ts, "dur": e["dur"] * 1e6,
+                          "args": {k: v for k, v in e["meta"].items()}})
+            if e["peak_rss_mb"] is not None:
+                trace.append({"name": "peak_rss_mb", "ph": "C", "pid": pid, "ts": ts + e["dur"] * 1e6,
+                              "args": {"MB": e["peak_rss_mb"]}})
+        return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+    def write(self, out_dir: Path, summary_name: str = "telemetry.json",
+              trace_name: str = "trace.json") -> Dict[str, str]:
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        paths = {"summary": str(out_dir / summary_name), "trace": str(out_dir / trace_name)}
+        Path(paths["summary"]).write_text(json.dumps(self.summary(), indent=2, default=str))
+        Path(paths["trace"]).write_text(json.dumps(self.chrome_trace(), default=str))
+        return paths
+
+
+_tracer: Optional[Tracer] = None
+
+def enable() -> Tracer:
+    """Start collecting spans process-wide (idempotent)."""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+def disable() -> Optional[Tracer]:
+    """Stop collecting and return the tracer holding what was recorded."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+def enabled() -> bool:
+    return _tracer is not None
+
+def span(name: str, **meta):
+    """
+    ``with span("solver.iterate", aoa=4.0):`` times the block when telemetry is
+    on; otherwise it returns a shared no-op object and records nothing.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL
+    return tracer.span(name, **meta)
+
+def traced(name: str):
+    """Decorator form of ``span`` for whole functions."""
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return fn(*args, **kwargs)
+            with tracer.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
@@ -1,9 +1,20 @@
 from __future__ import annotations
-from math import sqrt
+from math import exp, sqrt
 from typing import Tuple
 
 R_AIR = 287.04  # J/kg-K
 GAMMA = 1.4
+G0 = 9.80665    # m/s^2
+
+# ISA layers: (base geopotential altitude [m], base temperature [K], lapse rate [K/m])
+ISA_LAYERS = (
+    (0.0, 288.15, -0.0065),
+    (11000.0, 216.65, 0.0),
+    (20000.0, 216.65, 0.001),
+    (32000.0, 228.65, 0.0028),
+    (47000.0, 270.65, 0.0),
+)
+ISA_P0 = 101325.0  # Pa
 
 def speed_of_sound(T: float, gamma: float = GAMMA, R: float = R_AIR) -> float:
     return sqrt(gamma * R * T)
@@ -35,3 +46,91 @@ def first_layer_height_from_yplus(
         raise ValueError("u_tau computed ~0; check inputs.")
     y1 = y_plus * nu / u_tau
     return y1, nu, u_tau
+
+def isa_atmosphere(h: float) -> Tuple[float, float, float]:
+    """ISA standard atmosphere: geopotential altitude [m] (0-51 km) -> (T [K], p [Pa], rho [kg/m^3])."""
+    if not 0.0 <= h <= 51000.0:
+        raise ValueError(f"Altitude {h} m outside the ISA range 0-51000 m")
+    p = ISA_P0
+    for i, (h_b, T_b, lapse) in enumerate(ISA_LAYERS):
+        h_top = ISA_LAYERS[i + 1][0] if i + 1 < len(ISA_LAYERS) else 51000.0
+        dh = min(h, h_top) - h_b
+        if lapse == 0.0:
+            p_end = p * exp(-G0 * dh / (R_AIR * T_b))
+        else:
+            p_end = p * ((T_b + lapse * dh) / T_b) ** (-G0 / (lapse * R_AIR))
+        if h <= h_top:
+            T = T_b + lapse * dh
+            return T, p_end, rho_from_pT(p_end, T)
+        p = p_end
+    raise AssertionError("unreachable")
+
+
+# ---------------------------------------------------------------------------
+# Array versions: accept scalars or NumPy arrays and broadcast like ufuncs.
+# numpy is imported lazily so the scalar API stays importable without it.
+# ---------------------------------------------------------------------------
+
+def _np():
+    import numpy as np
+    return np
+
+def speed_of_sound_array(T, gamma: float = GAMMA, R: float = R_AIR):
+    np = _np()
+    return np.sqrt(gamma * R * np.asarray(T, dtype=float))
+
+def u_inf_from_mach_array(M, T):
+    return _np().asarray(M, dtype=float) * speed_of_sound_array(T)
+
+def sutherland_mu_array(T, mu_ref=1.716e-5, T_ref=273.11, S=110.56):
+    T = _np().asarray(T, dtype=float)
+    return mu_ref * ((T / T_ref) ** 1.5) * (T_ref + S) / (T + S)
+
+def rho_from_pT_array(p, T, R: float = R_AIR):
+    np = _np()
+    return np.asarray(p, dtype=float) / (R * np.asarray(T, dtype=float))
+
+def flat_plate_cf_turbulent_array(Re_L):
+    np = _np()
+    Re_L = np.asarray(Re_L, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cf = 0.026 / Re_L ** (1.0 / 7.0)
+    return np.where(Re_L <= 0, 0.003, cf)
+
+def first_layer_height_from_yplus_array(y_plus, U_inf, L_ref, T, p):
+    """Broadcasting version of first_layer_height_from_yplus; returns (y1, nu, u_tau) arrays."""
+    np = _np()
+    mu = sutherland_mu_array(T)
+    rho = rho_from_pT_array(p, T)
+    nu = mu / rho
+    Re_L = rho * np.asarray(U_inf, dtype=float) * np.asarray(L_ref, dtype=float) / mu
+    Cf = flat_plate_cf_turbulent_array(Re_L)
+    u_tau = np.sqrt(0.5 * Cf) * np.asarray(U_inf, dtype=float)
+    if np.any(u_tau <= 1e-12):
+        raise ValueError("u_tau computed ~0 for some inputs; check inputs.")
+    y1 = np.asarray(y_plus, dtype=float) * nu / u_tau
+    return y1, nu, u_tau
+
+def isa_atmosphere_array(h):
+    """Broadcasting version of isa_atmosphere: altitude [m] -> (T, p, rho) arrays."""
+    np = _np()
+    h = np.asarray(h, dtype=float)
+    if np.any((h < 0.0) | (h > 51000.0)):
+        raise ValueError("Altitude outside the ISA range 0-51000 m")
+
+    T = np.empty_like(h)
+    p = np.empty_like(h)
+    p_base = ISA_P0
+    for i, (h_b, T_b, lapse) in enumerate(ISA_LAYERS):
+        h_top = ISA_LAYERS[i + 1][0] if i + 1 < len(ISA_LAYERS) else 51000.0
+        mask = (h >= h_b) & (h <= h_top) if i == 0 else (h > h_b) & (h <= h_top)
+        dh = h[mask] - h_b
+        if lapse == 0.0:
+            T[mask] = T_b
+            p[mask] = p_base * np.exp(-G0 * dh / (R_AIR * T_b))
+            p_base *= exp(-G0 * (h_top - h_b) / (R_AIR * T_b))
+        else:
+            T[mask] = T_b + lapse * dh
+            p[mask] = p_base * (T[mask] / T_b) ** (-G0 / (lapse * R_AIR))
+            p_base *= ((T_b + lapse * (h_top - h_b)) / T_b) ** (-G0 / (lapse * R_AIR))
+    return T, p, rho_from_pT_array(p, T)
@@ -0,0 +1,189 @@
+from __future__ import annotations
+from collections import deque
+from math import isfinite
+from typing import Dict, List, Optional
+
+from .config import SolverConfig
+
+class Watchdog:
+    """
+    Per-attempt divergence detector, fed one CL/CD (and residual) sample per
+    iteration chunk. ``check`` returns the reason to abort, or None:
+
+    - ``"nan"``: a coefficient or residual is not finite;
+    - ``"blow-up"``: a residual rose ``blowup_factor`` above its running minimum,
+      or |CL| exceeds ``cl_limit``;
+    - ``"oscillation"``: over the last ``osc_window`` samples CL keeps changing
+      direction with a peak-to-peak above ``osc_cl_amp`` that is not decaying
+      (a limit cycle rather than a converging transient).
+    """
+
+    def __init__(self, blowup_factor: float = 1e3, cl_limit: float = 10.0,
+                 osc_window: int = 6, osc_cl_amp: float = 0.02):
+        if osc_window < 4:
+            raise ValueError("osc_window must be >= 4")
+        self.blowup_factor = blowup_factor
+        self.cl_limit = cl_limit
+        self.osc_cl_amp = osc_cl_amp
+        self._cl: deque = deque(maxlen=osc_window)
+        self._res_min: Dict[str, float] = {}
+
+    @classmethod
+    def from_config(cls, cfg: SolverConfig) -> "Watchdog":
+        return cls(cfg.blowup_factor, cfg.cl_limit, cfg.osc_window, cfg.osc_cl_amp)
+
+    def _limit_cycle(self) -> bool:
+        s = list(self._cl)
+        if len(s) < self._cl.maxlen:
+            return False
+        d = [b - a for a, b in zip(s, s[1:])]
+        turns = sum(1 for a, b in zip(d, d[1:]) if a * b < 0)
+        half = len(s) // 2
+        first, second = max(s[:half]) - min(s[:half]), max(s[half:]) - min(s[half:])
+        return turns >= len(d) - 2 and max(s) - min(s) > self.osc_cl_amp and second > 0.5 * first
+
+    def check(self, cl: float, cd: float, residuals: Optional[Dict[str, float]] = None) -> Optional[str]:
+        residuals = residuals or {}
+        if not (isfinite(cl) and isfinite(cd)) or not all(isfinite(v) for v in residuals.values()):
+            return "nan"
+        for name, v in residuals.items():
+            lo = self._res_min[name] = min(v, self._res_min.get(name, v))
+            if lo > 0 and v > self.blowup_factor * lo:
+                return "blow-up"
+        if abs(cl) > self.cl_limit:
+            return "blow-up"
+        self._cl.append(cl)
+        return "oscillation" if self._limit_cycle() else None
+
+
+def _read(parent, name: str) -> Optional[float]:
+    try:
+        v = getattr(parent, name)
+        v = v() if callable(v) else v
+    except Exception:
+        return None
+    return float(v) if isinstance(v, (int, float)) else None
+
+
+class Recovery:
+    """
+    A retry strategy for a tripped angle. ``apply`` prepares the session and
+    returns False when the strategy cannot be used (nothing is changed then);
+    ``restore`` undoes any setting changes once the attempt is over. Unless
+    ``initializes`` is set, the field is hybrid-initialized before the retry.
+    """
+    name = ""
+    initializes = False
+    warmup_iters = 0  # iterations run under the strategy before restore() (0: the whole attempt)
+
+    @property
+    def label(self) -> str:
+        return self.name
+
+    def apply(self, solver, aoa_deg: float, snapshots: Dict[float, str]) -> bool:
+        return True
+
+    def restore(self, solver):
+        pass
+
+
+class RelaxRecovery(Recovery):
+    """Lower the coupled-solver Courant number and explicit/SIMPLE under-relaxation factors."""
+    name = "relax"
+    # (settings path below solution.controls, attribute, Fluent default)
+    SETTINGS = (("p_v_controls", "flow_courant_number", 200.0),
+                ("p_v_controls", "explicit_momentum_under_relaxation", 0.75),
+                ("p_v_controls", "explicit_pressure_under_relaxation", 0.75),
+                ("under_relaxation", "mom", 0.7),
+                ("under_relaxation", "pressure", 0.3))
+
+    def __init__(self, factor: float = 0.5):
+        self.factor = factor
+        self._saved: List = []
+
+    def apply(self, solver, aoa_deg, snapshots):
+        controls = solver.solution.controls
+        self._saved = []
+        for group, name, default in self.SETTINGS:
+            parent = getattr(controls, group)
+            value = _read(parent, name)
+            value = default if value is None else value
+            try:
+                setattr(parent, name, value * self.factor)
+                self._saved.append((parent, name, value))
+            except Exception:
+                pass  # not active for this solver formulation
+        return bool(self._saved)
+
+    def restore(self, solver):
+        for parent, name, value in self._saved:
+            try:
+                setattr(parent, name, value)
+            except Exception as e:
+                print(f"[warn] Could not restore solution.controls {name}: {e}")
+        self._saved = []
+
+
+class FirstOrderRecovery(Recovery):
+    """Restart with first-order upwind convection, switching back to the saved schemes after ``warmup_iters``."""
+    name = "first-order"
+    EQUATIONS = ("mom", "k", "omega", "temperature")
+    DEFAULT = "second-order-upwind"  # restored where the current scheme cannot be read
+
+    def __init__(self, warmup_iters: int = 50):
+        self.warmup_iters = warmup_iters
+        self._saved: Dict[str, str] = {}
+
+    def apply(self, solver, aoa_deg, snapshots):
+        schemes = solver.solution.methods.spatial_discretization.discretization_scheme
+        self._saved = {}
+        for eq in self.EQUATIONS:
+            try:
+                value = schemes[eq]
+                value = value() if callable(value) else value
+                schemes[eq] = "first-order-upwind"
+                self._saved[eq] = value if isinstance(value, str) else self.DEFAULT
+            except Exception:
+                pass  # equation not solved (e.g. energy off)
+        return bool(self._saved)
+
+    def restore(self, solver):
+        schemes = solver.solution.methods.spatial_discretization.discretization_scheme
+        for eq, value in self._saved.items():
+            try:
+                schemes[eq] = value
+            except Exception as e:
+                print(f"[warn] Could not restore the {eq} discretization scheme: {e}")
+        self._saved = {}
+
+
+class NeighbourRecovery(Recovery):
+    """
+    Restart from the saved field of the nearest converged angle: continuation
+    snapshots, or journal snapshots when the sweep keeps them (``cfg.snapshots``).
+    """
+    name = "neighbour"
+    initializes = True
+    source: Optional[float] = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.name} {self.source:g}"
+
+    def apply(self, solver, aoa_deg, snapshots):
+        others = [a for a in snapshots if a != aoa_deg]
+        if not others:
+            return False
+        nearest = min(others, key=lambda a: abs(a - aoa_deg))
+        solver.file.read_data(file_name=snapshots[nearest])
+        self.source = nearest
+        return True
+
+
+STRATEGIES = {"relax": RelaxRecovery, "first-order": FirstOrderRecovery, "neighbour": NeighbourRecovery}
+
+def recovery_ladder(names: List[str]) -> List[Recovery]:
+    unknown = [n for n in names if n not in STRATEGIES]
+    if unknown:
+        raise ValueError(f"Unknown recovery strategies {unknown}; choose from {sorted(STRATEGIES)}")
+    return [STRATEGIES[n]() for n in names]
@@ -0,0 +1,362 @@
+"""
+In-repo stand-in for ``ansys.fluent.core`` so the meshing and solver drivers run
+end to end without Ansys: put ``tests/fake_pyfluent`` first on ``sys.path``
+(or ``PYTHONPATH``) and ``launch_fluent`` returns fake sessions. Tests install
+it with ``fakes.fake_pyfluent()``, which undoes both on exit.
+
+Sessions expose an auto-vivifying settings tree; every call, attribute
+assignment or item assignment counts as one RPC (navigation does not, as in
+PyFluent) and costs ``config.latency_s``. Behaviour is attached to the paths
+the drivers use: the meshing workflow writes a mesh file whose cell count
+follows the sizing arguments, ``iterate`` relaxes the solution towards a
+finite-wing polar with stall and a second-order mesh error, ``report_definitions.compute`` /
+``reduction.force`` return forces from the current flow state, and file
+writes produce files sized by the cell count.
+"""
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from math import asin, atan2, cos, degrees, exp, pi, radians, sin, sqrt
+from typing import Callable, Dict, List, Optional, Tuple
+
+__version__ = "0.0.fake"
+
+GAMMA, R_AIR = 1.4, 287.058
+
+
+@dataclass
+class FakeConfig:
+    latency_s: float = float(os.environ.get("FAKE_FLUENT_LATENCY", "0"))  # per RPC
+    s_per_cell_iter: float = 0.0         # solver wall time per cell and iteration (divided by processors)
+    aspect_ratio: float = 6.0
+    stall_deg: float = 14.0
+    diverge_above: Optional[float] = None  # iterations produce NaN above this AoA
+    tau_iters: float = 40.0              # iterations for the coefficients to relax by 1/e
+    walls: Tuple[str, ...] = ("wing", "wing-tip")
+    wall_share: Tuple[float, ...] = (0.9, 0.1)
+    bytes_per_cell: float = 0.01         # case file bytes per cell; data files are half
+    default_cells: int = 500_000
+    mesh_error: float = 0.02             # CL deficit (CD excess x2) at default_cells; scales with h^2
+
+
+config = FakeConfig()
+stats: Counter = Counter()  # RPCs by session mode, across every session
+_stats_lock = threading.Lock()
+
+def reset(**overrides) -> FakeConfig:
+    """Restore the default configuration (with ``overrides``) and clear the RPC counters."""
+    global config
+    config = FakeConfig(**overrides)
+    stats.clear()
+    return config
+
+
+class SettingsNode:
+    """A settings/command object; children are created on first access."""
+
+    def __init__(self, session: "_Session", path: str, parent: Optional["SettingsNode"] = None):
+        object.__setattr__(self, "_session", session)
+        object.__setattr__(self, "_path", path)
+        object.__setattr__(self, "_parent", parent)
+        object.__setattr__(self, "_children", {})
+        object.__setattr__(self, "_value", None)
+
+    def _child(self, key, item: bool = False) -> "SettingsNode":
+        if key not in self._children:
+            path = f"{self._path}[{key!r}]" if item else f"{self._path}.{key}"
+            self._children[key] = SettingsNode(self._session, path, self)
+        return self._children[key]
+
+    def _assign(self, value):
+        if isinstance(value, dict):
+            for k, v in value.items():
+                self._child(k)._assign(v)
+        else:
+            object.__setattr__(self, "_value", value)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self._child(name)
+
+    def __getitem__(self, key):
+        return self._child(key, item=True)
+
+    def __setattr__(self, name, value):
+        self._session._rpc(f"{self._path}.{name}")
+        self._child(name)._assign(value)
+
+    def __setitem__(self, key, value):
+        self._session._rpc(f"{self._path}[{key!r}]")
+        self._child(key, item=True)._assign(value)
+
+    def __call__(self, *args, **kwargs):
+        return self._session._command(self, args, kwargs)
+
+    def _get(self, default=None):
+        """Stored value without an RPC (for the fake's own physics)."""
+        return default if self._value is None else self._value
+
+    def _state(self) -> Dict[str, object]:
+        return {k: c._state() if c._children else c._value for k, c in self._children.items()}
+
+
+class _Session:
+    mode = ""
+
+    def __init__(self, processors: int = 1, precision: str = "double"):
+        self.processors = processors
+        self.precision = precision
+        self.rpc: Counter = Counter()
+        self.exited = False
+        self._root = SettingsNode(self, self.mode)
+        self._handlers: Dict[str, Callable] = {}
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._root, name)
+
+    @property
+    def rpc_count(self) -> int:
+        return sum(self.rpc.values())
+
+    def _rpc(self, path: str):
+        self.rpc[path] += 1
+        with _stats_lock:
+            stats[self.mode] += 1
+        if config.latency_s:
+            time.sleep(config.latency_s)
+
+    def _command(self, node: SettingsNode, args, kwargs):
+        self._rpc(node._path)
+        for suffix, handler in self._handlers.items():
+            if node._path.endswith(suffix):
+                return handler(node, *args, **kwargs)
+        if node._path.endswith(".set_state"):
+            node._parent._assign(args[0] if args else kwargs)
+            return None
+        if node._path.endswith((".get_state", ".get_object_names")):
+            return None
+        if args and not kwargs and not node._children:
+            node._assign(args[0])  # TUI-style setter
+            return None
+        return node._get()
+
+    def upload(self, path: str):
+        self._rpc("upload")
+
+    def is_server_healthy(self) -> bool:
+        return not self.exited
+
+    def exit(self):
+        self.exited = True
+
+
+class MeshingSession(_Session):
+    """Meshing mode: workflow tasks succeed and ``WriteMesh`` writes a fake mesh file."""
+    mode = "meshing"
+
+    def __init__(self, processors: int = 1, precision: str = "double"):
+        super().__init__(processors, precision)
+        self.cells: Optional[int] = None
+        self._handlers = {".File.WriteMesh": self._write_mesh, ".file.write_mesh": self._write_mesh_tui}
+
+    def _task_args(self, task: str) -> Dict[str, object]:
+        return self._root.workflow.TaskObject[task].Arguments._state()
+
+    def estimate_cells(self) -> int:
+        surf = self._task_args("Generate the Surface Mesh").get("CFDSurfaceMeshControls", {})
+        vol = self._task_args("Generate the Volume Mesh")
+        h_s = sqrt(float(surf.get("MaxSize") or 0.05) * float(surf.get("MinSize") or 0.002))
+        hex_max = float((vol.get("VolumeFillControls") or {}).get("HexMaxCellLength") or 0.25)
+        layers = int((self._task_args("Add Boundary Layers").get("NumberOfLayers")) or 12)
+        faces = 0.5 / (0.433 * h_s ** 2)
+        fill = 2.0 if vol.get("VolumeFill") == "tetrahedral" else 1.0
+        return int(faces * (0.5 * layers + 1.7) + fill * 40.0 / hex_max ** 3)
+
+    def _write_mesh(self, node, FileName: str):
+        self.cells = self.estimate_cells()
+        with open(FileName, "w") as f:
+            json.dump({"fake_fluent_mesh": True, "cells": self.cells}, f)
+        return True
+
+    def _write_mesh_tui(self, node, filename: str):
+        return self._write_mesh(node, FileName=filename)
+
+    def switch_to_solver(self) -> "SolverSession":
+        self._rpc("switch_to_solver")
+        solver = SolverSession(self.processors, self.precision)
+        solver.cells = self.cells or config.default_cells
+        self.exited = True
+        return solver
+
+
+class SolverSession(_Session):
+    """Solver mode with a one-state flow model relaxing towards the polar of the current free stream."""
+    mode = "solver"
+
+    def __init__(self, processors: int = 1, precision: str = "double"):
+        super().__init__(processors, precision)
+        self.cells = config.default_cells
+        self.iteration = 0
+        self.cl = self.cd = 0.0
+        self.residual = 1.0
+        self.history: Dict[str, List[float]] = {}
+        self._handlers = {
+            ".read_mesh": self._read_mesh,
+            ".read_case": self._read_mesh,
+            ".hybrid_initialize": self._initialize,
+            ".iterate": self._iterate,
+            ".report_definitions.compute": self._compute,
+            ".get_monitor_set_data": self._monitor_set_data,
+            ".wall.get_object_names": lambda node: list(config.walls),
+            "reduction.force": self._reduction_force,
+            ".file.write": self._write,
+            ".write_case_data": lambda node, file_name: self._write(node, "case-data", file_name),
+            ".write_case": lambda node, file_name: self._write(node, "case", file_name),
+            ".write_data": lambda node, file_name: self._write(node, "data", file_name),
+            ".common_fluids_format_post": lambda node, file_name, **kw: self._write(node, "data", file_name),
+            ".read_data": self._read_data,
+        }
+
+    # --- free stream and polar ---------------------------------------------------
+    def _farfield(self) -> SettingsNode:
+        pffs = self._root.setup.boundary_conditions.pressure_far_field._children
+        return next(iter(pffs.values())) if pffs else self._root.setup.boundary_conditions.pressure_far_field["farfield"]
+
+    def flow_angles(self) -> Tuple[float, float]:
+        d = self._farfield().momentum.flow_direction
+        x, y, z = (float(d[i]._get(v)) for i, v in enumerate((1.0, 0.0, 0.0)))
+        return degrees(atan2(z, x)), degrees(asin(max(-1.0, min(1.0, y / (sqrt(x * x + y * y + z * z) or 1.0)))))
+
+    def q_inf(self) -> float:
+        pff = self._farfield()
+        mach = float(pff.momentum.mach_number._get(0.2))
+        t = float(pff.thermal.temperature._get(288.15))
+        p = float(self._root.setup.general.operating_conditions.operating_pressure._get(101325.0))
+        return 0.5 * p / (R_AIR * t) * (mach * sqrt(GAMMA * R_AIR * t)) ** 2
+
+    def polar(self, aoa_deg: float) -> Tuple[float, float, float]:
+        """Steady (CL, CD, Cm about the quarter chord) of a finite wing with a soft stall."""
+        ar = config.aspect_ratio
+        slope = 2 * pi / (1 + 2 / ar)
+        a = radians(aoa_deg)
+        a_s = radians(config.stall_deg)
+        if abs(a) <= a_s:
+            cl = slope * a
+        else:
+            cl = (slope * a_s * (1 - 0.6 * (abs(a) - a_s) / radians(10))) * (1 if a > 0 else -1)
+        cd = 0.008 + cl * cl / (pi * 0.85 * ar) + (0.9 * sin(abs(a) - a_s) if abs(a) > a_s else 0.0)
+        # Second-order discretization error: coarse meshes under-predict lift and over-predict drag
+        e = config.mesh_error * (config.default_cells / self.cells) ** (2.0 / 3.0)
+        return cl * (1 - e), cd * (1 + 2 * e), -0.02 - 0.01 * cl
+
+    def _forces(self) -> Dict[str, Tuple[float, float, float, float]]:
+        ref = self._root.setup.reference_values
+        area, length = float(ref.area._get(1.0)), float(ref.length._get(1.0))
+        qs = self.q_inf() * area
+        aoa, beta = self.flow_angles()
+        a, b = radians(aoa), radians(beta)
+        lift, drag = self.cl * qs, self.cd * qs
+        total = (drag * cos(a) * cos(b) - lift * sin(a), drag * sin(b), drag * sin(a) * cos(b) + lift * cos(a))
+        my = (-0.02 - 0.01 * self.cl) * qs * length
+        shares = list(config.wall_share) + [0.0] * len(config.walls)
+        return {w: tuple(f * shares[i] for f in total) + (my * shares[i],) for i, w in enumerate(config.walls)}
+
+    # --- commands ------------------------------------------------------------------
+    def _read_mesh(self, node, file_name: str):
+        try:
+            with open(file_name) as f:
+                self.cells = int(json.load(f)["cells"])
+        except (OSError, ValueError, KeyError):
+            self.cells = config.default_cells
+        self.iteration = 0
+        self.history = {}
+
+    def _initialize(self, node):
+        target = self.polar(self.flow_angles()[0])
+        # Hybrid initialization gives a potential-flow-like start: lift overshoots, drag far too low
+        self.cl, self.cd = 1.3 * target[0], 0.3 * target[1]
+        self.residual = 1.0
+
+    def _iterate(self, node, number_of_iterations: int):
+        aoa = self.flow_angles()[0]
+        cl_t, cd_t, _ = self.polar(aoa)
+        diverging = config.diverge_above is not None and aoa > config.diverge_above
+        if config.s_per_cell_iter:
+            time.sleep(number_of_iterations * self.cells * config.s_per_cell_iter / self.processors)
+        decay = exp(-1.0 / config.tau_iters)
+        self.residual = max(self.residual, 1e-3)  # a changed free stream disturbs a warm field
+        for _ in range(number_of_iterations):
+            self.iteration += 1
+            if diverging:
+                self.cl = self.cd = self.residual = float("nan")
+            else:
+                self.cl = cl_t + (self.cl - cl_t) * decay
+                self.cd = cd_t + (self.cd - cd_t) * decay
+                self.residual = max(1e-8, self.residual * 0.97)
+            for name, v in (("continuity", self.residual), ("x-velocity", 0.3 * self.residual),
+                            ("k", 0.5 * self.residual), ("omega", 0.2 * self.residual)):
+                self.history.setdefault(name, []).append(v)
+            self.history.setdefault("_forces", []).append(self._forces())
+
+    @staticmethod
+    def _project(forces, definitions: SettingsNode, name: str) -> float:
+        rd = definitions
+        if name in rd.force._children:
+            d = rd.force[name]
+            fx, fy, fz, _ = forces[(d.zones._get() or [config.walls[0]])[0]]
+            return sum(f * v for f, v in zip((fx, fy, fz), d.force_vector._get((1.0, 0.0, 0.0))))
+        zone = (rd.moment[name].zones._get() or [config.walls[0]])[0]
+        return forces[zone][3]
+
+    def _compute(self, node, report_defs: List[str]):
+        forces = self._forces()
+        return [{name: [self._project(forces, node._parent, name), 0]} for name in report_defs]
+
+    def _monitor_set_data(self, node, monitor_set_name: str):
+        iterations = list(range(self.iteration - len(self.history.get("continuity", [])) + 1, self.iteration + 1))
+        if monitor_set_name == "residual":
+            return iterations, {k: list(v) for k, v in self.history.items() if not k.startswith("_")}
+        rd = self._root.solution.report_definitions
+        names = self._root.solution.monitor.report_plots[monitor_set_name].report_defs._get() or []
+        per_iter = self.history.get("_forces", [])
+        return iterations, {n: [self._project(f, rd, n) for f in per_iter] for n in names}
+
+    def _reduction_force(self, node, locations: List[str], **kwargs):
+        forces = self._forces()
+        return [sum(forces[z][i] for z in locations if z in forces) for i in range(3)]
+
+    def _write(self, node, file_type: str = "case-data", file_name: str = ""):
+        case = int(self.cells * config.bytes_per_cell)
+        outputs = []
+        if file_type in ("case", "case-data"):
+            outputs.append((file_name, case))
+        if file_type in ("data", "case-data"):
+            data = file_name.replace(".cas.h5", ".dat.h5") if file_type == "case-data" else file_name
+            outputs.append((data, case // 2))
+        for path, size in outputs:
+            header = json.dumps({"fake_fluent": file_type, "cl": self.cl, "cd": self.cd,
+                                 "residual": self.residual}).encode() + b"\n"
+            with open(path, "wb") as f:
+                f.write(header + b"\0" * max(0, size - len(header)))
+
+    def _read_data(self, node, file_name: str):
+        with open(file_name, "rb") as f:
+            state = json.loads(f.readline())
+        self.cl, self.cd, self.residual = state["cl"], state["cd"], state["residual"]
+
+
+def launch_fluent(mode: str = "solver", precision: str = "double", processor_count: int = 1, **kwargs):
+    cls = MeshingSession if mode == "meshing" else SolverSession
+    session = cls(processor_count or 1, precision)
+    session._rpc("launch_fluent")
+    return session
+
+def connect_to_fluent(**kwargs):
+    raise RuntimeError("The fake backend has no remote sessions")
@@ -0,0 +1,223 @@
+"""
+Stand-ins for PyFluent sessions so orchestration code can be tested without Ansys.
+
+``FakeSolver``/``FakeMeshing`` are recording mocks: tests hand them to the
+drivers directly, inject failures per task or angle and assert on the exact
+calls made. ``fake_pyfluent()`` installs the in-repo ``ansys.fluent.core``
+backend instead, which models a flow solution and files so the drivers run end
+to end through ``launch_fluent``; it is for integration tests and benchmarks,
+not for pinning individual calls.
+"""
+import sys
+from contextlib import contextmanager
+from math import cos, radians, sin
+from pathlib import Path
+
+FAKE_PYFLUENT = str(Path(__file__).parent / "fake_pyfluent")
+
+def _ansys_modules():
+    return {k: v for k, v in sys.modules.items() if k == "ansys" or k.startswith("ansys.")}
+
+@contextmanager
+def fake_pyfluent():
+    """
+    Import the in-repo backend as ``ansys.fluent.core`` (shadowing a real
+    install) and yield it; ``sys.path`` and ``sys.modules`` are restored on exit.
+    """
+    saved_path, saved_modules = list(sys.path), _ansys_modules()
+    for name in saved_modules:
+        del sys.modules[name]
+    sys.path.insert(0, FAKE_PYFLUENT)
+    try:
+        import ansys.fluent.core as fluent
+        yield fluent
+    finally:
+        sys.path[:] = saved_path
+        for name in _ansys_modules():
+            del sys.modules[name]
+        sys.modules.update(saved_modules)
+
+
+class Node:
+    """Auto-vivifying settings node: any attribute/item exists, calls are recorded."""
+
+    def __init__(self, path="", calls=None):
+        object.__setattr__(self, "_path", path)
+        object.__setattr__(self, "_items", {})
+        object.__setattr__(self, "_calls", calls if calls is not None else [])
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        child = Node(f"{self._path}.{name}", self._calls)
+        object.__setattr__(self, name, child)
+        return child
+
+    def __getitem__(self, key):
+        if key not in self._items:
+            self._items[key] = Node(f"{self._path}[{key!r}]", self._calls)
+        return self._items[key]
+
+    def __setitem__(self, key, value):
+        if isinstance(value, dict):
+            # named-object creation, e.g. report_definitions.force["name"] = {}
+            node = self[key]
+            for k, v in value.items():
+                setattr(node, k, v)
+            return
+        self._items[key] = value
+
+    def __call__(self, *args, **kwargs):
+        self._calls.append((self._path, args, kwargs))
+
+
+class FakeReportDefinitions(Node):
+    """report_definitions node whose compute() evaluates the force/moment definitions created on it."""
+
+    def __init__(self, solver):
+        super().__init__("solver.solution.report_definitions", solver._calls)
+        object.__setattr__(self, "_solver", solver)
+
+    def compute(self, report_defs):
+        self._calls.append((f"{self._path}.compute", (), {"report_defs": report_defs}))
+        return [{name: [value, 0]} for name, value in self.evaluate(report_defs).items()]
+
+    def evaluate(self, report_defs):
+        zones = self._solver.walls
+        F = self._solver.forces()
+        lift = self._solver.lift()
+        out = {}
+        for name in report_defs:
+            if name in self.force._items:
+                d = self.force[name]
+                value = sum(f * v for f, v in zip(F, d.force_vector)) / len(zones)
+            else:
+                value = -0.1 * lift / len(zones)  # nose-down pitching moment
+            out[name] = value
+        return out
+
+
+class FakeSolver(Node):
+    """Solver session whose wall forces follow a thin-airfoil lift curve and a parabolic drag polar."""
+
+    def __init__(self, processors=1, farfield="farfield", diverge_above=None, walls=("wing", "wing-tip"),
+                 stable_courant=None, file_bytes=0):
+        super().__init__("solver")
+        object.__setattr__(self, "processors", processors)
+        object.__setattr__(self, "farfield", farfield)
+        object.__setattr__(self, "diverge_above", diverge_above)
+        object.__setattr__(self, "stable_courant", stable_courant)
+        object.__setattr__(self, "walls", list(walls))
+        object.__setattr__(self, "exited", False)
+        object.__setattr__(self.setup.boundary_conditions.wall, "get_object_names", lambda: list(walls))
+        object.__setattr__(self.solution, "report_definitions", FakeReportDefinitions(self))
+        object.__setattr__(self.monitors, "get_monitor_set_data", self._monitor_set_data)
+        if file_bytes:
+            # Case/data writes produce real files of file_bytes bytes each
+            object.__setattr__(self, "file_bytes", file_bytes)
+            for name in ("write", "write_case_data"):
+                object.__setattr__(self.file, name, self._writer(f"solver.file.{name}"))
+            object.__setattr__(self.file.export, "common_fluids_format_post",
+                               self._writer("solver.file.export.common_fluids_format_post"))
+
+    def exit(self):
+        object.__setattr__(self, "exited", True)
+
+    def aoa_deg(self):
+        from math import asin, degrees
+        pff = self.setup.boundary_conditions.pressure_far_field[self.farfield]
+        return degrees(asin(pff.momentum.flow_direction[2]))
+
+    def lift(self):
+        return 600.0 * sin(radians(self.aoa_deg()))
+
+    def forces(self):
+        """Total (Fx, Fy, Fz): drag along the free stream plus lift normal to it."""
+        courant = getattr(self.solution.controls.p_v_controls, "flow_courant_number")
+        # Above diverge_above the solution blows up unless the Courant number is below stable_courant
+        stable = self.stable_courant is not None and isinstance(courant, float) and courant < self.stable_courant
+        if self.diverge_above is not None and self.aoa_deg() > self.diverge_above and not stable:
+            return float("nan"), float("nan"), float("nan")
+        a = radians(self.aoa_deg())
+        drag, lift = 10.0 + 50.0 * a * a, self.lift()
+        return drag * cos(a) - lift * sin(a), 0.0, drag * sin(a) + lift * cos(a)
+
+    def _writer(self, path):
+        def write(file_name, file_type="case-data", **kwargs):
+            self._calls.append((path, (), {"file_name": file_name, "file_type": file_type, **kwargs}))
+            outputs = {"case": [file_name], "data": [file_name]}.get(
+                file_type, [file_name, file_name.replace(".cas.h5", ".dat.h5")])
+            for out in outputs:
+                with open(out, "wb") as f:
+                    f.write(b"\0" * self.file_bytes)
+        return write
+
+    def _monitor_set_data(self, monitor_set_name):
+        """Residuals decaying over every iteration run so far; report plots hold the current values."""
+        n = sum(c[2].get("number_of_iterations", 0) for c in self.calls_to("iterate"))
+        iterations = list(range(1, n + 1))
+        if monitor_set_name == "residual":
+            return iterations, {r: [10.0 ** (-i / 50) for i in iterations] for r in ("continuity", "x-velocity")}
+        names = self.solution.monitor.report_plots[monitor_set_name].report_defs
+        values = self.solution.report_definitions.evaluate(names)
+        return iterations, {name: [v] * n for name, v in values.items()}
+
+    def calls_to(self, suffix):
+        return [c for c in self._calls if c[0].endswith(suffix)]
+
+
+class FakeTask(Node):
+    """Meshing workflow task: arguments are kept (flattened) and Execute() fails while ``fails(args)`` holds."""
+
+    def __init__(self, calls, name, fails=None):
+        super().__init__(f"meshing.workflow.TaskObject[{name!r}]", calls)
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "args", {})
+        object.__setattr__(self, "fails", fails)
+        object.__setattr__(self, "Children", [])
+        object.__setattr__(self, "_children", {})
+        object.__setattr__(self.Arguments, "set_state", self._set_state)
+
+    def _set_state(self, state):
+        for k, v in state.items():
+            if isinstance(v, dict):
+                self._set_state(v)
+            else:
+                self.args[k] = v
+
+    def Execute(self):
+        self._calls.append((f"{self._path}.Execute", (), {}))
+        if self.fails is not None and self.fails(self.args):
+            raise RuntimeError(f"{self.name} failed")
+
+    def AddChildAndUpdate(self):
+        child = FakeTask(self._calls, f"{self.name}/1", self.fails)
+        child.args.update(self.args)
+        self.Children.append(child.name)
+        self._children[child.name] = child
+        child.Execute()
+
+    def GetChildObject(self, name):
+        return self._children[name]
+
+
+class FakeMeshing(Node):
+    """Meshing session; ``fails`` maps task names to predicates on their arguments."""
+
+    def __init__(self, fails=None):
+        super().__init__("meshing")
+        tasks = {}
+
+        class TaskObject:
+            def __getitem__(_, name):
+                if name not in tasks:
+                    tasks[name] = FakeTask(self._calls, name, (fails or {}).get(name))
+                return tasks[name]
+
+        object.__setattr__(self.workflow, "TaskObject", TaskObject())
+
+    def executed(self, name):
+        return len(self.calls_to(f"[{name!r}].Execute"))
+
+    def calls_to(self, suffix):
+        return [c for c in self._calls if c[0].endswith(suffix)]
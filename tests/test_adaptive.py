@@ -0,0 +1,45 @@
+import csv
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from src.adaptive import adaptive_aoa_sweep, interval_errors
+from src.config import SolverConfig
+from src.solver import solve_sweep
+from fakes import FakeSolver
+
+def analytic_polar(aoa):
+    """Linear lift up to stall at 12 deg, then a sharp drop; parabolic drag."""
+    cl = 0.1 * aoa if aoa <= 12 else 1.2 - 0.15 * (aoa - 12) ** 2
+    return {"AoA_deg": aoa, "CL": cl, "CD": 0.01 + 0.0005 * aoa ** 2}
+
+def test_interval_errors_zero_on_a_line():
+    assert max(interval_errors([0, 1, 2, 3], [0.0, 0.1, 0.2, 0.3])) < 1e-12
+    assert interval_errors([0, 1], [0.0, 1.0]) == [float("inf")]  # too few points to judge
+
+def test_refinement_clusters_near_stall():
+    solved = []
+
+    def solve(a):
+        solved.append(a)
+        return analytic_polar(a)
+
+    rows = list(adaptive_aoa_sweep(solve, [-4, 0, 4, 8, 12, 16, 20], budget=16, cl_tol=0.01, cd_tol=0.01))
+    assert len(rows) == len(solved) <= 16
+    added = solved[7:]
+    assert added, "stall region should trigger refinement"
+    assert all(a > 8 for a in added)  # nothing wasted on the linear range
+
+def test_known_rows_are_not_resolved():
+    known = {a: analytic_polar(a) for a in (0, 4, 8)}
+    solved = []
+    list(adaptive_aoa_sweep(lambda a: solved.append(a) or analytic_polar(a), [0, 4, 8], budget=5, known=known))
+    assert solved and not set(solved) & set(known)
+
+def test_adaptive_sweep_writes_csv(tmp_path: Path):
+    cfg = SolverConfig(aoa_deg=[0, 10, 20], adaptive=True, adaptive_budget=6, adaptive_cl_tol=1e-4)
+    with open(solve_sweep(FakeSolver(), cfg, str(tmp_path / "res.csv"))) as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 6 and float(rows[3]["AoA_deg"]) in (5.0, 15.0)
@@ -0,0 +1,158 @@
+import csv
+import json
+import sys
+import threading
+import time
+from dataclasses import replace
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from src.batch import find_cad_files, run_batch
+from src.config import MeshingConfig, SolverConfig
+from src.mesh_cache import MeshCache, mesh_key
+from src.results_store import FlowKey, ResultsStore
+from src.solver import write_results_csv
+
+def _cads(tmp_path: Path, n: int):
+    d = tmp_path / "cad"
+    d.mkdir()
+    for i in range(n):
+        (d / f"wing_{i}.pmdb").write_text(f"variant {i}")
+    (d / "notes.txt").write_text("not a CAD file")
+    return d
+
+def test_find_cad_files_dir_and_glob(tmp_path: Path):
+    d = _cads(tmp_path, 3)
+    assert [Path(f).name for f in find_cad_files(str(d))] == ["wing_0.pmdb", "wing_1.pmdb", "wing_2.pmdb"]
+    assert len(find_cad_files(str(d / "wing_[01].pmdb"))) == 2
+
+def test_pipeline_overlaps_meshing_and_solving(tmp_path: Path):
+    d = _cads(tmp_path, 3)
+    events, lock = [], threading.Lock()
+
+    def mesh_fn(cfg: MeshingConfig):
+        with lock:
+            events.append(("mesh", Path(cfg.cad_file).stem, time.perf_counter()))
+        time.sleep(0.05)
+        Path(cfg.mesh_file).write_text("mesh")
+        return cfg.mesh_file, cfg
+
+    def solve_fn(mesh_path, cfg: SolverConfig, csv_path, journal):
+        with lock:
+            events.append(("solve", Path(mesh_path).parent.name, time.perf_counter()))
+        if "wing_1" in mesh_path:
+            raise RuntimeError("diverged setup")
+        time.sleep(0.1)
+        rows = [dict(AoA_deg=a, CL=0.1 * a, CD=0.01 + 0.001 * a) for a in cfg.aoa_deg]
+        return write_results_csv(rows, csv_path)
+
+    summary = run_batch(find_cad_files(str(d)), MeshingConfig(), SolverConfig(aoa_deg=[0, 4], processors=4),
+                        tmp_path / "out", queue_size=1, mesh_fn=mesh_fn, solve_fn=solve_fn)
+
+    start = {(kind, g): t for kind, g, t in events}
+    # wing_1 is meshed while wing_0 is still solving
+    assert start[("mesh", "wing_1")] < start[("solve", "wing_0")] + 0.1
+    assert (summary["solved"], summary["failed"]) == (2, 1)
+    assert summary["per_geometry"][1]["error"].startswith("solving")
+    assert (tmp_path / "out" / "wing_2" / "wing_aoa_results.csv").exists()
+
+    with open(tmp_path / "out" / "batch_results.csv") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["geometry"] for r in rows] == ["wing_0", "wing_0", "wing_2", "wing_2"]
+    saved = json.loads((tmp_path / "out" / "batch_summary.json").read_text())
+    assert saved["per_geometry"][0]["CL_max"] == 0.4 and saved["per_geometry"][0]["AoA_CL_max"] == 4.0
+
+def test_store_answers_a_repeated_batch(tmp_path: Path):
+    d = _cads(tmp_path, 2)
+    meshed, solved = [], []
+
+    def mesh_fn(cfg: MeshingConfig):
+        meshed.append(Path(cfg.cad_file).stem)
+        Path(cfg.mesh_file).write_text("mesh")
+        return cfg.mesh_file, cfg
+
+    def solve_fn(mesh_path, cfg: SolverConfig, csv_path, journal):
+        solved.append(Path(mesh_path).parent.name)
+        rows = [dict(AoA_deg=a, CL=0.1 * a, CD=0.01 + 0.001 * a, Converged=True) for a in cfg.aoa_deg]
+        for r in rows:
+            journal.record(r)
+        return write_results_csv(rows, csv_path)
+
+    store = ResultsStore(str(tmp_path / "r.sqlite"))
+    scfg = SolverConfig(aoa_deg=[0, 4], processors=2)
+    run_batch(find_cad_files(str(d)), MeshingConfig(), scfg, tmp_path / "a", store=store,
+              mesh_fn=mesh_fn, solve_fn=solve_fn)
+    assert len(meshed) == len(solved) == 2
+
+    summary = run_batch(find_cad_files(str(d)), MeshingConfig(), scfg, tmp_path / "b", store=store,
+                        mesh_fn=mesh_fn, solve_fn=solve_fn)
+    assert len(meshed) == len(solved) == 2  # neither meshed nor solved again
+    assert summary["solved"] == 2 and {g["mesh_source"] for g in summary["per_geometry"]} == {"store"}
+    with open(tmp_path / "b" / "batch_results.csv") as f:
+        assert [r["Init"] for r in csv.DictReader(f)] == ["store"] * 4
+    store.close()
+
+def test_fallback_mesh_is_cached_and_stored_under_the_settings_used(tmp_path: Path):
+    d = _cads(tmp_path, 1)
+
+    def mesh_fn(cfg: MeshingConfig):
+        Path(cfg.mesh_file).write_text("mesh")
+        return cfg.mesh_file, replace(cfg, hex_max_cell_length=0.125)
+
+    def solve_fn(mesh_path, cfg: SolverConfig, csv_path, journal):
+        rows = [dict(AoA_deg=a, CL=0.1 * a, CD=0.01, Converged=True) for a in cfg.aoa_deg]
+        for r in rows:
+            journal.record(r)
+        return write_results_csv(rows, csv_path)
+
+    cache = MeshCache(str(tmp_path / "cache"))
+    store = ResultsStore(str(tmp_path / "r.sqlite"))
+    scfg = SolverConfig(aoa_deg=[0, 4], processors=2)
+    run_batch(find_cad_files(str(d)), MeshingConfig(), scfg, tmp_path / "out", cache=cache, store=store,
+              mesh_fn=mesh_fn, solve_fn=solve_fn)
+
+    requested = replace(MeshingConfig(), cad_file=find_cad_files(str(d))[0])
+    used = replace(requested, hex_max_cell_length=0.125)
+    assert cache.get(mesh_key(requested)) is None and cache.get(mesh_key(used)) is not None
+    assert not store.solved(FlowKey.from_configs(requested, scfg), scfg.n_iters)
+    assert set(store.solved(FlowKey.from_configs(used, scfg), scfg.n_iters)) == {0.0, 4.0}
+    manifest = json.loads((tmp_path / "out" / "wing_0" / "manifest.json").read_text())
+    assert manifest["mesh_fallback"] == {"hex_max_cell_length": [0.25, 0.125]}
+    store.close()
+
+def test_results_store_errors_fail_the_job_without_stalling_the_pipeline(tmp_path: Path):
+    d = _cads(tmp_path, 3)
+
+    class FlakyStore(ResultsStore):
+        def seed_journal(self, key, scfg, journal):
+            if Path(journal.run_dir).name == "wing_0":
+                raise OSError("database is locked")
+            return super().seed_journal(key, scfg, journal)
+
+        def record_journal(self, key, journal, n_iters):
+            raise OSError("disk full")
+
+    def mesh_fn(cfg: MeshingConfig):
+        Path(cfg.mesh_file).write_text("mesh")
+        return cfg.mesh_file, cfg
+
+    def solve_fn(mesh_path, cfg: SolverConfig, csv_path, journal):
+        return write_results_csv([dict(AoA_deg=0, CL=0.1, CD=0.01, Converged=True)], csv_path)
+
+    store = FlakyStore(str(tmp_path / "r.sqlite"))
+    result = []
+    # One solver and a one-slot queue: a dead worker would leave the meshers blocked forever
+    t = threading.Thread(target=lambda: result.append(run_batch(
+        find_cad_files(str(d)), MeshingConfig(), SolverConfig(aoa_deg=[0]), tmp_path / "out",
+        queue_size=1, store=store, mesh_fn=mesh_fn, solve_fn=solve_fn)), daemon=True)
+    t.start()
+    t.join(timeout=10)
+    assert not t.is_alive(), "batch hung after a results store error"
+
+    errors = [g["error"] for g in result[0]["per_geometry"]]
+    assert result[0]["failed"] == 3
+    assert errors[0] == "results store: database is locked"
+    assert errors[1:] == ["results store: disk full"] * 2
+    store.close()
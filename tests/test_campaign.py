@@ -0,0 +1,69 @@
+import csv
+import json
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from src.campaign import iter_cases, load_campaign, plan_counts, run_campaign
+from fakes import FakeSolver
+
+def _campaign_file(tmp_path: Path) -> Path:
+    for name in ("wing_a.step", "wing_b.step"):
+        (tmp_path / name).write_text(name)
+    spec = {
+        "name": "demo",
+        "geometry": ["wing_*.step"],
+        "mach": [0.3, 0.2],
+        "altitude_m": [5000, 0],
+        "aoa_deg": "0:2:4",
+        "sideslip_deg": [0],
+        "solver": {"ref_area": 0.2},
+    }
+    path = tmp_path / "demo.json"
+    path.write_text(json.dumps(spec))
+    return path
+
+def test_plan_counts_and_lazy_order(tmp_path: Path):
+    camp = load_campaign(str(_campaign_file(tmp_path)))
+    counts = plan_counts(camp)
+    assert counts["cases"] == 2 * 4 * 3
+    assert counts["mesh_builds"] == 2 and counts["gas_state_setups"] == 8
+    assert counts["naive_mesh_builds"] == 24
+
+    cases = iter_cases(camp)
+    assert isinstance(cases, types.GeneratorType)
+    first = [next(cases) for _ in range(4)]
+    assert [c.aoa_deg for c in first] == [0, 2, 4, 0]
+    assert first[0].altitude_m == 0 and first[0].mach == 0.2 and first[0].p_op == 101325.0
+    assert first[3].mach == 0.3  # gas state changes only after the AoA loop
+
+def test_yaml_campaign(tmp_path: Path):
+    pytest.importorskip("yaml")
+    (tmp_path / "w.step").write_text("w")
+    path = tmp_path / "c.yaml"
+    path.write_text("geometry: [w.step]\nmach: 0.25\naoa_deg: [0, 5]\n")
+    camp = load_campaign(str(path))
+    assert camp.mach == [0.25] and plan_counts(camp)["cases"] == 2
+
+def test_run_campaign_reuses_setup(tmp_path: Path):
+    camp = load_campaign(str(_campaign_file(tmp_path)))
+    solvers = []
+
+    def open_solver(mcfg, scfg, cache):
+        solvers.append(FakeSolver())
+        return solvers[-1], mcfg
+
+    out = run_campaign(camp, tmp_path / "out", open_solver=open_solver)
+    with open(out) as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 24 and [r["case"] for r in rows] == [str(i) for i in range(24)]
+    assert len(solvers) == 2
+    for s in solvers:
+        assert len(s.calls_to("mesh.check")) == 1
+        assert len(s.calls_to("hybrid_initialize")) == 12
+        assert s.exited
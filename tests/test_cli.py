@@ -1,10 +1,13 @@
+import argparse
 import sys
 import subprocess
 from pathlib import Path
 
+import pytest
+
 sys.path.append(str(Path(__file__).parent.parent))
 
-from src.run import parse_aoa_list
+from src.run import add_case_arguments, make_configs, parse_aoa_list
 
 def test_parse_aoa_list_variants():
     assert parse_aoa_list("0,2,4,6") == [0.0, 2.0, 4.0, 6.0]
@@ -28,3 +31,23 @@ def test_dry_run_cli(tmp_path: Path):
     assert proc.returncode == 0
     assert "[dry-run]" in proc.stdout
     assert "Target y+" in proc.stdout
+
+def _args(*argv):
+    p = argparse.ArgumentParser()
+    add_case_arguments(p)
+    p.add_argument("--sessions", type=int, default=1)
+    return argparse.Namespace(cad="w.step", **vars(p.parse_args(list(argv))))
+
+def test_continuation_needs_one_session():
+    _, scfg = make_configs(_args("--continuation"))
+    assert scfg.continuation and scfg.n_sessions == 1
+    assert make_configs(_args("--sessions", "3"))[1].n_sessions == 3
+    with pytest.raises(SystemExit, match="--continuation"):
+        make_configs(_args("--continuation", "--sessions", "2"))
+
+def test_adaptive_rejects_sessions_and_continuation():
+    assert make_configs(_args("--adaptive"))[1].adaptive
+    with pytest.raises(SystemExit, match="--sessions"):
+        make_configs(_args("--adaptive", "--sessions", "2"))
+    with pytest.raises(SystemExit, match="--continuation"):
+        make_configs(_args("--adaptive", "--continuation"))
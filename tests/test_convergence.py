@@ -0,0 +1,37 @@
+import sys
+from math import exp
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.convergence import IterationController
+
+def _run(controller, residuals=None):
+    state = {"it": 0}
+
+    def iterate(n):
+        state["it"] += n
+
+    def coeffs():
+        it = state["it"]
+        return 0.5 + 0.2 * exp(-it / 40.0), 0.02 + 0.01 * exp(-it / 40.0)
+
+    return controller.run(iterate, coeffs, residuals), state["it"]
+
+def test_stops_once_coefficients_flatten():
+    res, total = _run(IterationController(chunk=20, window=3, cl_tol=1e-3, cd_tol=1e-4, max_iters=1000))
+    assert res.converged
+    assert res.iterations == total < 400
+    assert abs(res.cl - 0.5) < 1e-3
+
+def test_hard_cap_and_residual_gate():
+    res, total = _run(IterationController(chunk=20, window=3, cl_tol=1e-3, cd_tol=1e-4, max_iters=1000,
+                                          res_tol=1e-5), residuals=lambda: {"continuity": 1e-3})
+    assert not res.converged
+    assert res.iterations == total == 1000
+
+def test_nan_aborts_immediately():
+    calls = []
+    res = IterationController(chunk=10, window=2, cl_tol=1, cd_tol=1, max_iters=500).run(
+        calls.append, lambda: (float("nan"), 0.0))
+    assert not res.converged and res.iterations == 10 and calls == [10]
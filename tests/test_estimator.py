@@ -0,0 +1,44 @@
+import sys
+from dataclasses import replace
+from math import log2
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config import MeshingConfig, SolverConfig
+from src.estimator import MIN_CELLS_PER_CORE, Estimator, raw_cell_count
+
+def test_cell_count_follows_sizing():
+    base = MeshingConfig()
+    n = raw_cell_count(base, 0.3, 0.1)
+    assert raw_cell_count(replace(base, surf_min=0.001), 0.3, 0.1) > n
+    assert raw_cell_count(replace(base, bl_n_layers=24), 0.3, 0.1) > n
+    assert raw_cell_count(replace(base, hex_max_cell_length=0.1), 0.3, 0.1) > n
+
+def test_calibration_corrects_cells_and_learns_scaling(tmp_path: Path):
+    mcfg, scfg = MeshingConfig(surf_min=0.0005, surf_max=0.02, hex_max_cell_length=0.05), SolverConfig()
+    est = Estimator(str(tmp_path / "cal.json"))
+    raw = raw_cell_count(mcfg, scfg.ref_length, scfg.ref_area)
+    true = (2e-7, 8e-6, 1e-3)
+    cells = 2.0 * raw
+    for p in (4, 8, 16, 32):
+        s = cells * (true[0] + true[1] / p) + true[2] * log2(p)
+        est.record(mcfg, scfg, p, cells=cells, s_per_iter=s, mesh_s=10.0)
+
+    again = Estimator(str(tmp_path / "cal.json"))  # reloaded from disk
+    assert again.cell_scale() == pytest.approx(2.0)
+    assert again.scaling() == pytest.approx(true, rel=1e-6)
+    e = again.estimate(mcfg, scfg, max_processors=64, processors=8)
+    assert e.cells == pytest.approx(cells)
+    assert e.mesh_s == pytest.approx(10.0)
+    assert e.processors == 8 and e.calibration_runs == 4
+    assert e.solve_s == pytest.approx(len(scfg.aoa_deg) * scfg.n_iters * e.s_per_iter)
+
+def test_choose_processors_keeps_cells_per_core(tmp_path: Path):
+    est = Estimator(str(tmp_path / "none.json"))
+    assert est.choose_processors(MIN_CELLS_PER_CORE / 2, 64) == 1
+    p = est.choose_processors(2e6, 64)
+    assert 1 < p <= 2e6 / MIN_CELLS_PER_CORE
+    assert est.choose_processors(2e6, 4) == 4
@@ -0,0 +1,67 @@
+import csv
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from src.config import MeshingConfig, SolverConfig
+from src.meshing import build_mesh
+from src.solver import solve_from_mesher_and_sweep, solve_from_mesh_file, solve_sweep
+from fakes import fake_pyfluent
+
+@pytest.fixture
+def fake_fluent():
+    # The drivers import ansys.fluent.core lazily, so they pick up the fake while it is installed
+    with fake_pyfluent() as fluent:
+        fluent.reset()
+        yield fluent
+        fluent.reset()
+
+def _rows(path):
+    with open(path) as f:
+        return list(csv.DictReader(f))
+
+def test_mesh_and_sweep_end_to_end(fake_fluent, tmp_path: Path):
+    meshing, _ = build_mesh(MeshingConfig(mesh_file=str(tmp_path / "wing.msh.h5")))
+    assert (tmp_path / "wing.msh.h5").exists() and meshing.cells > 0
+
+    cfg = SolverConfig(aoa_deg=[0, 4, 8, 12, 16, 20])
+    rows = _rows(solve_from_mesher_and_sweep(meshing, cfg, str(tmp_path / "res.csv")))
+
+    cl = [float(r["CL"]) for r in rows]
+    cd = [float(r["CD"]) for r in rows]
+    assert abs(cl[0]) < 0.01 and cl[1] < cl[2] < cl[3]   # linear range
+    assert cl[5] < cl[4]                                  # past stall (14 deg)
+    assert all(0 < d < 1 for d in cd) and cd[5] > cd[3]
+    assert (tmp_path / "wing_external.cas.h5").exists()
+    assert fake_fluent.stats["meshing"] > 0 and fake_fluent.stats["solver"] > 0
+
+def test_diverging_angles_are_recovered_or_reported(fake_fluent, tmp_path: Path):
+    fake_fluent.reset(diverge_above=10)
+    mesh = tmp_path / "wing.msh.h5"
+    build_mesh(MeshingConfig(mesh_file=str(mesh)))
+    rows = _rows(solve_from_mesh_file(str(mesh), SolverConfig(aoa_deg=[8, 12]), str(tmp_path / "res.csv")))
+
+    assert rows[0]["Attempts"] == "" and float(rows[0]["CL"]) > 0
+    assert rows[1]["CL"] == "nan" and "nan@" in rows[1]["Attempts"]
+
+def test_rpc_budget_per_angle(fake_fluent, tmp_path: Path):
+    # The marginal cost of one more angle, independent of the one-off setup RPCs
+    counts = {}
+    for n in (2, 6):
+        fake_fluent.reset()
+        solver = fake_fluent.launch_fluent(mode="solver")
+        solve_sweep(solver, SolverConfig(aoa_deg=list(range(n))), str(tmp_path / f"res{n}.csv"))
+        counts[n] = solver.rpc_count
+    per_angle = (counts[6] - counts[2]) / 4
+    # 250 iterations in watchdog chunks of 25: iterate + compute + monitor data per chunk, plus history
+    assert per_angle <= 40, per_angle
+
+def test_backend_is_only_installed_inside_the_fixture():
+    path, real = list(sys.path), sys.modules.get("ansys.fluent.core")
+    with fake_pyfluent() as fluent:
+        assert fluent.__version__ == "0.0.fake"
+    assert sys.path == path and sys.modules.get("ansys.fluent.core") is real
@@ -0,0 +1,58 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+pytest.importorskip("pyarrow")
+import pyarrow.dataset as ds
+
+from src.config import SolverConfig
+from src.history import history_files, load_history, open_history
+from src.reports import ForceReports
+from src.solver import solve_sweep
+from fakes import FakeSolver
+
+def _sweep(run_dir: Path, aoa, **kw):
+    run_dir.mkdir()
+    solve_sweep(FakeSolver(), SolverConfig(aoa_deg=aoa, n_iters=20, **kw), str(run_dir / "res.csv"))
+
+def test_sweep_writes_one_history_file_per_angle(tmp_path: Path):
+    _sweep(tmp_path / "run1", [0, 4])
+    assert len(history_files(tmp_path / "run1")) == 2
+
+    it = load_history(tmp_path / "run1")
+    assert len(it) == 40
+    # Each angle keeps only its own iterations
+    assert list(it[it.aoa_deg == 4].iteration) == list(range(21, 41))
+    assert {"res_continuity", "CL", "CD", "Cm", "CL_wing"} <= set(it.columns)
+    assert it[it.aoa_deg == 4].CL.iloc[-1] > 0
+
+    res = load_history(tmp_path / "run1", kind="results")
+    assert list(res.AoA_deg) == [0.0, 4.0] and list(res.run) == ["run1", "run1"]
+    assert res.CL.iloc[1] == pytest.approx(it[it.aoa_deg == 4].CL.iloc[-1])
+
+def test_load_selects_columns_and_filters_across_runs(tmp_path: Path):
+    _sweep(tmp_path / "run1", [0, 4])
+    _sweep(tmp_path / "run2", [8], wing_wall_zones=["wing"])
+
+    assert set(open_history(tmp_path).schema.names) >= {"CL_wing", "CL_wing-tip"}
+    df = load_history(tmp_path, columns=["run", "aoa_deg", "CL"], filter=ds.field("aoa_deg") >= 4)
+    assert list(df.columns) == ["run", "aoa_deg", "CL"]
+    assert sorted(df.groupby("run").size().items()) == [("run1", 20), ("run2", 20)]
+
+def test_history_can_be_disabled(tmp_path: Path):
+    _sweep(tmp_path / "run1", [0], history=False)
+    assert history_files(tmp_path / "run1") == []
+
+def test_only_each_angles_tail_is_resolved(tmp_path: Path, monkeypatch):
+    resolved = []
+    original = ForceReports._resolve
+    monkeypatch.setattr(ForceReports, "_resolve", staticmethod(lambda *a: resolved.append(1) or original(*a)))
+    _sweep(tmp_path / "off", [0, 4, 8], history=False)
+    without = len(resolved)
+    _sweep(tmp_path / "on", [0, 4, 8])
+    # 20 iterations per angle, although the monitor holds the whole sweep
+    assert len(resolved) - 2 * without == 3 * 20
@@ -0,0 +1,71 @@
+import csv
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from src.config import SolverConfig
+from src.journal import SweepJournal
+from src.solver import solve_sweep
+from fakes import FakeSolver
+
+def test_journal_survives_truncated_line(tmp_path: Path):
+    j = SweepJournal(tmp_path)
+    j.record({"AoA_deg": 2.0, "CL": 0.2}, snapshot=None)
+    with open(j.path, "a") as f:
+        f.write('{"aoa_deg": 4.0, "row"')  # crash mid-write
+    assert list(SweepJournal(tmp_path).completed()) == [2.0]
+
+@pytest.mark.parametrize("continuation", [False, True])
+def test_resume_skips_completed_angles(tmp_path: Path, monkeypatch, continuation):
+    forces = FakeSolver.forces
+
+    def crash_at_4(solver):
+        if round(solver.aoa_deg()) == 4:
+            raise RuntimeError("license lost")
+        return forces(solver)
+
+    cfg = SolverConfig(aoa_deg=[0, 2, 4, 6], continuation=continuation, snapshots=True, watchdog=False)
+    out = str(tmp_path / "res.csv")
+    monkeypatch.setattr(FakeSolver, "forces", crash_at_4)
+    with pytest.raises(RuntimeError):
+        solve_sweep(FakeSolver(), cfg, out, SweepJournal(tmp_path))
+
+    # Snapshot files are written by Fluent; create them so the journal can restart from them
+    for aoa in (0, 2):
+        Path(SweepJournal(tmp_path).snapshot_path(aoa)).touch()
+
+    monkeypatch.undo()
+    solver = FakeSolver()
+    solve_sweep(solver, cfg, out, SweepJournal(tmp_path))
+
+    with open(out) as f:
+        rows = list(csv.DictReader(f))
+    assert sorted(float(r["AoA_deg"]) for r in rows) == [0, 2, 4, 6]
+    assert len(solver.calls_to("iterate")) == 2
+    # Restarted from the saved AoA 2 snapshot instead of a cold start
+    assert solver.calls_to("file.read_data")[0][2]["file_name"].endswith("aoa_2.dat.h5")
+    assert rows[2]["Init"] == "aoa 2"
+    assert rows[3]["Init"] == ("aoa 4" if continuation else "hybrid")
+
+def test_cold_sweep_writes_no_snapshots_unless_asked(tmp_path: Path):
+    solver = FakeSolver()
+    solve_sweep(solver, SolverConfig(aoa_deg=[0, 2], n_iters=10), str(tmp_path / "res.csv"), SweepJournal(tmp_path))
+    assert solver.calls_to("file.write") == []
+    assert [r["snapshot"] for r in SweepJournal(tmp_path).completed().values()] == [None, None]
+
+def test_resume_dry_run_reloads_manifest(tmp_path: Path):
+    cad = tmp_path / "dummy.step"
+    cad.write_text("solid-dummy")
+    base = [sys.executable, "-m", "src.run", "--no-mesh-cache", "--dry-run"]
+    subprocess.run(base + ["--cad", str(cad), "--aoa", "0,5", "--outdir", str(tmp_path / "runs")], check=True)
+    run_dir = next((tmp_path / "runs").iterdir())
+    SweepJournal(run_dir).record({"AoA_deg": 0.0}, None)
+
+    proc = subprocess.run(base + ["--resume", str(run_dir)], capture_output=True, text=True, check=True)
+    assert "AoA list: [0.0, 5.0]" in proc.stdout
+    assert "completed angles: [0.0]" in proc.stdout
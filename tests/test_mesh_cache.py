@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config import MeshingConfig
+from src.mesh_cache import MeshCache, mesh_key
+
+def test_mesh_key_tracks_cad_bytes_and_mesh_settings(tmp_path: Path):
+    cad = tmp_path / "wing.step"
+    cad.write_text("solid-a")
+    base = MeshingConfig(cad_file=str(cad))
+    k = mesh_key(base)
+    assert mesh_key(MeshingConfig(cad_file=str(cad), processors=16)) == k  # launch settings ignored
+    assert mesh_key(MeshingConfig(cad_file=str(cad), first_layer_height=5e-6)) != k
+    cad.write_text("solid-b")
+    assert mesh_key(base) != k
+
+def test_lru_eviction_and_purge(tmp_path: Path):
+    cache = MeshCache(str(tmp_path / "cache"), max_bytes=250)
+    for name in "abc":
+        src = tmp_path / f"{name}.msh.h5"
+        src.write_bytes(b"x" * 100)
+        cache.put(name, str(src))
+        if name == "b":
+            assert cache.get("a")  # touch "a" so "b" is the LRU entry
+
+    assert cache.get("b") is None
+    assert cache.get("a").endswith("a.msh.h5") and cache.get("c")
+    assert {e["key"] for e in cache.entries()} == {"a", "c"}
+    assert cache.purge() == 2 and cache.entries() == []
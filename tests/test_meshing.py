@@ -0,0 +1,63 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from src.config import MeshingConfig
+from src.meshing import build_mesh, fallback_changes, fault_tolerant_tasks, run_workflow
+from fakes import FakeMeshing
+
+def test_volume_failure_retries_in_session_from_the_changed_task(tmp_path: Path):
+    # Volume meshing fails until the hexcore is refined
+    meshing = FakeMeshing(fails={"Generate the Volume Mesh": lambda a: a["HexMaxCellLength"] > 0.2})
+    cfg = MeshingConfig(mesh_file=str(tmp_path / "wing.msh.h5"),
+                        fallbacks=[{"bl_n_layers": 8}, {"hex_max_cell_length": 0.125}])
+    used = run_workflow(meshing, fault_tolerant_tasks(cfg), cfg)
+
+    assert (used.bl_n_layers, used.hex_max_cell_length) == (8, 0.125)
+    # CAD import, enclosure and surface mesh ran once; BL reran for the first rung only
+    for task in ("Import CAD and Part Management", "Create External Flow Boundaries", "Generate the Surface Mesh"):
+        assert meshing.executed(task) == 1
+    assert meshing.executed("Add Boundary Layers/1") == 2
+    assert meshing.executed("Generate the Volume Mesh") == 3
+    # Workflow saved after every successful task, including the repeated ones
+    assert len(meshing.calls_to("SaveWorkflow")) == 8
+    assert meshing.calls_to("SaveWorkflow")[0][2] == {"FilePath": str(tmp_path / "wing.wft")}
+
+def test_failure_is_raised_when_no_rung_can_fix_it(tmp_path: Path):
+    meshing = FakeMeshing(fails={"Generate the Surface Mesh": lambda a: True})
+    cfg = MeshingConfig(mesh_file=str(tmp_path / "wing.msh.h5"))  # default ladder only touches BL/volume
+    with pytest.raises(RuntimeError, match="Surface Mesh"):
+        build_mesh(cfg, session=meshing)
+    assert meshing.executed("Generate the Volume Mesh") == 0
+
+def test_ladder_exhausted_raises_last_error(tmp_path: Path):
+    meshing = FakeMeshing(fails={"Add Boundary Layers": lambda a: True})
+    cfg = MeshingConfig(mesh_file=str(tmp_path / "wing.msh.h5"), workflow="watertight", checkpoint=False)
+    with pytest.raises(RuntimeError, match="Boundary Layers"):
+        build_mesh(cfg, session=meshing)
+    # Default ladder: one BL rung applies; the hexcore and fill rungs come after it
+    assert meshing.executed("Add Boundary Layers/1") == 2
+    assert meshing.calls_to("SaveWorkflow") == []
+
+def test_rungs_for_later_tasks_are_kept_for_their_failures(tmp_path: Path):
+    meshing = FakeMeshing(fails={"Add Boundary Layers": lambda a: a["NumberOfLayers"] > 10,
+                                 "Generate the Volume Mesh": lambda a: a["HexMaxCellLength"] > 0.2})
+    cfg = MeshingConfig(mesh_file=str(tmp_path / "wing.msh.h5"), checkpoint=False,
+                        fallbacks=[{"hex_max_cell_length": 0.125}, {"bl_n_layers": 8}])
+    used = run_workflow(meshing, fault_tolerant_tasks(cfg), cfg)
+    # The hexcore rung is skipped for the BL failure, then used when the volume mesh fails
+    assert (used.bl_n_layers, used.hex_max_cell_length) == (8, 0.125)
+    assert meshing.executed("Generate the Volume Mesh") == 2
+
+def test_build_mesh_reports_the_fallback_settings_used(tmp_path: Path):
+    meshing = FakeMeshing(fails={"Generate the Volume Mesh": lambda a: a["HexMaxCellLength"] > 0.2})
+    cfg = MeshingConfig(mesh_file=str(tmp_path / "wing.msh.h5"), checkpoint=False,
+                        fallbacks=[{"hex_max_cell_length": 0.125}])
+    session, used = build_mesh(cfg, session=meshing)
+    assert session is meshing and used.hex_max_cell_length == 0.125
+    assert fallback_changes(cfg, used) == {"hex_max_cell_length": [0.25, 0.125]}
+    assert fallback_changes(cfg, cfg) == {}
@@ -0,0 +1,89 @@
+import csv
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config import MeshingConfig, SolverConfig
+from src.multifidelity import Correction, anchor_angles, linear_range, nonlinear_angles, run_prescreen
+from src.solver import write_results_csv
+
+def _polar(aoa, scale=1.0):
+    # Linear lift up to 12 deg, then a drop; parabolic drag
+    cl = 0.1 * aoa if aoa <= 12 else 1.2 - 0.08 * (aoa - 12)
+    return {"AoA_deg": aoa, "CL": scale * cl, "CD": (0.01 + 0.02 * cl * cl) / scale}
+
+def test_correction_fit_and_leave_one_out():
+    anchors = {a: (_polar(a, 0.9), _polar(a)) for a in (0.0, 4.0, 8.0)}
+    add = Correction.fit(anchors, "additive")
+    # The lift deficit grows linearly with AoA: the additive line is exact
+    assert add.apply("CL", 6.0, _polar(6.0, 0.9)["CL"]) == pytest.approx(0.6)
+    assert max(add.loo["CL"].values()) == pytest.approx(0.0, abs=1e-12)
+    assert add.uncertainty("CD", 2.0) == pytest.approx(0.5 * (add.loo["CD"][0.0] + add.loo["CD"][4.0]))
+
+    mul = Correction.fit(anchors, "multiplicative")
+    assert 0.0 not in mul.loo["CL"]           # no ratio at zero lift
+    assert mul.apply("CD", 6.0, _polar(6.0, 0.9)["CD"]) == pytest.approx(_polar(6.0)["CD"])
+    with pytest.raises(ValueError):
+        Correction.fit({0.0: anchors[0.0]}, "additive")
+
+def test_nonlinear_angles_and_anchor_choice():
+    rows = {float(a): _polar(a) for a in range(-4, 21, 2)}
+    flagged = nonlinear_angles(rows, cl_tol=0.01, cd_tol=0.001)
+    assert 12.0 in flagged and all(a >= 8 for a in flagged)
+    reasons = {a: ["nonlinear"] if a in flagged else [] for a in rows}
+    span = linear_range(rows, reasons)
+    assert span[0] == -4.0 and span[-1] < min(flagged)
+    assert anchor_angles(span, 3) == [span[0], span[len(span) // 2], span[-1]]
+
+def test_prescreen_flags_and_corrects(tmp_path: Path):
+    fine_calls = []
+
+    def mesh_fn(cfg: MeshingConfig):
+        Path(cfg.mesh_file).write_text(json.dumps({"coarse": cfg.surf_min > MeshingConfig().surf_min}))
+        return cfg.mesh_file, cfg
+
+    def solve_fn(mesh_path, cfg: SolverConfig, csv_path, journal):
+        coarse = json.loads(Path(mesh_path).read_text())["coarse"]
+        if not coarse:
+            fine_calls.append(list(cfg.aoa_deg))
+        # Coarse mesh: 10% less lift, 10% more drag
+        return write_results_csv([_polar(a, 0.9 if coarse else 1.0) for a in cfg.aoa_deg], csv_path)
+
+    scfg = SolverConfig(aoa_deg=[float(a) for a in range(-4, 21, 2)], adaptive_cl_tol=0.01, adaptive_cd_tol=0.001)
+    summary = run_prescreen(MeshingConfig(), scfg, tmp_path / "mf", correction="multiplicative",
+                            mesh_fn=mesh_fn, solve_fn=solve_fn)
+
+    with open(tmp_path / "mf" / "multifidelity_results.csv") as f:
+        rows = {float(r["AoA_deg"]): r for r in csv.DictReader(f)}
+    anchors = summary["anchors"]
+    assert fine_calls[0] == anchors and len(fine_calls) == 2
+    # Only stall/post-stall angles beyond the anchors get extra fine solves
+    assert all(a > max(anchors) for a in fine_calls[1])
+    assert {a for a, r in rows.items() if r["Fidelity"] == "fine"} == set(anchors) | set(fine_calls[1])
+    assert "nonlinear" in rows[12.0]["Reason"] and rows[12.0]["Fidelity"] == "fine"
+    for a, r in rows.items():
+        assert float(r["CL"]) == pytest.approx(_polar(a)["CL"], abs=1e-9)
+        assert float(r["CD"]) == pytest.approx(_polar(a)["CD"], rel=1e-9)
+    assert summary["corrected"] == len(rows) - summary["fine_solves"] > 0
+
+def test_prescreen_without_anchors_solves_everything_fine(tmp_path: Path):
+    def mesh_fn(cfg: MeshingConfig):
+        Path(cfg.mesh_file).write_text(json.dumps({"coarse": cfg.surf_min > MeshingConfig().surf_min}))
+        return cfg.mesh_file, cfg
+
+    def solve_fn(mesh_path, cfg: SolverConfig, csv_path, journal):
+        coarse = json.loads(Path(mesh_path).read_text())["coarse"]
+        return write_results_csv([_polar(a, 0.9 if coarse else 1.0) for a in cfg.aoa_deg], csv_path)
+
+    # Two angles: nonlinear_angles flags both, so no linear stretch is left to anchor on
+    summary = run_prescreen(MeshingConfig(), SolverConfig(aoa_deg=[0.0, 4.0]), tmp_path / "mf",
+                            mesh_fn=mesh_fn, solve_fn=solve_fn)
+    with open(tmp_path / "mf" / "multifidelity_results.csv") as f:
+        rows = list(csv.DictReader(f))
+    assert summary["correction"] is None and summary["fine_solves"] == 2
+    assert {(r["Fidelity"], r["Reason"]) for r in rows} == {("fine", "no-anchors")}
+    assert [float(r["CL"]) for r in rows] == pytest.approx([0.0, 0.4])
@@ -0,0 +1,78 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+import src.output
+from src.config import SolverConfig
+from src.output import OutputWriter
+from src.solver import solve_sweep
+from fakes import FakeSolver
+
+def _stats(run):
+    return json.loads((run / "io_stats.json").read_text())
+
+def test_reduced_mode_writes_case_once_and_moves_files_in_background(tmp_path: Path):
+    run, scratch = tmp_path / "run", tmp_path / "scratch"
+    run.mkdir()
+    solver = FakeSolver(file_bytes=1000)
+    cfg = SolverConfig(aoa_deg=[0, 4, 8], n_iters=10, save_per_aoa=True, output_mode="reduced",
+                       compression_level=3, scratch_dir=str(scratch))
+    solve_sweep(solver, cfg, str(run / "res.csv"))
+
+    assert solver.calls_to("write_case_data") == []
+    writes = solver.calls_to("file.write")
+    assert [c[2]["file_type"] for c in writes] == ["case", "data", "data", "data", "data"]
+    # Fluent wrote to scratch; everything ended up in the run directory
+    assert all(Path(c[2]["file_name"]).parent == scratch for c in writes)
+    assert list(scratch.iterdir()) == []
+    assert sorted(p.name for p in run.glob("*.h5")) == [
+        "wing_aoa_0.dat.h5", "wing_aoa_4.dat.h5", "wing_aoa_8.dat.h5", "wing_external.cas.h5", "wing_external.dat.h5"]
+    assert solver.file.cffio_options.compression_level == 3
+
+    stats = _stats(run)
+    assert (stats["files"], stats["bytes"]) == (5, 5000)
+    assert stats["blocked_s"] >= stats["write_s"] >= 0
+
+def test_full_mode_repeats_the_case_per_angle(tmp_path: Path):
+    solver = FakeSolver(file_bytes=1000)
+    solve_sweep(solver, SolverConfig(aoa_deg=[0, 4], n_iters=10, save_per_aoa=True), str(tmp_path / "res.csv"))
+
+    assert len(solver.calls_to("write_case_data")) == 3
+    assert (_stats(tmp_path)["files"], _stats(tmp_path)["bytes"]) == (6, 6000)
+
+def test_field_subset_applies_to_per_angle_files_only(tmp_path: Path):
+    solver = FakeSolver(file_bytes=10)
+    cfg = SolverConfig(aoa_deg=[2], n_iters=10, save_per_aoa=True, output_mode="reduced",
+                       output_fields=["pressure", "wall-shear"])
+    solve_sweep(solver, cfg, str(tmp_path / "res.csv"))
+
+    exports = solver.calls_to("common_fluids_format_post")
+    assert [Path(c[2]["file_name"]).name for c in exports] == ["wing_aoa_2.post"]
+    assert exports[0][2]["cell_func_domain_export"] == ["pressure", "wall-shear"]
+    assert (tmp_path / "wing_aoa_2.post").exists() and (tmp_path / "wing_external.dat.h5").exists()
+
+def test_move_failure_does_not_hide_the_sweep_error(tmp_path: Path, monkeypatch, capsys):
+    def fail(*a, **kw):
+        raise OSError("scratch disk gone")
+
+    def boom(self):
+        raise RuntimeError("final write failed")
+
+    monkeypatch.setattr(src.output.shutil, "move", fail)
+    monkeypatch.setattr(OutputWriter, "write_final", boom)
+    cfg = SolverConfig(aoa_deg=[0], n_iters=10, save_per_aoa=True, output_mode="reduced",
+                       scratch_dir=str(tmp_path / "scratch"))
+    with pytest.raises(RuntimeError, match="final write failed"):
+        solve_sweep(FakeSolver(file_bytes=10), cfg, str(tmp_path / "res.csv"))
+    assert "were not all moved" in capsys.readouterr().out
+
+    # Without a sweep error the move failure is raised
+    monkeypatch.undo()
+    monkeypatch.setattr(src.output.shutil, "move", fail)
+    with pytest.raises(RuntimeError, match="Moving output files"):
+        solve_sweep(FakeSolver(file_bytes=10), cfg, str(tmp_path / "res.csv"))
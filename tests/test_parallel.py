@@ -0,0 +1,36 @@
+import csv
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from src.config import SolverConfig
+from src.parallel import solve_parallel_sweep, split_processors
+from fakes import FakeSolver
+
+def test_split_processors():
+    assert split_processors(10, 3) == [4, 3, 3]
+    assert split_processors(4, 4) == [1, 1, 1, 1]
+    assert split_processors(2, 5) == [1, 1]  # never fewer than one core per session
+
+def test_parallel_sweep_with_fake_sessions(tmp_path: Path):
+    sessions = []
+
+    def factory(processors):
+        s = FakeSolver(processors)
+        sessions.append(s)
+        return s
+
+    cfg = SolverConfig(aoa_deg=[8, 0, 4, 2, 6, 10], n_iters=5, processors=8, n_sessions=3)
+    out = solve_parallel_sweep("mesh.msh.h5", cfg, str(tmp_path / "res.csv"), session_factory=factory)
+
+    with open(out) as f:
+        rows = list(csv.DictReader(f))
+    assert [float(r["AoA_deg"]) for r in rows] == [0, 2, 4, 6, 8, 10]
+    assert float(rows[0]["CL"]) == 0.0 and float(rows[-1]["CL"]) > float(rows[1]["CL"])
+
+    assert sorted(s.processors for s in sessions) == [2, 3, 3]
+    assert all(s.exited for s in sessions)
+    assert all(s.calls_to("file.read_mesh") for s in sessions)
+    assert sum(len(s.calls_to("iterate")) for s in sessions) == 6
@@ -0,0 +1,78 @@
+import csv
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config import MeshingConfig, SolverConfig
+from src.estimator import raw_cell_count
+from src.refinement import refinement_levels, richardson, run_refinement_study
+from src.solver import write_results_csv
+
+def test_levels_coarsen_sizes_and_keep_boundary_layers():
+    base = MeshingConfig(surf_min=0.001, surf_max=0.04, hex_max_cell_length=0.2, bl_n_layers=15)
+    levels = refinement_levels(base, ratio=2.0, n_levels=3)
+    assert [m.surf_min for m in levels] == [0.001, 0.002, 0.004]
+    assert [m.hex_max_cell_length for m in levels] == [0.2, 0.4, 0.8]
+    assert {m.bl_n_layers for m in levels} == {15}
+    with pytest.raises(ValueError):
+        refinement_levels(base, ratio=1.0)
+
+def test_richardson_recovers_order_and_limit():
+    h = [1.0, 1.5, 2.25]
+    r = richardson([0.5 + 0.02 * x ** 2 for x in h], h)
+    assert r.behaviour == "monotonic"
+    assert r.order == pytest.approx(2.0, rel=1e-6)
+    assert r.extrapolated == pytest.approx(0.5, rel=1e-9)
+    assert 0 < r.gci_fine < 0.1
+
+    assert richardson([1.0, 0.9, 1.05], h).behaviour == "oscillatory"
+    assert richardson([1.0, 1.01, 1.0], h).behaviour == "divergent"
+    two = richardson([0.52, 0.545], h[:2])
+    assert two.behaviour == "two-level" and two.order == 2.0
+
+def test_study_meshes_concurrently_and_recommends_cheapest_level(tmp_path: Path):
+    scfg = SolverConfig(aoa_deg=[0, 4, 8], processors=6)
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def mesh_fn(cfg: MeshingConfig):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        # The stand-in solver reads the cell size back from the "mesh"
+        h = raw_cell_count(cfg, scfg.ref_length, scfg.ref_area) ** (-1 / 3)
+        Path(cfg.mesh_file).write_text(json.dumps({"h": h, "cores": cfg.processors}))
+        return cfg.mesh_file, cfg
+
+    def solve_fn(mesh_path, cfg: SolverConfig, csv_path, journal):
+        h = json.loads(Path(mesh_path).read_text())["h"]
+        # Second-order error: about 0.9%, 1.5% and 2.6% on the three levels
+        rows = [dict(AoA_deg=a, CL=0.1 * a * (1 - 10 * h ** 2), CD=0.01 * (1 + 10 * h ** 2)) for a in cfg.aoa_deg]
+        return write_results_csv(rows, csv_path)
+
+    summary = run_refinement_study(MeshingConfig(), scfg, tmp_path / "study", ratio=1.5, n_levels=3,
+                                   target_error=0.02, mesh_fn=mesh_fn, solve_fn=solve_fn)
+
+    assert peak[0] == 3
+    assert [json.loads(Path(lv["out_dir"], "wing_auto.msh.h5").read_text())["cores"]
+            for lv in summary["levels"]] == [2, 2, 2]
+    assert summary["reference"] == "extrapolated"
+    errors = [lv["error_CL"] for lv in summary["levels"]]
+    assert errors[0] < errors[1] < errors[2]
+    # The cheapest level within 2% of the extrapolated polar
+    assert [lv["within_target"] for lv in summary["levels"]] == [True, True, False]
+    assert summary["recommended_level"] == 1
+
+    with open(tmp_path / "study" / "gci.csv") as f:
+        gci = list(csv.DictReader(f))
+    cl8 = next(r for r in gci if r["quantity"] == "CL" and float(r["AoA_deg"]) == 8)
+    assert float(cl8["order"]) == pytest.approx(2.0, rel=1e-6)
+    assert float(cl8["extrapolated"]) == pytest.approx(0.8, rel=1e-6)
@@ -0,0 +1,86 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from src.campaign import load_campaign, run_campaign
+from src.config import SolverConfig
+from src.results_store import FlowKey, ResultsStore, setup_hash
+from fakes import FakeSolver
+
+def _fill(store, mach, cl_slope, setup="", t_inf=288.15):
+    key = FlowKey("cad", "mesh", mach, t_inf, 101325.0, setup_hash=setup)
+    store.put_many(key, [{"AoA_deg": a, "CL": cl_slope * a, "CD": 0.01 + 0.001 * a} for a in (0, 2, 4, 6, 8)], 200)
+    return key
+
+def test_lookup_and_interpolation(tmp_path: Path):
+    store = ResultsStore(str(tmp_path / "r.sqlite"))
+    key = _fill(store, 0.2, 0.10)
+    _fill(store, 0.4, 0.12)
+
+    assert sorted(store.solved(key)) == [0, 2, 4, 6, 8]
+    exact = store.interpolate("cad", 0.2, 4.0)
+    assert exact["exact"] and exact["CL"] == pytest.approx(0.4)
+    mid = store.interpolate("cad", 0.3, 5.5)
+    assert not mid["exact"]
+    assert mid["CL"] == pytest.approx(0.11 * 5.5) and mid["CD"] == pytest.approx(0.0155)
+    with pytest.raises(LookupError):
+        store.interpolate("cad", 0.5, 2.0)  # no extrapolation in Mach
+    with pytest.raises(LookupError):
+        store.interpolate("cad", 0.2, 9.0)  # nor in AoA
+    store.close()
+
+def test_interpolation_never_mixes_gas_states(tmp_path: Path):
+    store = ResultsStore(str(tmp_path / "r.sqlite"))
+    _fill(store, 0.2, 0.10)
+    _fill(store, 0.4, 0.12, t_inf=250.0)
+
+    with pytest.raises(LookupError, match="several gas states"):
+        store.interpolate("cad", 0.2, 4.0)
+    with pytest.raises(LookupError, match="several gas states"):
+        store.interpolate("cad", 0.2, 4.0, p_op=101325.0)
+    # Mach 0.4 was only solved at 250 K, so it cannot bracket Mach 0.3 at 288.15 K
+    with pytest.raises(LookupError, match="outside the stored range"):
+        store.interpolate("cad", 0.3, 4.0, t_inf=288.15)
+    res = store.interpolate("cad", 0.4, 4.0, t_inf=250.0)
+    assert res["CL"] == pytest.approx(0.48) and (res["t_inf"], res["p_op"]) == (250.0, 101325.0)
+    store.close()
+
+def test_key_covers_setup_convergence_and_iterations(tmp_path: Path):
+    store = ResultsStore(str(tmp_path / "r.sqlite"))
+    base = setup_hash(SolverConfig())
+    assert setup_hash(SolverConfig(n_iters=500, aoa_deg=[1.0])) == base
+    other = setup_hash(SolverConfig(ref_area=2.0))
+    assert other != base
+
+    key = _fill(store, 0.2, 0.10, setup=base)
+    assert store.solved(FlowKey("cad", "mesh", 0.2, 288.15, 101325.0, setup_hash=other)) == {}
+    assert sorted(store.solved(key, min_iters=200)) == [0, 2, 4, 6, 8]
+    assert store.solved(key, min_iters=400) == {}  # a longer run is not answered by a shorter one
+
+    assert store.put(key, {"AoA_deg": 10, "CL": 1.0, "CD": 0.02, "Converged": False}, 200) == 0
+    assert store.put(key, {"AoA_deg": 12, "CL": float("nan"), "CD": 0.02}, 200) == 0
+    assert store.put(key, {"AoA_deg": 14, "CL": 1.2, "CD": 0.03, "Converged": True}, 200) == 1
+    assert sorted(store.solved(key)) == [0, 2, 4, 6, 8, 14]
+    store.close()
+
+def test_campaign_reuses_stored_points(tmp_path: Path):
+    (tmp_path / "w.step").write_text("w")
+    spec = tmp_path / "c.json"
+    spec.write_text('{"geometry": ["w.step"], "mach": [0.2], "aoa_deg": [0, 4]}')
+    camp = load_campaign(str(spec))
+    store = ResultsStore(str(tmp_path / "r.sqlite"))
+    opened = []
+
+    def open_solver(mcfg, scfg, cache):
+        opened.append(FakeSolver())
+        return opened[-1], mcfg
+
+    run_campaign(camp, tmp_path / "a", open_solver=open_solver, store=store)
+    out = run_campaign(camp, tmp_path / "b", open_solver=open_solver, store=store)
+    assert len(opened) == 1  # second pass is answered entirely from the store
+    assert Path(out).read_text().count(",store") == 2
+    store.close()
@@ -0,0 +1,116 @@
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.session_pool import PoolClient, PoolServer, SessionPool, client_authkey, server_authkey
+
+class FakeSession:
+    def __init__(self, mode):
+        self.mode = mode
+        self.healthy = True
+        self.resets = 0
+        self.exited = False
+
+    def exit(self):
+        self.exited = True
+
+def _pool(**kw):
+    launched = []
+
+    def factory(mode):
+        launched.append(FakeSession(mode))
+        return launched[-1]
+
+    def reset(session, mode):
+        session.resets += 1
+
+    pool = SessionPool(factory, health_check=lambda s: s.healthy, reset=reset, **kw)
+    return pool, launched
+
+def test_sessions_are_reused_and_reset():
+    pool, launched = _pool(max_size=2)
+    with pool.session("meshing") as s1:
+        pass
+    with pool.session("meshing") as s2:
+        assert s2 is s1
+    assert len(launched) == 1 and s1.resets == 2
+    assert pool.stats()["meshing_idle"] == 1
+
+def test_max_size_blocks_then_evicts_other_mode():
+    pool, launched = _pool(max_size=1)
+    lease_id, solver = pool.lease("solver")
+    with pytest.raises(TimeoutError):
+        pool.lease("meshing", timeout=0.05)
+    pool.release(lease_id)
+    with pool.session("meshing") as meshing:
+        assert meshing.mode == "meshing"
+    assert solver.exited and pool.stats()["size"] == 1
+
+def test_unhealthy_and_idle_sessions_are_dropped():
+    pool, launched = _pool(max_size=2, idle_timeout=0.0)
+    with pool.session("solver") as s1:
+        pass
+    s1.healthy = False
+    with pool.session("solver") as s2:
+        assert s2 is not s1
+    assert s1.exited
+    assert pool.reap_idle() == 1 and s2.exited
+
+def test_session_rpcs_run_outside_the_lock():
+    entered, unblock = threading.Event(), threading.Event()
+
+    def slow_reset(session, mode):
+        if mode == "meshing":
+            entered.set()
+            unblock.wait(5)
+
+    pool = SessionPool(FakeSession, max_size=2, health_check=lambda s: s.healthy, reset=slow_reset)
+    lease_id, meshing = pool.lease("meshing")
+    releaser = threading.Thread(target=pool.release, args=(lease_id,))
+    releaser.start()
+    assert entered.wait(5)
+    # While one session is being reset the pool still answers, and does not hand it out
+    assert pool.stats()["meshing_leased"] == 1
+    with pool.session("solver", timeout=1) as solver:
+        assert solver.mode == "solver"
+    unblock.set()
+    releaser.join(5)
+    assert pool.stats()["meshing_idle"] == 1
+
+def test_server_leases_over_connection():
+    pool, launched = _pool(max_size=2)
+    server = PoolServer(pool, ("localhost", 0), authkey=b"test", info=lambda s: {"mode": s.mode})
+    server.start()
+    client = PoolClient(f"localhost:{server.address[1]}", authkey=b"test", connector=lambda info: info)
+    try:
+        with client.lease("solver") as info:
+            assert info == {"mode": "solver"}
+            assert client.stats()["solver_leased"] == 1
+        assert client.stats()["solver_idle"] == 1
+        with pytest.raises(ValueError):
+            with client.lease("solver"):
+                raise ValueError("solve failed")
+        assert launched[0].exited  # failed lease is not returned to the pool
+    finally:
+        client.close()
+        server.close()
+
+def test_pool_key_is_random_private_and_required_off_loopback(tmp_path: Path, monkeypatch):
+    monkeypatch.delenv("WING_AERO_POOL_KEY", raising=False)
+    key_file = str(tmp_path / "pool.key")
+    with pytest.raises(ValueError, match="WING_AERO_POOL_KEY"):
+        server_authkey("0.0.0.0", key_file)
+
+    key = server_authkey("localhost", key_file)
+    assert len(key) == 64 and (tmp_path / "pool.key").stat().st_mode & 0o777 == 0o600
+    assert server_authkey("127.0.0.1", key_file) == client_authkey(key_file) == key
+    (tmp_path / "pool.key").chmod(0o644)
+    with pytest.raises(PermissionError):
+        client_authkey(key_file)
+
+    monkeypatch.setenv("WING_AERO_POOL_KEY", "shared")
+    assert server_authkey("0.0.0.0", key_file) == client_authkey(key_file) == b"shared"
@@ -0,0 +1,86 @@
+import csv
+import sys
+from math import radians, sin
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from src.config import SolverConfig
+from src.solver import continuation_order, solve_sweep
+from fakes import FakeSolver
+
+def _rows(path):
+    with open(path) as f:
+        return list(csv.DictReader(f))
+
+def test_continuation_order_marches_out_from_zero():
+    plan = continuation_order([-4, 6, 0, 2, -2, 4])
+    assert plan == [(0, None), (2, 0), (4, 2), (6, 4), (-2, 0), (-4, -2)]
+    assert continuation_order([3, 5]) == [(3, None), (5, 3)]
+
+def test_continuation_sweep_warm_starts(tmp_path: Path):
+    solver = FakeSolver()
+    cfg = SolverConfig(aoa_deg=[-2, 0, 2, 4], n_iters=200, continuation=True, n_iters_warm=50,
+                       watchdog=False)
+    rows = _rows(solve_sweep(solver, cfg, str(tmp_path / "res.csv")))
+
+    # Solved 0, 2, 4 then -2, but written in AoA order
+    assert [float(r["AoA_deg"]) for r in rows] == [-2, 0, 2, 4]
+    assert [r["Init"] for r in rows] == ["aoa 0", "hybrid", "aoa 0", "aoa 2"]
+    assert len(solver.calls_to("hybrid_initialize")) == 1
+    assert [c[2]["number_of_iterations"] for c in solver.calls_to("iterate")] == [200, 50, 50, 50]
+    # Only the anchor is snapshotted, and reloaded once for the downward branch
+    assert len(solver.calls_to("file.write")) == 1
+    assert len(solver.calls_to("file.read_data")) == 1
+
+def test_continuation_cold_starts_after_divergence(tmp_path: Path):
+    solver = FakeSolver(diverge_above=3)
+    cfg = SolverConfig(aoa_deg=[0, 2, 4, 6], continuation=True)
+    rows = _rows(solve_sweep(solver, cfg, str(tmp_path / "res.csv")))
+    assert [r["Init"] for r in rows] == ["hybrid", "aoa 0", "aoa 2", "hybrid"]
+
+def test_converge_mode_records_iterations(tmp_path: Path):
+    cfg = SolverConfig(aoa_deg=[0, 4], n_iters=500, converge=True, conv_chunk=25, conv_window=4)
+    rows = _rows(solve_sweep(FakeSolver(), cfg, str(tmp_path / "res.csv")))
+    # Fake forces are steady, so each angle stops after one full window
+    assert [r["Iters"] for r in rows] == ["100", "100"]
+    assert [r["Converged"] for r in rows] == ["True", "True"]
+
+def test_force_reports_defined_once_and_fetched_in_one_call(tmp_path: Path):
+    solver = FakeSolver()
+    cfg = SolverConfig(aoa_deg=[0, 4, 8], n_iters=10)
+    rows = _rows(solve_sweep(solver, cfg, str(tmp_path / "res.csv")))
+
+    assert len(solver.calls_to("report_definitions.compute")) == 3  # one batched call per angle
+    assert len(solver.solution.report_definitions.force._items) == 6  # x/y/z per zone, created once
+    for r in rows:
+        assert float(r["CL_wing"]) + float(r["CL_wing-tip"]) == pytest.approx(float(r["CL"]))
+        assert float(r["Cm"]) == pytest.approx(float(r["Cm_wing"]) * 2)
+    # Lift and drag are resolved along the flow direction
+    assert float(rows[2]["Drag_N"]) == pytest.approx(10.0 + 50.0 * radians(8) ** 2)
+    assert float(rows[2]["Lift_N"]) == pytest.approx(600.0 * sin(radians(8)))
+    assert float(rows[2]["Cm"]) < 0 < float(rows[2]["CL"])
+
+def test_watchdog_aborts_and_recovers_diverging_angles(tmp_path: Path):
+    solver = FakeSolver(diverge_above=3, stable_courant=150)
+    cfg = SolverConfig(aoa_deg=[0, 4], n_iters=200, conv_chunk=25)
+    rows = _rows(solve_sweep(solver, cfg, str(tmp_path / "res.csv")))
+
+    assert rows[0]["Attempts"] == "" and rows[0]["Iters"] == "200"
+    # Aborted after one chunk, then solved with a halved Courant number
+    assert rows[1]["Attempts"] == "hybrid:nan@25; relax:ok@200"
+    assert rows[1]["Iters"] == "225" and float(rows[1]["CL"]) > 0
+    assert solver.solution.controls.p_v_controls.flow_courant_number == 200.0  # restored
+
+def test_unrecoverable_angle_is_nan_after_a_few_chunks(tmp_path: Path):
+    solver = FakeSolver(diverge_above=3)
+    cfg = SolverConfig(aoa_deg=[4], n_iters=500, conv_chunk=25, recovery=["relax", "first-order", "neighbour"])
+    row = _rows(solve_sweep(solver, cfg, str(tmp_path / "res.csv")))[0]
+
+    # No converged neighbour on disk, so the neighbour restart is skipped
+    assert row["Attempts"] == "hybrid:nan@25; relax:nan@25; first-order:nan@25"
+    assert row["Iters"] == "75" and row["CL"] == "nan" and row["Converged"] == "False"
+    assert solver.solution.methods.spatial_discretization.discretization_scheme["mom"] == "second-order-upwind"
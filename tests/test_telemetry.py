@@ -0,0 +1,49 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from src import telemetry
+from src.config import SolverConfig
+from src.solver import solve_sweep
+from fakes import FakeSolver
+
+@pytest.fixture
+def tracer():
+    yield telemetry.enable()
+    telemetry.disable()
+
+def test_disabled_spans_record_nothing():
+    assert not telemetry.enabled()
+    with telemetry.span("solver.iterate", aoa=2.0) as sp:
+        sp.set(iters=10)
+    assert telemetry.span("a") is telemetry.span("b")  # shared no-op
+
+def test_sweep_spans_nest_and_export(tmp_path: Path, tracer):
+    cfg = SolverConfig(aoa_deg=[0, 4], n_iters=5, converge=True, conv_chunk=1, conv_window=2, cl_tol=1.0, cd_tol=1.0)
+    solve_sweep(FakeSolver(), cfg, str(tmp_path / "res.csv"))
+
+    events = tracer.events()
+    aoa = [e for e in events if e["name"] == "solver.aoa"]
+    assert [e["meta"]["aoa"] for e in aoa] == [0, 4]
+    assert all(e["meta"]["iters"] == 2 for e in aoa)
+    assert {e["parent"] for e in events if e["name"] == "solver.iterate"} == {"solver.aoa"}
+    assert {"solver.setup_physics", "solver.gas_state", "solver.initialize",
+            "solver.io.write"} <= {e["name"] for e in events}
+
+    paths = tracer.write(tmp_path)
+    summary = json.loads(Path(paths["summary"]).read_text())
+    assert summary["stages"]["solver.iterate"]["count"] == 4
+    trace = json.loads(Path(paths["trace"]).read_text())["traceEvents"]
+    complete = [e for e in trace if e["ph"] == "X"]
+    assert len(complete) == len(events) and all(e["dur"] >= 0 for e in complete)
+
+def test_span_records_exceptions(tracer):
+    with pytest.raises(RuntimeError):
+        with telemetry.span("mesh.volume"):
+            raise RuntimeError("boom")
+    assert tracer.events()[0]["meta"]["error"] == "RuntimeError"
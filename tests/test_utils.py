@@ -18,3 +18,35 @@ def test_first_layer_height_reasonable_range():
     assert 1e-6 < y1 < 1e-4  # ~5e-6 m is typical here
     assert nu > 0
     assert u_tau > 0
+
+def test_isa_atmosphere_reference_points():
+    from src.utils import isa_atmosphere
+    T0, p0, rho0 = isa_atmosphere(0.0)
+    assert (T0, p0) == (288.15, 101325.0) and abs(rho0 - 1.225) < 1e-3
+    T11, p11, _ = isa_atmosphere(11000.0)
+    assert abs(T11 - 216.65) < 1e-9 and abs(p11 - 22632.0) < 5.0
+
+def test_array_versions_match_scalar_api():
+    import pytest
+    np = pytest.importorskip("numpy")
+    from src import utils
+
+    T = np.array([220.0, 250.0, 288.15])
+    p = np.array([30000.0, 60000.0, 101325.0])
+    U = utils.u_inf_from_mach_array(0.2, T)
+    y1, nu, u_tau = utils.first_layer_height_from_yplus_array(1.0, U, 0.30, T, p)
+    for i in range(3):
+        ref = utils.first_layer_height_from_yplus(1.0, float(U[i]), 0.30, float(T[i]), float(p[i]))
+        assert np.allclose([y1[i], nu[i], u_tau[i]], ref, rtol=1e-12)
+
+    # Broadcasting: Mach grid x temperature grid
+    a = utils.u_inf_from_mach_array(np.array([[0.1], [0.2]]), T)
+    assert a.shape == (2, 3) and np.isclose(a[1, 2], utils.u_inf_from_mach(0.2, 288.15))
+    assert np.array_equal(utils.flat_plate_cf_turbulent_array([0.0, -1.0]), [0.003, 0.003])
+
+    h = np.linspace(0.0, 51000.0, 257)
+    T_h, p_h, rho_h = utils.isa_atmosphere_array(h)
+    ref = np.array([utils.isa_atmosphere(x) for x in h])
+    assert np.allclose(np.column_stack([T_h, p_h, rho_h]), ref, rtol=1e-12)
+    with pytest.raises(ValueError):
+        utils.isa_atmosphere_array([-10.0])
@@ -0,0 +1,45 @@
+import sys
+from math import exp, sin
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from src.watchdog import FirstOrderRecovery, Watchdog
+from fakes import FakeSolver
+
+def _feed(watchdog, samples):
+    for cl, res in samples:
+        reason = watchdog.check(cl, 0.02, {"continuity": res})
+        if reason:
+            return reason
+    return None
+
+def test_converging_transient_passes():
+    # Damped oscillation settling onto CL = 0.5 with falling residuals
+    samples = [(0.5 + 0.1 * exp(-i / 2) * (-1) ** i, 10 ** (-i / 5)) for i in range(20)]
+    assert _feed(Watchdog(), samples) is None
+
+def test_nan_and_blow_up():
+    assert Watchdog().check(float("nan"), 0.02) == "nan"
+    assert Watchdog().check(0.5, 0.02, {"k": float("inf")}) == "nan"
+    rising = [(0.5, 1e-4), (0.5, 1e-5), (0.5, 1e-3), (0.5, 2e-2)]
+    assert _feed(Watchdog(blowup_factor=1e3), rising) == "blow-up"
+    assert Watchdog(cl_limit=5).check(40.0, 0.02) == "blow-up"
+
+def test_limit_cycle_is_detected():
+    cycle = [(0.8 + 0.05 * sin(2.2 * i), 1e-3) for i in range(12)]
+    assert _feed(Watchdog(osc_window=6, osc_cl_amp=0.02), cycle) == "oscillation"
+    # The same cycle below the amplitude threshold is tolerated
+    assert _feed(Watchdog(osc_window=6, osc_cl_amp=0.2), cycle) is None
+
+def test_first_order_recovery_restores_the_previous_schemes():
+    solver = FakeSolver()
+    schemes = solver.solution.methods.spatial_discretization.discretization_scheme
+    schemes["mom"] = "third-order-muscl"
+    rec = FirstOrderRecovery()
+    assert rec.apply(solver, 4.0, {})
+    assert schemes["mom"] == schemes["k"] == "first-order-upwind"
+    rec.restore(solver)
+    # The user's scheme comes back; unreadable ones fall back to second order
+    assert schemes["mom"] == "third-order-muscl" and schemes["k"] == "second-order-upwind"